@@ -0,0 +1,282 @@
+"""Benchmarks for the transfer characteristics, config loading and lookups.
+
+Runs offline against synthetic data and writes the results as JSON. When a baseline
+is given, benchmarks more than the tolerance slower than the baseline, or missing from
+it, are reported and the script exits with status 1. Record a new baseline whenever a
+benchmark is added or changed.
+
+    python benchmarks/run_benchmarks.py --output results.json --baseline benchmarks/baseline.json
+    python benchmarks/run_benchmarks.py --save-baseline benchmarks/baseline.json
+"""
+import argparse
+import json
+import os
+import platform
+import statistics
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '..')))
+
+import numpy as np
+from tcolour import config
+from tcolour import transfer_characteristic as TC
+from tcolour import transform
+
+SIZES = [1000, 100000, 1000000]
+DTYPES = [np.float16, np.float32, np.float64]
+CHUNK_COUNTS = [10, 100, 1000]
+
+SRGB = """
+- sRGB OETF:
+    Transfer Characteristic:
+        - Type: Parametric
+        - Function: powerwithbreak
+        - Parameters: {a: 1.055, b: -0.055, c: 12.92, d: 0.0031308, g: 2.4}
+- sRGB EOTF:
+    Transfer Characteristic:
+        - Type: Parametric
+        - Function: power
+        - Parameters: {a: 2.2}
+- sRGB Presentation:
+    Transfer Characteristic:
+        - Type: Sequence
+        - Sequence:
+            - { Descriptor: sRGB OETF, Direction: forward }
+            - { Descriptor: sRGB EOTF, Direction: inverse }
+"""
+
+CHUNK = """
+- Space {n}:
+    RGB Primaries: {{Red: {{x: 0.64, y: 0.33}}, Green: {{x: 0.3, y: 0.6}}, Blue: {{x: 0.15, y: 0.06}}}}
+    Achromatic Centroid: {{x: 0.3127, y: 0.329}}
+    Transfer Characteristic:
+        - Type: Parametric
+        - Function: log10withbreak
+        - Parameters: {{a: 5.555556, b: 0.052272, c: 0.24719, d: 0.385537, e: 5.367655, f: 0.092809, h: 0.010591}}
+    Alias: [space alias {n}, other alias {n}]
+"""
+
+CHAIN_LINK = """
+- Link {n}:
+    RGB Primaries: Link {previous}
+    Achromatic Centroid: Link {previous}
+    Transfer Characteristic: Link {previous}
+"""
+
+
+def measure(function, repeats:int=5, min_time:float=0.01) -> float:
+    """Returns the median time in seconds of one call to function. Fast functions are
+    looped so each timed sample lasts at least min_time"""
+    loops = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or loops >= 1000000:
+            break
+        loops *= 10
+
+    samples = [elapsed / loops]
+    for _ in range(repeats - 1):
+        start = time.perf_counter()
+        for _ in range(loops):
+            function()
+        samples.append((time.perf_counter() - start) / loops)
+    return statistics.median(samples)
+
+
+def transfer_characteristics(directory:str) -> dict:
+    conf = config.Config()
+    conf.add_colourimetry(SRGB)
+
+    lut_path = os.path.join(directory, "curve.spi1d")
+    with open(lut_path, 'w') as file:
+        file.write("Version 1\nFrom 0.0 1.0\nLength 4096\nComponents 1\n{\n")
+        file.writelines("%.9f\n" % v for v in np.linspace(0.0, 1.0, 4096) ** 2.2)
+        file.write("}\n")
+
+    return {
+        "Power": TC.TransferCharacteristicPower({"a": 2.2}),
+        "PowerWithBreak": TC.TransferCharacteristicPowerWithBreak({"a": 1.055, "b": -0.055, "c": 12.92, "d": 0.0031308, "g": 2.4}),
+        "Log10WithBreak": TC.TransferCharacteristicLog10WithBreak({"a": 5.555556, "b": 0.052272, "c": 0.24719, "d": 0.385537,
+                                                                   "e": 5.367655, "f": 0.092809, "h": 0.010591}),
+        "Sequence": conf.get_colourimetry("sRGB Presentation").transfer_characteristic,
+        "URI": TC.TransferCharacteristicURI("file://" + lut_path),
+    }
+
+
+def benchmark_transfer(results:dict, directory:str, sizes:list):
+    rng = np.random.default_rng(0)
+    for name, characteristic in transfer_characteristics(directory).items():
+        for size in sizes:
+            for dtype in DTYPES:
+                data = rng.random(size).astype(dtype)
+                for direction in ["forward", "inverse"]:
+                    function = characteristic.forward_transfer if direction == "forward" else characteristic.inverse_transfer
+                    seconds = measure(lambda: function(data))
+                    results["transfer/%s/%s/%d/%s" % (name, direction, size, np.dtype(dtype).name)] = {
+                        "seconds": seconds, "elements_per_second": size / seconds}
+
+            inverse = characteristic.numeric_inverse()
+            data = rng.random(size)
+            seconds = measure(lambda: inverse.apply(data))
+            results["transfer/%s/numeric_inverse/%d/float64" % (name, size)] = {
+                "seconds": seconds, "elements_per_second": size / seconds}
+
+
+def benchmark_integer(results:dict, directory:str, sizes:list):
+    rng = np.random.default_rng(0)
+    characteristics = transfer_characteristics(directory)
+    for size in sizes:
+        for bits in [8, 10, 16]:
+            codes = rng.integers(0, 2 ** bits, size).astype(np.uint8 if bits == 8 else np.uint16)
+            data = rng.random(size).astype(np.float32)
+            decode = characteristics["Log10WithBreak"].decode_integer
+            encode = characteristics["PowerWithBreak"].encode_integer
+            seconds = measure(lambda: decode(codes, bits))
+            results["integer/decode/Log10WithBreak/%d/%d" % (size, bits)] = {"seconds": seconds, "elements_per_second": size / seconds}
+            seconds = measure(lambda: encode(data, bits))
+            results["integer/encode/PowerWithBreak/%d/%d" % (size, bits)] = {"seconds": seconds, "elements_per_second": size / seconds}
+
+
+def write_chunk_files(directory:str, count:int) -> list:
+    paths = []
+    for n in range(count):
+        path = os.path.join(directory, "chunk_%d_%d.yaml" % (count, n))
+        with open(path, 'w') as file:
+            file.write(CHUNK.format(n=n))
+        paths.append(path)
+    return paths
+
+
+def chain_stream(depth:int) -> str:
+    """A chain of depth chunks, each referencing the previous one, written last link first"""
+    links = [CHAIN_LINK.format(n=n, previous=n - 1) for n in range(depth - 1, 0, -1)]
+    return "".join(links) + CHUNK.format(n=0).replace("Space 0", "Link 0")
+
+
+def benchmark_config(results:dict, directory:str, counts:list):
+    for count in counts:
+        paths = write_chunk_files(directory, count)
+
+        def add_files():
+            conf = config.Config()
+            for path in paths:
+                conf.add_colourimetry(path)
+
+        def add_many():
+            config.Config().add_many(paths)
+
+        def add_many_lazy():
+            conf = config.Config(lazy=True)
+            conf.add_many(paths)
+            conf.get_colourimetry("Space 0")
+
+        def update_references():
+            conf = config.Config()
+            conf.add_colourimetry(chain_stream(count))
+
+        # One chunk added to a loaded config, which should cost much less than reloading it
+        loaded = config.Config()
+        loaded.add_many(paths)
+        template = loaded.get_colourimetry("Space 0")
+        added = iter(range(10 ** 9))
+
+        def add_one():
+            n = next(added)
+            loaded.add_colourimetry(template.replace(descriptor="Added %d" % n, alias=["added alias %d" % n]))
+
+        # Startup from an up to date snapshot of the same files, against parsing them with add_many
+        snapshot = os.path.join(directory, "snapshot_%d.json" % count)
+        config.Config.from_files(paths, snapshot)
+
+        def from_snapshot():
+            config.Config.from_files(paths, snapshot)
+
+        results["config/add_colourimetry/%d" % count] = {"seconds": measure(add_files, repeats=3)}
+        results["config/add_many/%d" % count] = {"seconds": measure(add_many, repeats=3)}
+        results["config/add_many/lazy/%d" % count] = {"seconds": measure(add_many_lazy, repeats=3)}
+        results["config/update_references/chain/%d" % count] = {"seconds": measure(update_references, repeats=3)}
+        results["config/add_colourimetry/one/%d" % count] = {"seconds": measure(add_one, repeats=3, min_time=0.001)}
+        results["config/from_files/snapshot/%d" % count] = {"seconds": measure(from_snapshot, repeats=3)}
+
+
+def benchmark_lookups(results:dict, counts:list):
+    for count in counts:
+        conf = config.Config()
+        conf.add_colourimetry("".join(CHUNK.format(n=n) for n in range(count)))
+        last = count - 1
+
+        results["lookup/descriptor/%d" % count] = {"seconds": measure(lambda: conf.get_colourimetry("Space %d" % last))}
+        results["lookup/alias/%d" % count] = {"seconds": measure(lambda: conf.get_colourimetry("other alias %d" % last))}
+        results["lookup/matrix_table/%d" % count] = {"seconds": measure(lambda: transform.MatrixTable(conf.config.values()))}
+
+
+def compare(results:dict, baseline:dict, tolerance:float) -> list:
+    """Returns the names of benchmarks more than tolerance slower than the baseline or
+    missing from it"""
+    regressions = []
+    for name, result in sorted(results.items()):
+        if name not in baseline:
+            regressions.append(name)
+            print("MISSING BASELINE: %s %.3g s has no baseline entry" % (name, result["seconds"]))
+        elif result["seconds"] > baseline[name]["seconds"] * (1.0 + tolerance):
+            regressions.append(name)
+            print("REGRESSION: %s %.3g s against a baseline of %.3g s"
+                  % (name, result["seconds"], baseline[name]["seconds"]))
+    return regressions
+
+
+def main(arguments=None) -> int:
+    parser = argparse.ArgumentParser(description="Run the tcolour benchmarks")
+    parser.add_argument("--output", help="Write the results as JSON to this file")
+    parser.add_argument("--baseline", help="Compare the results against this baseline JSON file")
+    parser.add_argument("--save-baseline", help="Write the results as a new baseline JSON file")
+    parser.add_argument("--tolerance", type=float, default=0.25, help="Allowed slowdown before reporting a regression")
+    parser.add_argument("--quick", action="store_true", help="Only run the smallest sizes")
+    parser.add_argument("--filter", default="", help="Only run benchmark groups starting with this prefix")
+    args = parser.parse_args(arguments)
+
+    sizes = SIZES[:2] if args.quick else SIZES
+    counts = CHUNK_COUNTS[:2] if args.quick else CHUNK_COUNTS
+
+    results = {}
+    with tempfile.TemporaryDirectory() as directory:
+        groups = {"transfer": lambda: benchmark_transfer(results, directory, sizes),
+                  "integer": lambda: benchmark_integer(results, directory, sizes),
+                  "config": lambda: benchmark_config(results, directory, counts),
+                  "lookup": lambda: benchmark_lookups(results, counts)}
+        for group, run in groups.items():
+            if group.startswith(args.filter) or args.filter.startswith(group):
+                run()
+    results = {name: result for name, result in results.items() if name.startswith(args.filter)}
+
+    report = {"metadata": {"python": platform.python_version(),
+                           "numpy": np.__version__,
+                           "platform": platform.platform(),
+                           "processor": platform.processor()},
+              "benchmarks": results}
+
+    for name, result in sorted(results.items()):
+        print("%-60s %12.3g s" % (name, result["seconds"]))
+
+    if args.output:
+        with open(args.output, 'w') as file:
+            json.dump(report, file, indent=1, sort_keys=True)
+    if args.save_baseline:
+        with open(args.save_baseline, 'w') as file:
+            json.dump(report, file, indent=1, sort_keys=True)
+
+    if args.baseline:
+        with open(args.baseline, 'r') as file:
+            baseline = json.load(file)["benchmarks"]
+        if compare(results, baseline, args.tolerance):
+            return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
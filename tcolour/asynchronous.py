@@ -0,0 +1,72 @@
+"""Runs blocking loading and conversion work for asyncio code without blocking the event loop.
+
+Work is offloaded to one bounded thread pool shared by the whole package. Calls given a
+key while a call with the same key is already in flight on the same event loop wait for
+that call rather than starting another, so many concurrent requests for the same file or
+conversion share one computation. Every caller of a shared call, including the one that
+started it, gets its own copy of an array result.
+"""
+import asyncio
+from concurrent.futures import ThreadPoolExecutor
+import functools
+import threading
+import weakref
+import numpy as np
+from . import parallel
+
+# The number of worker threads, by default every available core
+max_workers = None
+
+_executor = None
+_executor_lock = threading.Lock()
+_in_flight = weakref.WeakKeyDictionary()
+
+
+def executor() -> ThreadPoolExecutor:
+    """Returns the thread pool the asynchronous functions run on, starting it if needed"""
+    global _executor
+    with _executor_lock:
+        if _executor is None:
+            _executor = ThreadPoolExecutor(max_workers=max_workers or parallel.available_cores(),
+                                           thread_name_prefix="tcolour")
+        return _executor
+
+
+def shutdown(wait:bool=True):
+    """Shuts down the thread pool. It is started again by the next call"""
+    global _executor
+    with _executor_lock:
+        pool, _executor = _executor, None
+    if pool is not None:
+        pool.shutdown(wait=wait)
+
+
+def in_flight() -> int:
+    """Returns the number of keyed calls running on the current event loop"""
+    return len(_in_flight.get(asyncio.get_running_loop(), ()))
+
+
+async def run(function, *args, key=None, **kwargs):
+    """Returns function(*args, **kwargs), run on the thread pool. While a call with the same
+    hashable key is in flight, later callers wait for it instead, and every caller gets its
+    own copy of an array result. Cancelling one caller does not cancel a call shared with
+    others"""
+    loop = asyncio.get_running_loop()
+    call = functools.partial(function, *args, **kwargs)
+    if key is None:
+        return await loop.run_in_executor(executor(), call)
+
+    with _executor_lock:
+        calls = _in_flight.setdefault(loop, {})
+    future = calls.get(key)
+    if future is None:
+        future = loop.run_in_executor(executor(), call)
+        calls[key] = future
+        future.add_done_callback(lambda done: calls.pop(key) if calls.get(key) is done else None)
+
+    # The shared result itself is never returned, as callers resume one after another and
+    # the first could write into it before the others take their copies
+    result = await asyncio.shield(future)
+    if isinstance(result, np.ndarray):
+        return result.copy()
+    return result
@@ -1,37 +1,108 @@
 from enum import Enum
+import numpy as np
 from . import transfer_characteristic as TC
 
+
+def _freeze(value):
+    """Returns lists as tuples so they cannot be changed through a shared instance"""
+    return tuple(value) if isinstance(value, list) else value
+
+
 class RGBPrimaries():
-    """Defines a set of three RGB primaries using the CIE xy coordinate system."""
+    """Defines a set of three RGB primaries using the CIE xy coordinate system.\n
+    Instances are immutable and hashable. The coordinates are held in a read only
+    (3, 2) float64 array, one row per primary.\n
+    Attributes:\n
+        xy:         The red, green and blue xy coordinates, or None if they are not set.
+        reference:  The descriptor of the colourimetry chunk these primaries refer to.
+    """
+    __slots__ = ("xy", "reference")
+
+    def __init__(self, r=(), g=(), b=(), reference="", xy=None) -> None:
+        if xy is None and len(r) and len(g) and len(b):
+            xy = np.array([r, g, b], dtype=np.float64)
+        if xy is not None:
+            xy = np.asarray(xy, dtype=np.float64)
+            if xy.shape != (3, 2):
+                raise ValueError("RGB Primaries must be three pairs of xy coordinates", xy.shape)
+            if xy.flags.writeable:
+                xy = xy.copy()
+                xy.flags.writeable = False
+
+        object.__setattr__(self, "xy", xy)
+        object.__setattr__(self, "reference", reference)
+
+    @property
+    def r(self) -> list:
+        return self.xy[0].tolist() if self.xy is not None else []
+
+    @property
+    def g(self) -> list:
+        return self.xy[1].tolist() if self.xy is not None else []
 
-    def __init__(self, r=[], g=[], b=[], reference="") -> None:
-        self.r = r
-        self.g = g
-        self.b = b
-        self.reference = reference
+    @property
+    def b(self) -> list:
+        return self.xy[2].tolist() if self.xy is not None else []
 
     def valid(self) -> bool:
-        if not self.r or not self.g or not self.b:
+        if self.xy is None:
             return False
         if self.reference:
             return False
 
         return True
 
+    def __setattr__(self, name, value):
+        raise AttributeError("RGBPrimaries is immutable")
+
+    def __delattr__(self, name):
+        raise AttributeError("RGBPrimaries is immutable")
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, RGBPrimaries):
+            return NotImplemented
+        if self.reference != other.reference or (self.xy is None) != (other.xy is None):
+            return False
+        return self.xy is None or bool(np.array_equal(self.xy, other.xy))
+
+    def __hash__(self) -> int:
+        return hash((None if self.xy is None else tuple(self.xy.ravel().tolist()), self.reference))
+
+    def __reduce__(self):
+        return (RGBPrimaries, (self.r, self.g, self.b, self.reference))
+
     def __repr__(self) -> str:
         return "RGBPrimaries(r=%r, g=%r, b=%r)" % (self.r, self.g, self.b)
-    
+
     def __str__(self) -> str:
         return "%r, %r, %r" % (self.r, self.g, self.b)
 
 class CIEVersion(Enum):
     CIE_1931_2_DEGREE = 1
     CIE_2015_2_DEGREE = 2
-    
+
+
+def cie_observer(cie_version) -> CIEVersion:
+    """Returns the CIEVersion for a CIE version given as the enum, its name as read from
+    YAML, or its value. Unset versions are the 1931 observer"""
+    if cie_version is None:
+        return CIEVersion.CIE_1931_2_DEGREE
+    if isinstance(cie_version, CIEVersion):
+        return cie_version
+    try:
+        if isinstance(cie_version, str):
+            return CIEVersion[cie_version.strip()]
+        return CIEVersion(cie_version)
+    except (KeyError, ValueError):
+        raise ValueError("Unknown CIE version", cie_version) from None
+
 
 
 class Colourimetry:
     """Holds colourmetric data\n
+    Instances are immutable and hashable, use replace() to derive a changed copy. The
+    resolved chromaticities are held in one read only (4, 2) float64 array, the red, green
+    and blue primaries followed by the achromatic centroid, with unset rows filled with NaN.\n
     Attributes:\n
         descriptor:                 A unique identifying key.
         primaries:                  An array defining a set of three RGB primaries using the CIE xy coordinate system.
@@ -39,26 +110,55 @@ class Colourimetry:
         transfer_characteristic:    Either a file, parametric function or named function.
         hints:                      Dictionary providing ancillary colourimetric information.
         alias:                      An array of strings representing aliases for the chosen descriptor.
-        cie_version:                An enum of predefined CIE versions 
+        cie_version:                An enum of predefined CIE versions
+        chromaticities:             The (4, 2) array of primaries and achromatic centroid.
 
     """
-    def __init__(self, descriptor:str="", rgb_primaries:RGBPrimaries=RGBPrimaries(), achromatic:list=[], 
-                 transfer_characteristic=TC.TransferCharacteristic(), hints:list=[], alias:list=[],
+    __slots__ = ("descriptor", "chromaticities", "primaries", "_achromatic_reference", "transfer_characteristic",
+                 "hints", "alias", "cie_version")
+
+    def __init__(self, descriptor:str="", rgb_primaries:RGBPrimaries=None, achromatic=None,
+                 transfer_characteristic=None, hints:list=(), alias:list=(),
                  cie_version:CIEVersion=None) -> None:
-        self.descriptor = descriptor
-        self.primaries = rgb_primaries
-        self.achromatic = achromatic
-        self.transfer_characteristic = transfer_characteristic
-        self.hints = hints
-        self.alias = alias
-        self.cie_version = cie_version
+        chromaticities = np.full((4, 2), np.nan)
+        achromatic_reference = ""
+        if isinstance(achromatic, str):
+            achromatic_reference = achromatic
+        elif achromatic is not None and len(achromatic):
+            if len(achromatic) != 2:
+                raise ValueError("Achromatic Centroid must be a pair of xy coordinates", achromatic)
+            chromaticities[3] = achromatic
+
+        if rgb_primaries is None:
+            rgb_primaries = RGBPrimaries()
+        if rgb_primaries.valid():
+            chromaticities[:3] = rgb_primaries.xy
+        chromaticities.flags.writeable = False
+        if rgb_primaries.valid():
+            rgb_primaries = RGBPrimaries(xy=chromaticities[:3])
+
+        if transfer_characteristic is None:
+            transfer_characteristic = TC.TransferCharacteristic()
+
+        set_slot = object.__setattr__
+        set_slot(self, "descriptor", descriptor)
+        set_slot(self, "chromaticities", chromaticities)
+        set_slot(self, "primaries", rgb_primaries)
+        set_slot(self, "_achromatic_reference", achromatic_reference)
+        set_slot(self, "transfer_characteristic", transfer_characteristic)
+        set_slot(self, "hints", _freeze(hints))
+        set_slot(self, "alias", _freeze(alias))
+        set_slot(self, "cie_version", cie_version)
+
+    @property
+    def achromatic(self):
+        """The achromatic centroid as [x, y], the descriptor it refers to, or [] if unset"""
+        if self.achromatic_valid():
+            return self.chromaticities[3].tolist()
+        return self._achromatic_reference or []
 
     def achromatic_valid(self) -> bool:
-        if(type(self.achromatic) is not list):
-            return False
-        if(len(self.achromatic) != 2):
-            return False
-        return True
+        return bool(np.isfinite(self.chromaticities[3]).all())
 
     def colourspace_valid(self) -> bool:
         if not self.primaries.valid():
@@ -69,7 +169,48 @@ class Colourimetry:
             return False
         return True
 
+    def replace(self, **changes) -> "Colourimetry":
+        """Returns a copy with the given constructor arguments changed"""
+        arguments = {"descriptor": self.descriptor,
+                     "rgb_primaries": self.primaries,
+                     "achromatic": self.achromatic,
+                     "transfer_characteristic": self.transfer_characteristic,
+                     "hints": self.hints,
+                     "alias": self.alias,
+                     "cie_version": self.cie_version}
+        arguments.update(changes)
+        return Colourimetry(**arguments)
+
+    def content_key(self) -> tuple:
+        """Returns a hashable key built from the resolved primaries, achromatic centroid,
+        transfer characteristic and CIE observer. Aliased or duplicated sets share the same key"""
+        primaries = tuple(tuple(xy) for xy in (self.primaries.r, self.primaries.g, self.primaries.b))
+        achromatic = tuple(self.achromatic) if type(self.achromatic) is list else self.achromatic
+        return (primaries, achromatic, self.transfer_characteristic.content_key(), cie_observer(self.cie_version))
+
+    def __setattr__(self, name, value):
+        raise AttributeError("Colourimetry is immutable, use replace()")
+
+    def __delattr__(self, name):
+        raise AttributeError("Colourimetry is immutable, use replace()")
+
+    def __eq__(self, other) -> bool:
+        if not isinstance(other, Colourimetry):
+            return NotImplemented
+        return (self.descriptor == other.descriptor and self.primaries == other.primaries
+                and self.achromatic == other.achromatic and self.hints == other.hints
+                and self.alias == other.alias and self.cie_version == other.cie_version
+                and self.transfer_characteristic.content_key() == other.transfer_characteristic.content_key())
+
+    def __hash__(self) -> int:
+        # The transfer characteristic is left out as a sequence changes its key when resolved
+        achromatic = tuple(self.achromatic) if type(self.achromatic) is list else self.achromatic
+        return hash((self.descriptor, self.primaries, achromatic))
+
+    def __reduce__(self):
+        return (Colourimetry, (self.descriptor, self.primaries, self.achromatic, self.transfer_characteristic,
+                               self.hints, self.alias, self.cie_version))
+
     def __repr__(self) -> str:
         return "Colourimetry(descriptor=%r,primaries=%r, achromatic=%r, transfer_characteristic=%r, hints=%r, alias=%r, cie_version=%r)" \
             % (self.descriptor, self.primaries, self.achromatic, self.transfer_characteristic, self.hints, self.alias, self.cie_version)
-
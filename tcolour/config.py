@@ -1,14 +1,304 @@
+from collections import OrderedDict, namedtuple
+from collections.abc import Mapping
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from contextlib import contextmanager
+import copy
+import glob
+import hashlib
+import json
+import os
+import threading
+import numpy as np
 import yaml
+from . import asynchronous
 from . import colourimetry
+from . import instrumentation
 from . import transfer_characteristic as tc
+from . import transform
 import uritools
 
+
+# Use the libyaml bindings when PyYAML was built with them
+YAMLLoader = getattr(yaml, "CSafeLoader", yaml.SafeLoader)
+
+
+SNAPSHOT_VERSION = 2
+
+
+# The name indices read by lookups, published together so a lookup never sees a partly updated config
+Lookup = namedtuple("Lookup", ["config", "pending", "aliases", "alias_collisions", "normalised_names"])
+
+# Marks an entry removed from a published index since its base was copied
+_REMOVED = object()
+
+
+class _TrackedDict(dict):
+    """A working index recording the keys changed since it was last published, in the
+    order they were first changed"""
+
+    def __init__(self, *args) -> None:
+        super().__init__(*args)
+        self.changed = {}
+
+    def __setitem__(self, key, value):
+        self.changed[key] = None
+        super().__setitem__(key, value)
+
+    def __delitem__(self, key):
+        self.changed[key] = None
+        super().__delitem__(key)
+
+    def pop(self, key, *default):
+        self.changed[key] = None
+        return super().pop(key, *default)
+
+    def popitem(self):
+        key, value = super().popitem()
+        self.changed[key] = None
+        return key, value
+
+    def setdefault(self, key, default=None):
+        if key not in self:
+            self.changed[key] = None
+        return super().setdefault(key, default)
+
+    def update(self, *args, **kwargs):
+        for key, value in dict(*args, **kwargs).items():
+            self[key] = value
+
+    def clear(self):
+        self.changed.update(dict.fromkeys(self))
+        super().clear()
+
+
+class _TrackedSet(set):
+    """A working index of names recording the names changed since it was last published"""
+
+    def __init__(self, *args) -> None:
+        super().__init__(*args)
+        self.changed = {}
+
+    def add(self, name):
+        self.changed[name] = None
+        super().add(name)
+
+    def discard(self, name):
+        self.changed[name] = None
+        super().discard(name)
+
+    def remove(self, name):
+        self.changed[name] = None
+        super().remove(name)
+
+    def pop(self):
+        name = super().pop()
+        self.changed[name] = None
+        return name
+
+    def update(self, *others):
+        for other in others:
+            for name in other:
+                self.add(name)
+
+    def difference_update(self, *others):
+        for other in others:
+            for name in other:
+                self.discard(name)
+
+    def clear(self):
+        self.changed.update(dict.fromkeys(self))
+        super().clear()
+
+    def __ior__(self, other):
+        self.update(other)
+        return self
+
+    def __isub__(self, other):
+        self.difference_update(other)
+        return self
+
+
+class _Index(Mapping):
+    """A published, unchanging copy of a working index. Entries are looked up in the entries
+    changed since the base was copied, then in the base, which is shared with earlier
+    copies, so publishing a change copies the changed entries rather than the whole index.
+    The base is copied afresh once the changes outgrow the square root of its size. Names
+    in a published set map to True.\n
+    Attributes:\n
+        base:       The entries when the base was last copied
+        changes:    The entries changed since, with _REMOVED for removed entries
+    """
+    __slots__ = ("base", "changes", "_length", "_source")
+
+    def __init__(self, base:dict, changes:dict, source) -> None:
+        self.base = base
+        self.changes = changes
+        self._length = len(source)
+        self._source = source
+
+    @classmethod
+    def working(cls, source) -> "_Index":
+        """Returns a view of a working index, reading it as it changes"""
+        return cls(source, {}, source)
+
+    @classmethod
+    def publish(cls, working, previous:"_Index") -> "_Index":
+        """Returns a copy of working, a _TrackedDict or _TrackedSet, reusing previous, the
+        last copy published from the same index, if there is one"""
+        changed = working.changed
+        if previous is not None and previous._source is working and not changed:
+            return previous
+
+        entries = len(changed) + (len(previous.changes) if previous is not None else 0)
+        if previous is None or previous._source is not working or (entries > 32 and entries * entries > len(working)):
+            changed.clear()
+            base = dict.fromkeys(working, True) if isinstance(working, set) else dict(working)
+            return cls(base, {}, working)
+
+        changes = dict(previous.changes)
+        for key in changed:
+            if key in working:
+                changes[key] = True if isinstance(working, set) else working[key]
+            elif key in previous.base:
+                changes[key] = _REMOVED
+            else:
+                changes.pop(key, None)
+        changed.clear()
+        return cls(previous.base, changes, working)
+
+    def __getitem__(self, key):
+        value = self.base.get(key, _REMOVED)
+        if self.changes:
+            value = self.changes.get(key, value)
+        if value is _REMOVED:
+            raise KeyError(key)
+        return value
+
+    def get(self, key, default=None):
+        value = self.base.get(key, default)
+        if self.changes:
+            value = self.changes.get(key, value)
+        return default if value is _REMOVED else value
+
+    def __contains__(self, key) -> bool:
+        if self.changes and key in self.changes:
+            return self.changes[key] is not _REMOVED
+        return key in self.base
+
+    def __iter__(self):
+        changes = self.changes
+        for key in self.base:
+            if changes.get(key) is not _REMOVED:
+                yield key
+        for key, value in changes.items():
+            if value is not _REMOVED and key not in self.base:
+                yield key
+
+    def __len__(self) -> int:
+        return self._length
+
+
+def file_hash(path:str) -> str:
+    """Returns the SHA-256 hex digest of a file's content"""
+    with open(path, 'rb') as file:
+        return hashlib.sha256(file.read()).hexdigest()
+
+
+def load_yaml_file(path:str) -> tuple:
+    """Returns the parsed contents of a YAML file and the SHA-256 hex digest of the file"""
+    with open(path, 'rb') as file:
+        content = file.read()
+    return yaml.load(content, Loader=YAMLLoader), hashlib.sha256(content).hexdigest()
+
+
+def normalise_name(name:str) -> str:
+    """Returns name case folded with runs of whitespace collapsed to single spaces"""
+    return " ".join(str(name).split()).casefold()
+
+
 class Config():
     """Contains a set of colourimetry chunks. Allows for interacting with and 
-    adding or removing colourimetry chunks"""
+    adding or removing colourimetry chunks.\n
+    Built transforms are kept in a least recently used cache of transform_cache_size
+    entries, keyed by the content of the source and destination colourimetry. Their
+    matrices come from a transform.MatrixTable of every resolved chunk, built once after
+    each change the first time a transform is needed, and chromatic_adaptation names the
+    cone response it adapts whites with, "Bradford" or "CAT02".\n
+    Aliases are held in an index. Aliases naming more than one chunk are reported and
+    recorded in alias_collisions, and looking them up raises a KeyError. With
+    normalise_lookups set, lookups that do not match exactly are retried ignoring
+    case and whitespace.\n
+    With lazy set, loading only indexes the descriptors and aliases of each chunk. A chunk
+    is built and its references resolved the first time it is looked up, and is then kept
+    in config.\n
+    The chunks defined in each source file are recorded so reload() can rebuild only the
+    chunks of files that have changed.\n
+    A Config can be shared between threads. Changes are serialised by a lock and made to
+    the working indices, which are published once each change is complete as unchanging
+    copies holding only the entries changed since the last full copy. Lookups read the
+    published copy without locking, so they never wait for a change and never see one half
+    made. Only a lookup that builds a lazily loaded chunk takes the lock"""
 
-    def __init__(self) -> None:
+    def __init__(self, transform_cache_size:int=128, normalise_lookups:bool=False, lazy:bool=False,
+                 chromatic_adaptation:str="Bradford") -> None:
+        if chromatic_adaptation not in transform.CONE_RESPONSES:
+            raise ValueError("Unknown chromatic adaptation", chromatic_adaptation)
         self.config = {}
+        self.normalise_lookups = normalise_lookups
+        self.lazy = lazy
+        self._pending = set()
+        self._definitions = {}
+        self._unrecorded_sources = {}
+        self.alias_collisions = {}
+        self._aliases = {}
+        self._normalised_names = {}
+        self._references = {}
+        self._unresolved = set()
+        self._waiting = {}
+        self._dirty = set()
+        self.sources = {}
+        self.transform_cache_size = transform_cache_size
+        self._transform_cache = OrderedDict()
+        self.chromatic_adaptation = chromatic_adaptation
+        self._matrix_table = (None, None)
+        self._lock = threading.RLock()
+        self._cache_lock = threading.Lock()
+        self._writer = None
+        self._publish()
+
+    def _publish(self):
+        """Publishes copies of the name indices for lookups. Index sets are replaced rather
+        than changed in place, so copying the changed entries is enough. Indices replaced
+        as a whole are tracked again and copied in full"""
+        previous = self.__dict__.get("_lookup")
+        published = []
+        for position, name in enumerate(("config", "_pending", "_aliases", "alias_collisions", "_normalised_names")):
+            working = getattr(self, name)
+            if type(working) not in (_TrackedDict, _TrackedSet):
+                working = _TrackedSet(working) if isinstance(working, (set, frozenset)) else _TrackedDict(working)
+                setattr(self, name, working)
+            published.append(_Index.publish(working, previous[position] if previous is not None else None))
+        self._lookup = Lookup(*published)
+
+    def _current_lookup(self) -> Lookup:
+        """Returns views of the unpublished indices being changed"""
+        return Lookup(_Index.working(self.config), _Index.working(self._pending), _Index.working(self._aliases),
+                      _Index.working(self.alias_collisions), _Index.working(self._normalised_names))
+
+    @contextmanager
+    def _writing(self):
+        """Serialises changes to the config. Lookups from the changing thread see the
+        unpublished indices, which are published once the outermost change is complete"""
+        if self._writer == threading.get_ident():
+            yield
+            return
+        with self._lock:
+            self._writer = threading.get_ident()
+            try:
+                yield
+            finally:
+                self._writer = None
+                self._publish()
 
     def RGBPrimaries_from_YAML(self, yaml_input) -> colourimetry.RGBPrimaries:
         try:
@@ -28,6 +318,22 @@ class Config():
         except KeyError as e:
             print("YAML ERROR: ", e)
 
+    def transfer_characteristic_to_YAML(self, characteristic):
+        """Returns a transfer characteristic in the list form read by transfer_charactersitc_from_YAML,
+        or None if it is not set"""
+        functions = {tc.TransferCharacteristicPowerWithBreak: "powerwithbreak",
+                     tc.TransferCharacteristicPower: "power",
+                     tc.TransferCharacteristicLog10WithBreak: "log10withbreak"}
+
+        if type(characteristic) in functions:
+            return [{"Type": "Parametric"}, {"Function": functions[type(characteristic)]},
+                    {"Parameters": dict(characteristic.parameters)}]
+        if isinstance(characteristic, tc.TransferCharacteristicSequence):
+            return [{"Type": "Sequence"}, {"Sequence": characteristic.sequence}]
+        if isinstance(characteristic, tc.TransferCharacteristicURI):
+            return [{"Type": "URI"}, {"URI": characteristic.URI}]
+        return None
+
     def transfer_charactersitc_from_YAML(self, yaml_input):
         try:
             tc_type = yaml_input[0]["Type"]
@@ -59,51 +365,61 @@ class Config():
             print("YAML ERROR: ", e)
 
     def colourimetry_from_YAML(self,name, yaml_colourimetry):
-        new_colourimetry_set = colourimetry.Colourimetry()
-        new_colourimetry_set.descriptor = name
+        arguments = {"descriptor": name}
 
         if "RGB Primaries" in yaml_colourimetry:
             primaries = yaml_colourimetry["RGB Primaries"]
             if type(primaries) is dict:
-                new_colourimetry_set.primaries = self.RGBPrimaries_from_YAML(primaries)
+                arguments["rgb_primaries"] = self.RGBPrimaries_from_YAML(primaries)
             elif type(primaries) is str:
-                new_colourimetry_set.primaries = colourimetry.RGBPrimaries(reference=primaries)
+                arguments["rgb_primaries"] = colourimetry.RGBPrimaries(reference=primaries)
             else:
-                new_colourimetry_set.primaries = primaries
+                arguments["rgb_primaries"] = primaries
 
         if "Achromatic Centroid" in yaml_colourimetry:
             achromatic_centroid = yaml_colourimetry["Achromatic Centroid"]
             if type(achromatic_centroid) is dict:
-                new_colourimetry_set.achromatic = self.achromatic_centroid_from_YAML(achromatic_centroid)
+                arguments["achromatic"] = self.achromatic_centroid_from_YAML(achromatic_centroid)
             else:
-                new_colourimetry_set.achromatic = achromatic_centroid
+                arguments["achromatic"] = achromatic_centroid
 
         if "Transfer Characteristic" in yaml_colourimetry:
             transfer_characteristic = yaml_colourimetry["Transfer Characteristic"]
             if type(transfer_characteristic) is list:
-                new_colourimetry_set.transfer_characteristic = self.transfer_charactersitc_from_YAML(transfer_characteristic)
-            else:
-                new_colourimetry_set.transfer_characteristic = tc.TransferCharacteristic()
+                arguments["transfer_characteristic"] = self.transfer_charactersitc_from_YAML(transfer_characteristic)
+            elif type(transfer_characteristic) is str:
+                # A reference to another chunk is a sequence of one forward step
+                arguments["transfer_characteristic"] = tc.TransferCharacteristicSequence(
+                    [{"Descriptor": transfer_characteristic, "Direction": "forward"}])
 
         if "Hints" in yaml_colourimetry:
-            new_colourimetry_set.hints = yaml_colourimetry["Hints"]
+            arguments["hints"] = yaml_colourimetry["Hints"]
 
         if "Alias" in yaml_colourimetry:
-            new_colourimetry_set.alias = yaml_colourimetry["Alias"]
+            arguments["alias"] = yaml_colourimetry["Alias"]
 
         if "CIE Version" in yaml_colourimetry:
-            new_colourimetry_set.cie_version = yaml_colourimetry["CIE Version"]
+            arguments["cie_version"] = yaml_colourimetry["CIE Version"]
+
+        return colourimetry.Colourimetry(**arguments)
 
-        return new_colourimetry_set
+    def parse_data(self, data:list, source:str=None):
+        """Parse the YAML data. source is the file the data was read from, if any"""
+        with self._writing():
+            self._parse_data(data, source)
 
-    def parse_data(self, data:list):
-        """Parse the YAML data"""
+    def _parse_data(self, data:list, source:str=None):
         for id, idx in enumerate(data):
  
             name = list(data[id].keys())[0]
             yaml_colourimetry = data[id][name]
+            self._definitions[str(name)] = self._definitions.get(str(name), []) + [(source, yaml_colourimetry)]
 
-            if name in self.config:
+            if name in self._pending:
+                print("WARNING: Colour imetry chunk repeated (" + name + "). Will attempt merge")
+                print("Only Alias and Hints can be merged. To redifine colourimetry please delete the chunk and re add")
+                self._index_names(name, self._definition_aliases(yaml_colourimetry))
+            elif name in self.config:
                 print("WARNING: Colour imetry chunk repeated (" + name + "). Will attempt merge")
                 print("Only Alias and Hints can be merged. To redifine colourimetry please delete the chunk and re add")
                 new_colourimetry = self.colourimetry_from_YAML(name, yaml_colourimetry)
@@ -111,59 +427,597 @@ class Config():
 
                 #print(existing_colourimetry)
 
-                existing_colourimetry.hints = existing_colourimetry.hints + new_colourimetry.hints
-                existing_colourimetry.alias = existing_colourimetry.alias + new_colourimetry.alias
+                self.config[name] = existing_colourimetry.replace(hints=existing_colourimetry.hints + new_colourimetry.hints,
+                                                                  alias=existing_colourimetry.alias + new_colourimetry.alias)
+                self._index_names(name, new_colourimetry.alias)
+            elif self.lazy:
+                self._pending.add(str(name))
+                self._index_names(str(name), self._definition_aliases(yaml_colourimetry))
             else:
                 try:
                     self.config[str(name)] = self.colourimetry_from_YAML(name, yaml_colourimetry)
+                    self._index_names(str(name), self.config[str(name)].alias)
+                    self._track_references(str(name))
                 except Exception as e:
                     print(e, "Skipping this Colourimetry chunk")
 
-    def update_references(self):
-        """Loop through the config and update any references"""
+    @staticmethod
+    def _definition_aliases(definition) -> list:
+        if isinstance(definition, colourimetry.Colourimetry):
+            return definition.alias
+        if isinstance(definition, dict):
+            return definition.get("Alias", [])
+        return []
 
-        for key, value in self.config.items():
-            # TODO: Make recursive maybe?
-            if not value.primaries.valid():
-                if value.primaries.reference:
-                    self.config[key].primaries = self.get_colourimetry(value.primaries.reference).primaries
+    def _build(self, descriptor:str) -> colourimetry.Colourimetry:
+        """Builds a chunk from its recorded definitions, YAML or Colourimetry objects.
+        Definitions after the first only add hints and aliases"""
+        value = None
+        for source, definition in self._definitions[descriptor]:
+            if isinstance(definition, colourimetry.Colourimetry):
+                new_colourimetry = definition
+                sequence = definition.transfer_characteristic
+                if isinstance(sequence, tc.TransferCharacteristicSequence):
+                    # The object's own sequence was resolved against the previous chunks
+                    new_colourimetry = definition.replace(transfer_characteristic=tc.TransferCharacteristicSequence(sequence.sequence))
+            else:
+                new_colourimetry = self.colourimetry_from_YAML(descriptor, definition)
 
-            if not value.achromatic_valid():
-                if type(value.achromatic) is str:
-                    self.config[key].achromatic = self.get_colourimetry(value.achromatic).achromatic
+            if value is None:
+                value = new_colourimetry
+            else:
+                value = value.replace(hints=value.hints + new_colourimetry.hints, alias=value.alias + new_colourimetry.alias)
+        return value
 
-            if not value.transfer_characteristic.valid():
-                pass
-                #print(key)
-                
+    def _materialise(self, descriptor:str):
+        """Builds a chunk left unparsed by lazy loading, along with the unparsed chunks it
+        references. References are resolved by the next update_references"""
+        stack = [descriptor]
+        while stack:
+            name = stack.pop()
+            if name not in self._pending:
+                continue
+            self._pending.discard(name)
+            try:
+                value = self._build(name)
+            except Exception as e:
+                print(e, "Skipping this Colourimetry chunk")
+                continue
+
+            self.config[name] = value
+            self._track_references(name)
+            stack += [target for target in map(self._find_descriptor, self._references[name]) if target in self._pending]
+
+    def materialise(self):
+        """Builds every chunk left unparsed by lazy loading and resolves their references"""
+        with self._writing():
+            for descriptor in list(self._pending):
+                self._materialise(descriptor)
+            self.update_references()
+
+    def _index_names(self, descriptor:str, aliases:list):
+        """Adds a chunk's descriptor and aliases to the lookup indices, reporting any alias
+        that already identifies a different chunk"""
+        for name in [descriptor] + list(aliases):
+            key = normalise_name(name)
+            self._normalised_names[key] = self._normalised_names.get(key, frozenset()) | {descriptor}
+            self._dirty |= self._waiting.pop(name, set())
+
+        if self._aliases.get(descriptor, descriptor) != descriptor:
+            self._alias_collision(descriptor, {descriptor, self._aliases[descriptor]})
+
+        for alias in aliases:
+            existing = self._aliases.setdefault(alias, descriptor)
+            if existing != descriptor:
+                self._alias_collision(alias, {descriptor, existing})
+            elif alias != descriptor and (alias in self.config or alias in self._pending):
+                self._alias_collision(alias, {descriptor, alias})
+
+    def _alias_collision(self, alias:str, descriptors:set):
+        collision = self.alias_collisions.get(alias, set())
+        if not descriptors <= collision:
+            collision = collision | descriptors
+            self.alias_collisions[alias] = collision
+            print("WARNING: Alias (" + alias + ") identifies more than one colourimetry chunk:", sorted(collision))
+
+    @staticmethod
+    def _reference_names(value:colourimetry.Colourimetry) -> set:
+        """Returns the names of the chunks a colourimetry chunk still needs resolving against"""
+        names = set()
+        if not value.primaries.valid() and value.primaries.reference:
+            names.add(value.primaries.reference)
+        if type(value.achromatic) is str:
+            names.add(value.achromatic)
+        if isinstance(value.transfer_characteristic, tc.TransferCharacteristicSequence) and not value.transfer_characteristic.resolved:
+            names |= {item["Descriptor"] for item in value.transfer_characteristic.sequence}
+        return names
+
+    def _track_references(self, descriptor:str):
+        """Adds a newly added chunk to the reference graph"""
+        names = self._reference_names(self.config[descriptor])
+        self._references[descriptor] = names
+        if names:
+            self._unresolved.add(descriptor)
+            self._dirty.add(descriptor)
+
+    def _find_descriptor(self, name:str):
+        """Returns the descriptor of the chunk with the given descriptor or alias, or None"""
+        try:
+            return self._lookup_descriptor(name, self._current_lookup())
+        except KeyError:
+            return None
+
+    def _resolution_order(self, descriptors:set) -> list:
+        """Orders the given unresolved chunks, and the unresolved chunks they reference,
+        so every chunk comes after the chunks it references"""
+        order = []
+        done = set()
+        for start in sorted(descriptors):
+            if start in done:
+                continue
+            path = [start]
+            stack = [iter(sorted(self._references.get(start, ())))]
+            while stack:
+                name = next(stack[-1], None)
+                if name is None:
+                    stack.pop()
+                    done.add(path[-1])
+                    order.append(path.pop())
+                    continue
+                target = self._find_descriptor(name)
+                if target is None or target not in self._unresolved or target in done:
+                    continue
+                if target in path:
+                    cycle = path[path.index(target):] + [target]
+                    self._abandon(set(cycle))
+                    raise ValueError("Colourimetry reference cycle: " + " -> ".join(cycle))
+                path.append(target)
+                stack.append(iter(sorted(self._references.get(target, ()))))
+
+        return order
+
+    def _abandon(self, descriptors:set):
+        """Stops trying to resolve the chunks of a reference cycle. They are kept, unresolved,
+        so later changes to the config are not refused because of the cycle"""
+        self._dirty -= descriptors
+        self._unresolved -= descriptors
+        for name in descriptors:
+            self._waiting.pop(name, None)
+        for name, waiting in list(self._waiting.items()):
+            if waiting & descriptors:
+                self._waiting[name] = waiting - descriptors
+
+    def _resolved_target(self, name:str, is_resolved, waiting_on:set):
+        """Returns the chunk called name if is_resolved(chunk) is True, otherwise adds the
+        name, or the descriptor of the unresolved chunk, to waiting_on"""
+        target = self._find_descriptor(name)
+        if target is not None and is_resolved(self.config[target]):
+            return self.config[target]
+        waiting_on.add(name if target is None else target)
+        return None
+
+    def _resolve(self, descriptor:str):
+        """Resolves the references of one chunk whose referenced chunks are resolved. Chunks
+        that cannot be resolved yet wait for the missing or unresolved chunk"""
+        value = self.config[descriptor]
+        waiting_on = set()
+
+        if not value.primaries.valid() and value.primaries.reference:
+            target = self._resolved_target(value.primaries.reference, lambda col: col.primaries.valid(), waiting_on)
+            if target is not None:
+                value = value.replace(rgb_primaries=target.primaries)
+
+        if type(value.achromatic) is str:
+            target = self._resolved_target(value.achromatic, lambda col: col.achromatic_valid(), waiting_on)
+            if target is not None:
+                value = value.replace(achromatic=target.achromatic)
+
+        sequence = value.transfer_characteristic
+        if isinstance(sequence, tc.TransferCharacteristicSequence) and not sequence.resolved:
+            targets = [self._resolved_target(item["Descriptor"], lambda col: col.transfer_characteristic.valid(), waiting_on)
+                       for item in sequence.sequence]
+            if None not in targets:
+                sequence.resolve(self)
+
+        self.config[descriptor] = value
+        if self._reference_names(value):
+            for name in waiting_on:
+                self._waiting.setdefault(name, set()).add(descriptor)
+        else:
+            self._unresolved.discard(descriptor)
+            self._dirty |= self._waiting.pop(descriptor, set())
+
+    def update_references(self):
+        """Resolves references of newly added chunks, and of chunks waiting on them, to
+        any depth in dependency order. Raises a ValueError on reference cycles"""
+        with self._writing():
+            self._update_references()
+
+    def _update_references(self):
+        while self._dirty:
+            for descriptor in list(self._dirty):
+                for name in self._references.get(descriptor, ()):
+                    target = self._find_descriptor(name)
+                    if target in self._pending:
+                        self._materialise(target)
+            order = self._resolution_order(self._dirty)
+            self._dirty = set()
+            for descriptor in order:
+                self._resolve(descriptor)
 
     def add_colourimetry(self, input):
         """Add a colourinemtry data to the config as either a file or a string"""
+        with self._writing():
+            self._add_colourimetry(input)
+        self.invalidate_transforms()
 
+    def _add_colourimetry(self, input):
         if isinstance(input, str):
             data = None
+            source = None
             try:
-                with open(input, 'r') as file:
-                    data = yaml.safe_load(file)
+                data, self.sources[input] = load_yaml_file(input)
+                source = input
             except Exception:
                 try:
-                    data = yaml.safe_load(input)
+                    data = yaml.load(input, Loader=YAMLLoader)
                 except Exception as e:
                     print(e, "Could not parse input")
 
-            self.parse_data(data)
+            self.parse_data(data, source)
             self.update_references()
 
         elif isinstance(input, colourimetry.Colourimetry):
+            self._materialise(input.descriptor)
+            self._definitions[input.descriptor] = self._definitions.get(input.descriptor, []) + [(None, input)]
             if input.descriptor in self.config:
                 existing_colourimetry = self.config[input.descriptor]
-                existing_colourimetry.hints = existing_colourimetry.hints + input.hints
-                existing_colourimetry.alias = existing_colourimetry.alias + input.alias
+                self.config[input.descriptor] = existing_colourimetry.replace(hints=existing_colourimetry.hints + input.hints,
+                                                                              alias=existing_colourimetry.alias + input.alias)
+                self._index_names(input.descriptor, input.alias)
             else:
                 self.config[input.descriptor] = input
+                self._index_names(input.descriptor, input.alias)
+                self._track_references(input.descriptor)
+            self.update_references()
         else:
             raise TypeError("Input Colourimetry is of the wrong type. Must be file path, Colourimetry() class or stream")
 
+    async def aadd_colourimetry(self, input):
+        """Asynchronous add_colourimetry. The file is read, parsed and added on the
+        asynchronous thread pool, and concurrent calls adding the same input share one add"""
+        await asynchronous.run(self.add_colourimetry, input, key=("add_colourimetry", id(self), input))
+
+    def add_many(self, paths:list, max_workers:int=None, processes:bool=False):
+        """Add colourimetry from many files. The files are parsed concurrently in a thread
+        pool, or a process pool if processes is set, then merged in the order given and
+        references are resolved once at the end"""
+        paths = list(paths)
+        executor_type = ProcessPoolExecutor if processes else ThreadPoolExecutor
+        with executor_type(max_workers=max_workers) as executor:
+            futures = [executor.submit(load_yaml_file, path) for path in paths]
+
+        with self._writing():
+            for path, future in zip(paths, futures):
+                try:
+                    data, self.sources[path] = future.result()
+                except Exception as e:
+                    print(e, "Could not parse", path)
+                    continue
+                if data:
+                    self.parse_data(data, path)
+
+            self.update_references()
+        self.invalidate_transforms()
+
+    def add_directory(self, path:str, pattern:str="*.yaml", max_workers:int=None, processes:bool=False):
+        """Add colourimetry from every file in a directory matching pattern, in sorted
+        order. Use a pattern such as "**/*.yaml" to include subdirectories"""
+        paths = sorted(glob.glob(os.path.join(path, pattern), recursive=True))
+        self.add_many(paths, max_workers, processes)
+
+    def reload(self) -> list:
+        """Reloads the source files whose content has changed since they were loaded and
+        returns their paths. Only the chunks defined in those files, and the chunks that
+        reference them, are rebuilt and resolved again, and only cached transforms whose
+        content changed are dropped. The changes are made to a copy of the config that is
+        swapped in at once, so lookups see either the old or the new config. The chunks of
+        deleted files are removed. For a config loaded from a snapshot the chunks' previous
+        definitions are not known, so every chunk of a changed file is rebuilt"""
+        with self._lock:
+            changed = {}
+            for path, digest in self.sources.items():
+                if not os.path.isfile(path):
+                    changed[path] = (None, None)
+                    continue
+                try:
+                    if file_hash(path) != digest:
+                        changed[path] = load_yaml_file(path)
+                except Exception as e:
+                    print(e, "Could not reload", path)
+
+            if not changed:
+                return []
+
+            staged = self._staged()
+            with staged._writing():
+                staged._reload(changed)
+            self.__dict__.update(staged.__dict__)
+
+        self.invalidate_transforms()
+        return list(changed)
+
+    def _staged(self) -> "Config":
+        """Returns a copy of the config sharing the chunks and transform cache, whose indices
+        can be changed without affecting this config"""
+        staged = copy.copy(self)
+        staged.config = dict(self.config)
+        staged._pending = set(self._pending)
+        staged._definitions = dict(self._definitions)
+        staged._unrecorded_sources = dict(self._unrecorded_sources)
+        staged._aliases = dict(self._aliases)
+        staged.alias_collisions = dict(self.alias_collisions)
+        staged._normalised_names = dict(self._normalised_names)
+        staged._references = dict(self._references)
+        staged._unresolved = set(self._unresolved)
+        staged._waiting = {name: set(names) for name, names in self._waiting.items()}
+        staged._dirty = set(self._dirty)
+        staged.sources = dict(self.sources)
+        staged._writer = None
+        return staged
+
+    @staticmethod
+    def _file_definitions(data:list, path:str) -> dict:
+        """Returns the (path, definition) pairs of each chunk in a parsed file"""
+        definitions = {}
+        for chunk in data or []:
+            name = list(chunk.keys())[0]
+            definitions.setdefault(str(name), []).append((path, chunk[name]))
+        return definitions
+
+    def _record_unrecorded_sources(self, changed:dict):
+        """Records the definitions of chunks loaded from a snapshot by reading their source
+        files. Files that have changed are only marked, as their chunks are rebuilt"""
+        files = {}
+        for descriptor, paths in self._unrecorded_sources.items():
+            definitions = []
+            for path in dict.fromkeys(paths):
+                if path in changed:
+                    definitions.append((path, None))
+                    continue
+                if path not in files:
+                    try:
+                        files[path] = self._file_definitions(load_yaml_file(path)[0], path)
+                    except Exception as e:
+                        print(e, "Could not parse", path)
+                        files[path] = {}
+                definitions += files[path].get(descriptor, [])
+            if definitions:
+                self._definitions[descriptor] = definitions + self._definitions.get(descriptor, [])
+        self._unrecorded_sources = {}
+
+    def _dependents(self, descriptors:set) -> set:
+        """Returns the chunks that reference any of descriptors, directly or indirectly"""
+        dependents = set()
+        frontier = set(descriptors)
+        while frontier:
+            found = {descriptor for descriptor, names in self._references.items()
+                     if descriptor not in dependents and descriptor not in descriptors
+                     and any(self._find_descriptor(name) in frontier for name in names)}
+            dependents |= found
+            frontier = found
+        return dependents
+
+    def _forget(self, descriptors:set):
+        """Removes chunks from config and from the lookup and reference indices"""
+        for descriptor in descriptors:
+            self.config.pop(descriptor, None)
+            self._pending.discard(descriptor)
+            self._references.pop(descriptor, None)
+            self._unresolved.discard(descriptor)
+            self._dirty.discard(descriptor)
+
+        self._aliases = {alias: descriptor for alias, descriptor in self._aliases.items() if descriptor not in descriptors}
+        self._normalised_names = {name: matches - descriptors for name, matches in self._normalised_names.items()
+                                  if matches - descriptors}
+        self._waiting = {name: waiting - descriptors for name, waiting in self._waiting.items() if waiting - descriptors}
+
+        collisions = {}
+        for alias, names in self.alias_collisions.items():
+            remaining = names - descriptors
+            if len(remaining) > 1:
+                collisions[alias] = remaining
+            elif remaining and alias not in remaining and alias not in self._aliases:
+                self._aliases[alias] = next(iter(remaining))
+        self.alias_collisions = collisions
+
+    def _reload(self, changed:dict):
+        """Replaces the definitions from the changed files and rebuilds the affected chunks"""
+        self._record_unrecorded_sources(changed)
+
+        new_definitions = {}
+        for path, (data, digest) in changed.items():
+            new_definitions[path] = self._file_definitions(data, path)
+            if digest is None:
+                self.sources.pop(path)
+            else:
+                self.sources[path] = digest
+
+        candidates = {descriptor for descriptor, definitions in self._definitions.items()
+                      if any(source in changed for source, _ in definitions)}
+        for definitions in new_definitions.values():
+            candidates |= set(definitions)
+
+        # Chunks whose definitions are unchanged are kept unless they reference a changed chunk
+        replacements = {}
+        for descriptor in candidates:
+            definitions = []
+            replaced = set()
+            for source, definition in self._definitions.get(descriptor, []):
+                if source not in changed:
+                    definitions.append((source, definition))
+                elif source not in replaced:
+                    definitions += new_definitions[source].get(descriptor, [])
+                    replaced.add(source)
+            for path in changed:
+                if path not in replaced:
+                    definitions += new_definitions[path].get(descriptor, [])
+            if definitions != self._definitions.get(descriptor, []):
+                replacements[descriptor] = definitions
+
+        affected = set(replacements)
+        rebuilt = affected | {descriptor for descriptor in self._dependents(affected) if descriptor in self._definitions}
+
+        order = [descriptor for descriptor in list(self.config) + sorted(self._pending) if descriptor in rebuilt]
+        order += [descriptor for definitions in new_definitions.values() for descriptor in definitions if descriptor in rebuilt]
+        self._forget(rebuilt)
+
+        for descriptor, definitions in replacements.items():
+            self._definitions.pop(descriptor, None)
+            if definitions:
+                self._definitions[descriptor] = definitions
+
+        for descriptor in dict.fromkeys(order):
+            if descriptor not in self._definitions:
+                continue
+            if self.lazy:
+                self._pending.add(descriptor)
+                for source, definition in self._definitions[descriptor]:
+                    self._index_names(descriptor, self._definition_aliases(definition))
+                continue
+            try:
+                self.config[descriptor] = self._build(descriptor)
+            except Exception as e:
+                print(e, "Skipping this Colourimetry chunk")
+                continue
+            self._index_names(descriptor, self.config[descriptor].alias)
+            self._track_references(descriptor)
+
+        self.update_references()
+
+    def _chunk_sources(self) -> dict:
+        """Returns the source files each chunk was defined in, in load order"""
+        chunk_sources = {descriptor: list(paths) for descriptor, paths in self._unrecorded_sources.items()}
+        for descriptor, definitions in self._definitions.items():
+            paths = chunk_sources.get(descriptor, []) + [source for source, _ in definitions if source is not None]
+            if paths:
+                chunk_sources[descriptor] = list(dict.fromkeys(paths))
+        return chunk_sources
+
+    def save_snapshot(self, path:str):
+        """Saves the resolved config, including the lookup and reference indices, as a
+        versioned JSON snapshot together with the content hashes of its source files. Chunks
+        left unparsed by lazy loading are built first"""
+        with self._writing():
+            self.materialise()
+            self._save_snapshot(path)
+
+    def _save_snapshot(self, path:str):
+        chunks = []
+        for descriptor, value in self.config.items():
+            if value.primaries.valid():
+                primaries = [value.primaries.r, value.primaries.g, value.primaries.b]
+            else:
+                primaries = value.primaries.reference
+            characteristic = value.transfer_characteristic
+            cie_version = value.cie_version
+            if cie_version is not None:
+                cie_version = colourimetry.cie_observer(cie_version).name
+            chunks.append({"Descriptor": descriptor,
+                           "RGB Primaries": primaries,
+                           "Achromatic Centroid": value.achromatic,
+                           "Transfer Characteristic": self.transfer_characteristic_to_YAML(characteristic),
+                           "Resolved": isinstance(characteristic, tc.TransferCharacteristicSequence) and characteristic.resolved,
+                           "Hints": value.hints,
+                           "Alias": value.alias,
+                           "CIE Version": cie_version})
+
+        snapshot = {"Version": SNAPSHOT_VERSION,
+                    "Sources": self.sources,
+                    "Chunks": chunks,
+                    "Aliases": self._aliases,
+                    "Alias Collisions": {alias: sorted(names) for alias, names in self.alias_collisions.items()},
+                    "Normalised Names": {name: sorted(names) for name, names in self._normalised_names.items()},
+                    "References": {descriptor: sorted(names) for descriptor, names in self._references.items()},
+                    "Unresolved": sorted(self._unresolved),
+                    "Waiting": {name: sorted(names) for name, names in self._waiting.items()},
+                    "Chunk Sources": self._chunk_sources()}
+
+        with open(path, 'w') as file:
+            json.dump(snapshot, file, separators=(",", ":"))
+
+    @classmethod
+    def load_snapshot(cls, path:str, check_sources:bool=True, **kwargs) -> "Config":
+        """Returns a Config loaded from a snapshot written by save_snapshot. Keyword arguments
+        are passed to the Config constructor. Raises a ValueError if the snapshot version is
+        not supported or, with check_sources, if a source file has changed since it was saved"""
+        with open(path, 'r') as file:
+            snapshot = json.load(file)
+
+        if snapshot.get("Version") != SNAPSHOT_VERSION:
+            raise ValueError("Unsupported snapshot version", snapshot.get("Version"))
+        if check_sources:
+            for source, digest in snapshot["Sources"].items():
+                if not os.path.isfile(source) or file_hash(source) != digest:
+                    raise ValueError("Snapshot source file has changed", source)
+
+        config = cls(**kwargs)
+        resolved_sequences = []
+        for chunk in snapshot["Chunks"]:
+            primaries = chunk["RGB Primaries"]
+            if type(primaries) is list:
+                primaries = colourimetry.RGBPrimaries(*primaries)
+            else:
+                primaries = colourimetry.RGBPrimaries(reference=primaries)
+            characteristic = None
+            if chunk["Transfer Characteristic"] is not None:
+                characteristic = config.transfer_charactersitc_from_YAML(chunk["Transfer Characteristic"])
+            # CIE versions are held by name, as they are when read from YAML
+            cie_version = chunk["CIE Version"]
+            if cie_version is not None:
+                cie_version = colourimetry.cie_observer(cie_version).name
+            new_colourimetry = colourimetry.Colourimetry(descriptor=chunk["Descriptor"], rgb_primaries=primaries,
+                                                         achromatic=chunk["Achromatic Centroid"],
+                                                         transfer_characteristic=characteristic, hints=chunk["Hints"],
+                                                         alias=chunk["Alias"], cie_version=cie_version)
+            if chunk["Resolved"]:
+                resolved_sequences.append(new_colourimetry.transfer_characteristic)
+            config.config[chunk["Descriptor"]] = new_colourimetry
+
+        config.sources = snapshot["Sources"]
+        config._aliases = snapshot["Aliases"]
+        config.alias_collisions = {alias: set(names) for alias, names in snapshot["Alias Collisions"].items()}
+        config._normalised_names = {name: set(names) for name, names in snapshot["Normalised Names"].items()}
+        config._references = {descriptor: set(names) for descriptor, names in snapshot["References"].items()}
+        config._unresolved = set(snapshot["Unresolved"])
+        config._waiting = {name: set(names) for name, names in snapshot["Waiting"].items()}
+        config._unrecorded_sources = snapshot["Chunk Sources"]
+
+        with config._writing():
+            for sequence in resolved_sequences:
+                sequence.resolve(config)
+
+        return config
+
+    @classmethod
+    def from_files(cls, paths:list, snapshot_path:str=None, **kwargs) -> "Config":
+        """Returns a Config holding the colourimetry in paths. If snapshot_path holds an up
+        to date snapshot of the same files it is loaded instead of parsing the files,
+        otherwise the files are parsed and the snapshot is rewritten"""
+        if snapshot_path is not None:
+            try:
+                config = cls.load_snapshot(snapshot_path, **kwargs)
+                if set(config.sources) == set(paths):
+                    return config
+            except (OSError, ValueError, KeyError):
+                pass
+
+        config = cls(**kwargs)
+        config.add_many(paths)
+        if snapshot_path is not None:
+            config.save_snapshot(snapshot_path)
+        return config
+
     def print_colourimetry(self, descriptor):
         """Pretty prints the colourimetry data set for the given descriptor or alias"""
 
@@ -178,18 +1032,140 @@ class Config():
         print()
 
     def print_all_colourimetry(self):
-        for key, value in self.config.items():
+        lookup = self._lookup
+        for key in list(lookup.config) + sorted(lookup.pending):
             self.print_colourimetry(key)
 
     def get_colourimetry(self, descriptor:str) -> colourimetry:
-        try:
-            return self.config[descriptor]
-        except KeyError:
-            for key, value in self.config.items():
-                if descriptor in value.alias:
-                    return self.config[key]
-            raise KeyError("%r not in config" % (descriptor))
-            
+        lookup = self._current_lookup() if self._writer == threading.get_ident() else self._lookup
+        # Descriptors are read from the index's dicts directly, sparing the most common lookup a method call
+        chunks = lookup.config
+        value = chunks.base.get(descriptor)
+        if chunks.changes:
+            value = chunks.changes.get(descriptor, value)
+        if value is not None and value is not _REMOVED:
+            return value
+
+        name = self._lookup_descriptor(descriptor, lookup)
+        if name in lookup.pending:
+            with self._writing():
+                self._materialise(name)
+                self.update_references()
+                lookup = self._current_lookup()
+        value = lookup.config.get(name)
+        if value is None:
+            raise KeyError("%r could not be parsed" % (descriptor))
+        return value
+
+    def _lookup_descriptor(self, descriptor:str, lookup:Lookup) -> str:
+        """Returns the descriptor of the built or unparsed chunk in lookup with the given
+        descriptor or alias. Raises a KeyError if there is no such chunk or the alias is
+        ambiguous"""
+        if descriptor in lookup.config or descriptor in lookup.pending:
+            return descriptor
+
+        collision = lookup.alias_collisions.get(descriptor)
+        if collision is not None:
+            raise KeyError("%r is an alias of more than one colourimetry chunk: %r" % (descriptor, sorted(collision)))
+        name = lookup.aliases.get(descriptor)
+        if name is not None:
+            return name
+
+        if self.normalise_lookups:
+            matches = lookup.normalised_names.get(normalise_name(descriptor), set())
+            if len(matches) > 1:
+                raise KeyError("%r matches more than one colourimetry chunk: %r" % (descriptor, sorted(matches)))
+            if matches:
+                return next(iter(matches))
+
+        raise KeyError("%r not in config" % (descriptor))
+
+    def build_transform(self, source:str, destination:str) -> transform.Transform:
+        """Returns a reusable Transform converting RGB data from the source colourimetry
+        to the destination colourimetry. Both may be given as a descriptor or alias"""
+        source_colourimetry = self.get_colourimetry(source)
+        destination_colourimetry = self.get_colourimetry(destination)
+        key = (source_colourimetry.content_key(), destination_colourimetry.content_key())
+
+        with self._cache_lock:
+            cached = self._transform_cache.get(key)
+            if cached is not None:
+                self._transform_cache.move_to_end(key)
+        if instrumentation.enabled:
+            instrumentation.cache_event("Config.transform_cache", cached is not None)
+        if cached is not None:
+            return cached
+
+        # Built outside the lock; if another thread built the same transform meanwhile, theirs is kept
+        table = self.matrix_table()
+        source_id = table.space_id(source_colourimetry)
+        destination_id = table.space_id(destination_colourimetry)
+        matrix = None
+        if source_id is not None and destination_id is not None:
+            matrix = table.matrix(source_id, destination_id)
+        new_transform = transform.Transform(source_colourimetry, destination_colourimetry, matrix,
+                                            transform.CONE_RESPONSES[self.chromatic_adaptation])
+        if self.transform_cache_size > 0:
+            with self._cache_lock:
+                new_transform = self._transform_cache.setdefault(key, new_transform)
+                self._transform_cache.move_to_end(key)
+                while len(self._transform_cache) > self.transform_cache_size:
+                    self._transform_cache.popitem(last=False)
+
+        return new_transform
+
+    def matrix_table(self) -> transform.MatrixTable:
+        """Returns the transform.MatrixTable of the published chunks, building it if the
+        chunks have changed since it was last built"""
+        chunks = self._lookup.config
+        with self._cache_lock:
+            built_from, table = self._matrix_table
+        if built_from is not chunks:
+            table = transform.MatrixTable(chunks.values(), transform.CONE_RESPONSES[self.chromatic_adaptation])
+            with self._cache_lock:
+                self._matrix_table = (chunks, table)
+        return table
+
+    def convert_batch(self, values, pairs:list) -> np.ndarray:
+        """Converts row i of values, an (N, 3) array of RGB values, from the colourimetry
+        pairs[i][0] to pairs[i][1]. Rows sharing a transform are converted together using
+        the cached transforms, and all N results are returned as one array"""
+        values = tc._as_float_array(values)
+        if values.ndim != 2 or values.shape[1] != 3:
+            raise ValueError("Batch values must be an (N, 3) array")
+        if len(pairs) != len(values):
+            raise ValueError("One (source, destination) pair is needed for each row of values")
+
+        rows_by_pair = {}
+        for row, pair in enumerate(pairs):
+            rows_by_pair.setdefault(tuple(pair), []).append(row)
+
+        rows_by_transform = {}
+        for pair, rows in rows_by_pair.items():
+            pair_transform = self.build_transform(*pair)
+            rows_by_transform.setdefault(id(pair_transform), (pair_transform, []))[1].extend(rows)
+
+        out = np.empty_like(values)
+        for pair_transform, rows in rows_by_transform.values():
+            rows = np.array(rows)
+            out[rows] = pair_transform.apply(values[rows])
+
+        return out
+
+    def invalidate_transforms(self):
+        """Drops cached transforms whose source or destination chunk no longer has the
+        content the transform was built from"""
+        chunks = self._lookup.config
+        with self._cache_lock:
+            for key, cached in list(self._transform_cache.items()):
+                try:
+                    current = (chunks[cached.source.descriptor].content_key(),
+                               chunks[cached.destination.descriptor].content_key())
+                except KeyError:
+                    current = None
+                if current != key:
+                    del self._transform_cache[key]
+
 
 
 if __name__ == "__main__":
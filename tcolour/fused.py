@@ -0,0 +1,202 @@
+"""Optional fused per pixel kernels for Transforms, compiled with Numba when it is installed.
+
+A Transform whose transfer characteristics are all parametric is compiled into flat
+arrays of steps and coefficients, and converted by one kernel that decodes, applies the
+matrix and encodes each pixel in turn, writing straight into the output array. Without
+Numba the kernels are plain Python, available() is False and Transforms keep to the
+NumPy path.
+
+The kernel runs in parallel across cores only when called from the main thread of the
+main process, one call at a time, as Numba's workqueue threading layer cannot be entered
+from several threads at once. Calls from other threads and pool workers run the serial
+kernel, so the pool they belong to supplies the parallelism. Unless a threading layer
+is chosen through NUMBA_THREADING_LAYER the workqueue layer is used, as the TBB layer
+Numba prefers hangs the process at exit once it has forked pool workers.
+"""
+import math
+import multiprocessing
+import threading
+import numpy as np
+from . import transfer_characteristic as TC
+
+try:
+    import numba
+except ImportError:
+    numba = None
+
+if numba is not None and numba.config.THREADING_LAYER == "default":
+    numba.config.THREADING_LAYER = "workqueue"
+
+# Set to False to use the NumPy path even when Numba is installed
+enabled = True
+
+POWER = 1
+POWER_WITH_BREAK = 2
+LOG10_WITH_BREAK = 3
+
+KINDS = {TC.TransferCharacteristicPower: POWER,
+         TC.TransferCharacteristicPowerWithBreak: POWER_WITH_BREAK,
+         TC.TransferCharacteristicLog10WithBreak: LOG10_WITH_BREAK}
+
+# Wide enough for the largest coefficient tuple, Log10WithBreakCoefficients
+COEFFICIENTS = 11
+
+
+def available() -> bool:
+    """Returns True if Numba is installed, so fused kernels are compiled"""
+    return numba is not None
+
+
+def _jit(function, **options):
+    return numba.njit(**options)(function) if numba is not None else function
+
+
+prange = numba.prange if numba is not None else range
+
+
+# The scalar maths follows the NumPy ufuncs for values outside the domain of each
+# function, rather than raising as Python's operators do
+def _power(x, y):
+    if x < 0.0 and y != math.floor(y):
+        return math.nan
+    if x == 0.0 and y < 0.0:
+        return math.inf
+    return x ** y
+
+
+def _log10(x):
+    if x > 0.0:
+        return math.log10(x)
+    if x == 0.0:
+        return -math.inf
+    return math.nan
+
+
+def _exp10(x):
+    if x > 308.25:
+        return math.inf
+    return 10.0 ** x
+
+
+def _apply_step(kind, forward, k, x):
+    if kind == POWER:
+        return _power(x, k[0] if forward else k[1])
+
+    if kind == POWER_WITH_BREAK:
+        # a, b, c, d, g, inverse_a, inverse_c, inverse_g, cut_off
+        if forward:
+            if x <= k[3]:
+                return k[2] * x
+            return k[0] * _power(x, k[7]) + k[1]
+        if x <= k[8]:
+            return x / k[2]
+        return _power((x - k[1]) / k[0], k[4])
+
+    if kind == LOG10_WITH_BREAK:
+        # a, b, c, d, e, f, h, inverse_a, inverse_c, inverse_e, cut
+        if forward:
+            if x <= k[6]:
+                return k[4] * x + k[5]
+            return k[2] * _log10(k[0] * x + k[1]) + k[3]
+        if x <= k[10]:
+            return (x - k[5]) * k[9]
+        return (_exp10((x - k[3]) * k[8]) - k[1]) * k[7]
+
+    return x
+
+
+def _apply_steps(kinds, forward, coefficients, x):
+    for step in range(kinds.shape[0]):
+        x = _apply_step(kinds[step], forward[step], coefficients[step], x)
+    return x
+
+
+def _convert_pixels(data, out, decode_kinds, decode_forward, decode_coefficients, matrix,
+                    encode_kinds, encode_forward, encode_coefficients):
+    for pixel in prange(data.shape[0]):
+        r = _apply_steps(decode_kinds, decode_forward, decode_coefficients, data[pixel, 0])
+        g = _apply_steps(decode_kinds, decode_forward, decode_coefficients, data[pixel, 1])
+        b = _apply_steps(decode_kinds, decode_forward, decode_coefficients, data[pixel, 2])
+        for channel in range(3):
+            x = matrix[channel, 0] * r + matrix[channel, 1] * g + matrix[channel, 2] * b
+            out[pixel, channel] = _apply_steps(encode_kinds, encode_forward, encode_coefficients, x)
+
+
+_power = _jit(_power)
+_log10 = _jit(_log10)
+_exp10 = _jit(_exp10)
+_apply_step = _jit(_apply_step)
+_apply_steps = _jit(_apply_steps)
+_convert_pixels_serial = _jit(_convert_pixels)
+_convert_pixels = _jit(_convert_pixels, parallel=True)
+
+_parallel_lock = threading.Lock()
+
+
+def _parallel_allowed() -> bool:
+    return threading.current_thread() is threading.main_thread() and multiprocessing.parent_process() is None
+
+
+def _steps(characteristic, forward:bool) -> list:
+    """Returns the (TransferCharacteristic, forward) steps applying characteristic in the
+    given direction, or None if a step is not parametric"""
+    if characteristic is None:
+        return []
+    if isinstance(characteristic, TC.TransferCharacteristicSequence):
+        steps = characteristic.steps
+        if not forward:
+            steps = [(step, not step_forward) for step, step_forward in reversed(steps)]
+    else:
+        steps = [(characteristic, forward)]
+
+    if any(type(step) not in KINDS for step, _ in steps):
+        return None
+    return steps
+
+
+def _step_arrays(steps:list) -> tuple:
+    kinds = np.array([KINDS[type(step)] for step, _ in steps], dtype=np.int64)
+    forward = np.array([step_forward for _, step_forward in steps], dtype=np.bool_)
+    coefficients = np.zeros((len(steps), COEFFICIENTS))
+    for row, (step, _) in enumerate(steps):
+        coefficients[row, :len(step.coefficients)] = step.coefficients
+    return kinds, forward, coefficients
+
+
+class FusedKernel():
+    """A Transform compiled into step and coefficient arrays for the fused kernel.\n
+    Attributes:\n
+        jit:    Run the Numba compiled kernel. Otherwise the kernel runs as plain Python,
+                which is only practical for small arrays such as in tests.
+    """
+
+    def __init__(self, decode_steps:list, matrix:np.ndarray, encode_steps:list, jit:bool=True) -> None:
+        self.decode = _step_arrays(decode_steps)
+        self.matrix = np.ascontiguousarray(matrix, dtype=np.float64)
+        self.encode = _step_arrays(encode_steps)
+        self.jit = jit
+
+    def apply(self, x:np.ndarray) -> np.ndarray:
+        """Converts x, a float32 or float64 array with three channels in the last axis, into
+        a new array of the same type"""
+        x = np.ascontiguousarray(x)
+        out = np.empty_like(x)
+        arguments = (x.reshape(-1, 3), out.reshape(-1, 3), *self.decode, self.matrix, *self.encode)
+        if not self.jit:
+            getattr(_convert_pixels, "py_func", _convert_pixels)(*arguments)
+        elif _parallel_allowed():
+            with _parallel_lock:
+                _convert_pixels(*arguments)
+        else:
+            _convert_pixels_serial(*arguments)
+        return out
+
+
+def compile_transform(transform, jit:bool=True) -> FusedKernel:
+    """Returns a FusedKernel for transform, or None if one of its transfer characteristics
+    is not parametric"""
+    decode_steps = _steps(transform.decoding, False)
+    encode_steps = _steps(transform.encoding, True)
+    if decode_steps is None or encode_steps is None:
+        return None
+    return FusedKernel(decode_steps, transform.matrix, encode_steps, jit)
@@ -0,0 +1,133 @@
+"""Opt-in instrumentation of the hot paths in Config and the transfer characteristics.
+
+enable() wraps the instrumented methods to record call counts, cumulative time and the
+number of elements processed, and disable() restores the original methods, so nothing
+is measured and nothing is paid while instrumentation is disabled. Only the outermost
+transfer characteristic call on each thread is recorded, so a sequence is counted once
+rather than once more for each of its steps. Hits and misses of the transform cache,
+the quantisation decode tables and the numeric inverses are recorded while enabled. snapshot() returns the collected metrics as plain
+data for a metrics exporter.
+"""
+from functools import wraps
+import json
+import threading
+import time
+import numpy as np
+
+CONFIG_METHODS = ["add_colourimetry", "parse_data", "update_references", "get_colourimetry", "build_transform"]
+TRANSFER_METHODS = ["forward_transfer", "inverse_transfer"]
+
+enabled = False
+_lock = threading.Lock()
+_timings = {}
+_caches = {}
+_originals = []
+_transfer_depth = threading.local()
+
+
+def _record(name:str, seconds:float, elements:int):
+    with _lock:
+        timing = _timings.setdefault(name, [0, 0.0, 0])
+        timing[0] += 1
+        timing[1] += seconds
+        timing[2] += elements
+
+
+def cache_event(name:str, hit:bool):
+    """Records a hit or miss of the named cache"""
+    with _lock:
+        cache = _caches.setdefault(name, [0, 0])
+        cache[0 if hit else 1] += 1
+
+
+def _instrument(function, name:str, count_elements:bool):
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        start = time.perf_counter()
+        try:
+            return function(*args, **kwargs)
+        finally:
+            elapsed = time.perf_counter() - start
+            elements = int(np.size(args[1])) if count_elements and len(args) > 1 else 0
+            _record(name, elapsed, elements)
+    return wrapper
+
+
+def _instrument_transfer(function, name:str):
+    """Like _instrument, recording the call only when no other transfer characteristic
+    call is in progress on this thread"""
+    recorded = _instrument(function, name, True)
+
+    @wraps(function)
+    def wrapper(*args, **kwargs):
+        depth = getattr(_transfer_depth, "depth", 0)
+        _transfer_depth.depth = depth + 1
+        try:
+            return (function if depth else recorded)(*args, **kwargs)
+        finally:
+            _transfer_depth.depth = depth
+    return wrapper
+
+
+def _targets() -> list:
+    """Returns (class, method name, counts elements) for every instrumented method"""
+    from . import config
+    from . import transfer_characteristic as TC
+
+    targets = [(config.Config, method, False) for method in CONFIG_METHODS]
+    classes = [TC.TransferCharacteristic]
+    while classes:
+        cls = classes.pop()
+        classes += cls.__subclasses__()
+        targets += [(cls, method, True) for method in TRANSFER_METHODS if method in cls.__dict__]
+    return targets
+
+
+def enable():
+    """Starts recording metrics"""
+    global enabled
+    if enabled:
+        return
+    for cls, method, count_elements in _targets():
+        original = cls.__dict__[method]
+        _originals.append((cls, method, original))
+        name = cls.__name__ + "." + method
+        setattr(cls, method, _instrument_transfer(original, name) if count_elements else _instrument(original, name, False))
+    enabled = True
+
+
+def disable():
+    """Stops recording metrics and restores the original methods. Collected metrics are kept"""
+    global enabled
+    while _originals:
+        cls, method, original = _originals.pop()
+        setattr(cls, method, original)
+    enabled = False
+
+
+def reset():
+    """Clears the collected metrics"""
+    with _lock:
+        _timings.clear()
+        _caches.clear()
+
+
+def snapshot() -> dict:
+    """Returns the collected metrics as a dict of plain values"""
+    with _lock:
+        calls = {}
+        for name, (count, seconds, elements) in _timings.items():
+            calls[name] = {"calls": count,
+                           "seconds": seconds,
+                           "elements": elements,
+                           "elements_per_second": elements / seconds if elements and seconds > 0 else 0.0}
+        caches = {}
+        for name, (hits, misses) in _caches.items():
+            caches[name] = {"hits": hits, "misses": misses, "hit_rate": hits / (hits + misses)}
+
+    return {"enabled": enabled, "calls": calls, "caches": caches}
+
+
+def export_json() -> str:
+    """Returns snapshot() as a JSON string"""
+    return json.dumps(snapshot(), sort_keys=True)
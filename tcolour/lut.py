@@ -0,0 +1,349 @@
+import os
+import numpy as np
+from . import transfer_characteristic as TC
+
+
+def _domain_pair(domain) -> tuple:
+    """Returns domain as a pair of float64 arrays, scalars or one value per channel"""
+    minimum = np.asarray(domain[0], dtype=np.float64)
+    maximum = np.asarray(domain[1], dtype=np.float64)
+    if np.any(maximum <= minimum):
+        raise ValueError("LUT domain maximum must be greater than the minimum", domain)
+    return (minimum, maximum)
+
+
+def _lattice_position(x:np.ndarray, domain:tuple, size:int) -> tuple:
+    """Returns the integer lower lattice index and the fractional position between it
+    and the next lattice point for x, clamped to the domain. NaN is looked up at index 0
+    with a NaN position, so it interpolates to NaN"""
+    minimum = domain[0].astype(x.dtype)
+    maximum = domain[1].astype(x.dtype)
+    last = size - 1
+
+    position = (x - minimum) * (last / (maximum - minimum))
+    np.clip(position, 0, last, out=position)
+    index = np.minimum(np.where(np.isnan(position), 0, position).astype(np.intp), last - 1)
+    position -= index
+
+    return index, position
+
+
+class LUT1D():
+    """A dense 1D lookup table of evenly spaced samples over a domain, applied with
+    linear interpolation. Input outside the domain is clamped to it.\n
+    Attributes:\n
+        table:      The sampled output values, either (N,) applied to every value or
+                    (N, C) with one column per channel in the last axis of the data.
+        domain:     The (minimum, maximum) input values the first and last samples map to,
+                    either scalars or one value per channel.
+        max_error:  Largest absolute difference to the function the table was baked from,
+                    or None if the table was not baked.
+    """
+
+    def __init__(self, table, domain:tuple=(0.0, 1.0), max_error:float=None) -> None:
+        self.table = np.asanyarray(table)
+        if not np.issubdtype(self.table.dtype, np.floating):
+            self.table = self.table.astype(np.float64)
+        if self.table.ndim not in (1, 2) or len(self.table) < 2:
+            raise ValueError("LUT1D table must be (N,) or (N, C) with at least two entries")
+        self.domain = _domain_pair(domain)
+        self.max_error = max_error
+
+    @classmethod
+    def from_function(cls, function, size:int=4096, domain:tuple=(0.0, 1.0)) -> "LUT1D":
+        """Bakes function, which takes and returns a NumPy array, into a table of size entries"""
+        samples = np.linspace(domain[0], domain[1], size)
+        lut = cls(function(samples), domain)
+
+        check = np.linspace(domain[0], domain[1], (size - 1) * 4 + 1)
+        error = np.abs(lut.apply(check) - function(check))
+        lut.max_error = float(np.nanmax(error))
+
+        return lut
+
+    def apply(self, data):
+        """Looks up data in the table, returning the same type and shape as the input"""
+        x = TC._as_float_array(data)
+        shape = x.shape
+        columns = ()
+        if self.table.ndim == 2:
+            channels = self.table.shape[1]
+            if not shape or shape[-1] != channels:
+                raise ValueError("LUT1D with %d channels needs data with %d channels in the last axis" % (channels, channels))
+            x = x.reshape(-1, channels)
+            columns = (np.arange(channels),)
+        else:
+            x = x.reshape(-1)
+
+        index, position = _lattice_position(x, self.domain, len(self.table))
+
+        lower = self.table[(index,) + columns].astype(x.dtype, copy=False)
+        out = self.table[(index + 1,) + columns].astype(x.dtype)
+        out -= lower
+        out *= position
+        out += lower
+
+        return TC._restore_type(out.reshape(shape), data)
+
+    def inverse(self, size:int=None) -> "LUT1D":
+        """Returns a LUT1D of size entries (at least 4096 by default) inverting this table.
+        Each channel must be strictly increasing"""
+        table = self.table.astype(np.float64).reshape(len(self.table), -1)
+        if np.any(np.diff(table, axis=0) <= 0):
+            raise ValueError("Only strictly increasing LUT1D tables can be inverted")
+        if size is None:
+            size = max(4096, len(table))
+
+        minimum = np.broadcast_to(self.domain[0], table.shape[1:])
+        maximum = np.broadcast_to(self.domain[1], table.shape[1:])
+        inverse_table = np.empty((size, table.shape[1]))
+        for channel in range(table.shape[1]):
+            positions = np.linspace(minimum[channel], maximum[channel], len(table))
+            samples = np.linspace(table[0, channel], table[-1, channel], size)
+            inverse_table[:, channel] = np.interp(samples, table[:, channel], positions)
+
+        if self.table.ndim == 1:
+            return LUT1D(inverse_table[:, 0], (table[0, 0], table[-1, 0]))
+        return LUT1D(inverse_table, (table[0], table[-1]))
+
+    def __repr__(self) -> str:
+        return "LUT1D(size=%r, domain=%r, max_error=%r)" % (len(self.table), self.domain, self.max_error)
+
+
+class LUT1DHalf():
+    """A table holding one output value for every 16 bit half float input, indexed
+    directly by the raw bits of the input.\n
+    Attributes:\n
+        table:      The 65536 output values.
+        max_error:  Largest difference to the function the table was baked from where input
+                    and output are finite, or None if the table was not baked. The difference
+                    is absolute for outputs within [-1, 1] and relative outside it, as the
+                    precision of a half float table scales with magnitude.
+    """
+
+    def __init__(self, table, max_error:float=None) -> None:
+        self.table = np.asanyarray(table)
+        if self.table.shape != (65536,):
+            raise ValueError("LUT1DHalf table must have exactly 65536 entries")
+        self.max_error = max_error
+
+    @classmethod
+    def from_function(cls, function, dtype=np.float16) -> "LUT1DHalf":
+        """Bakes function, which takes and returns a NumPy array, for every half float value"""
+        samples = np.arange(65536, dtype=np.uint32).astype(np.uint16).view(np.float16).astype(np.float64)
+        exact = function(samples)
+        # Outputs beyond the range of dtype are expected and stored as infinity
+        with np.errstate(over="ignore"):
+            lut = cls(exact.astype(dtype))
+
+        finite = np.isfinite(samples) & np.isfinite(exact) & np.isfinite(lut.table)
+        error = np.abs(lut.table[finite].astype(np.float64) - exact[finite]) / np.maximum(np.abs(exact[finite]), 1.0)
+        lut.max_error = float(np.max(error))
+
+        return lut
+
+    def apply(self, data:np.ndarray) -> np.ndarray:
+        """Looks up a float16 array in the table"""
+        data = np.asarray(data)
+        if data.dtype != np.float16:
+            raise TypeError("LUT1DHalf can only be applied to float16 data", data.dtype)
+        return self.table[data.view(np.uint16)]
+
+    def __repr__(self) -> str:
+        return "LUT1DHalf(dtype=%r, max_error=%r)" % (self.table.dtype, self.max_error)
+
+
+class LUT3D():
+    """A 3D lookup table over a cube of RGB input values, applied with tetrahedral or
+    trilinear interpolation. Input outside the domain is clamped to it.\n
+    Attributes:\n
+        table:          (N, N, N, 3) output values indexed by [red, green, blue].
+        domain:         The (minimum, maximum) input values of the lattice, either scalars
+                        or one value per channel.
+        interpolation:  Either "tetrahedral" or "trilinear".
+    """
+
+    def __init__(self, table, domain:tuple=(0.0, 1.0), interpolation:str="tetrahedral") -> None:
+        self.table = np.asanyarray(table)
+        if not np.issubdtype(self.table.dtype, np.floating):
+            self.table = self.table.astype(np.float64)
+        size = self.table.shape[0]
+        if self.table.shape != (size, size, size, 3) or size < 2:
+            raise ValueError("LUT3D table must be (N, N, N, 3) with N of at least two", self.table.shape)
+        if interpolation not in ("tetrahedral", "trilinear"):
+            raise ValueError("LUT3D interpolation must be tetrahedral or trilinear", interpolation)
+        self.domain = _domain_pair(domain)
+        self.interpolation = interpolation
+
+    def _vertex(self, index:np.ndarray, dtype) -> np.ndarray:
+        return self.table[index[:, 0], index[:, 1], index[:, 2]].astype(dtype, copy=False)
+
+    def _tetrahedral(self, index:np.ndarray, fraction:np.ndarray) -> np.ndarray:
+        # Walk from the lower corner to the upper corner of the cell, stepping along the
+        # axes in order of decreasing fraction. Each visited vertex is one tetrahedron corner.
+        order = np.argsort(-fraction, axis=1)
+        ordered = np.take_along_axis(fraction, order, axis=1)
+        rows = np.arange(len(index))
+
+        vertex = index.copy()
+        out = (1.0 - ordered[:, 0:1]) * self._vertex(vertex, fraction.dtype)
+        for step in range(3):
+            vertex[rows, order[:, step]] += 1
+            upper = ordered[:, step + 1:step + 2] if step < 2 else 0.0
+            out += (ordered[:, step:step + 1] - upper) * self._vertex(vertex, fraction.dtype)
+
+        return out
+
+    def _trilinear(self, index:np.ndarray, fraction:np.ndarray) -> np.ndarray:
+        out = np.zeros(index.shape, dtype=fraction.dtype)
+        for corner in np.ndindex(2, 2, 2):
+            weight = np.prod(np.where(corner, fraction, 1.0 - fraction), axis=1, keepdims=True)
+            out += weight * self._vertex(index + corner, fraction.dtype)
+
+        return out
+
+    def apply(self, data):
+        """Looks up RGB data with the channels in the last axis, returning the same type
+        and shape as the input"""
+        x = TC._as_float_array(data)
+        shape = x.shape
+        if not shape or shape[-1] != 3:
+            raise ValueError("LUT3D data must have three channels in the last axis")
+        x = x.reshape(-1, 3)
+
+        index, fraction = _lattice_position(x, self.domain, self.table.shape[0])
+        if self.interpolation == "tetrahedral":
+            out = self._tetrahedral(index, fraction)
+        else:
+            out = self._trilinear(index, fraction)
+
+        return TC._restore_type(out.reshape(shape), data)
+
+    def __repr__(self) -> str:
+        return "LUT3D(size=%r, domain=%r, interpolation=%r)" % (self.table.shape[0], self.domain, self.interpolation)
+
+
+def read_cube(path:str):
+    """Reads a .cube file holding either a 1D or a 3D LUT"""
+    size_1d = size_3d = None
+    domain = [0.0, 0.0, 0.0], [1.0, 1.0, 1.0]
+    rows = []
+    with open(path, 'r') as file:
+        for line in file:
+            words = line.split()
+            if not words or words[0].startswith("#"):
+                continue
+            keyword = words[0]
+            if keyword == "TITLE":
+                continue
+            elif keyword == "LUT_1D_SIZE":
+                size_1d = int(words[1])
+            elif keyword == "LUT_3D_SIZE":
+                size_3d = int(words[1])
+            elif keyword == "DOMAIN_MIN":
+                domain = [float(v) for v in words[1:4]], domain[1]
+            elif keyword == "DOMAIN_MAX":
+                domain = domain[0], [float(v) for v in words[1:4]]
+            elif keyword in ("LUT_1D_INPUT_RANGE", "LUT_3D_INPUT_RANGE"):
+                domain = [float(words[1])] * 3, [float(words[2])] * 3
+            else:
+                rows.append([float(v) for v in words[:3]])
+
+    table = np.array(rows, dtype=np.float64)
+    if size_3d is not None:
+        if len(table) != size_3d ** 3:
+            raise ValueError("Cube file %r should hold %d entries" % (path, size_3d ** 3))
+        # Red changes fastest in the file
+        table = table.reshape(size_3d, size_3d, size_3d, 3).transpose(2, 1, 0, 3)
+        return LUT3D(np.ascontiguousarray(table), domain)
+    if size_1d is not None:
+        if len(table) != size_1d:
+            raise ValueError("Cube file %r should hold %d entries" % (path, size_1d))
+        return LUT1D(table, domain)
+    raise ValueError("Cube file %r has no LUT_1D_SIZE or LUT_3D_SIZE" % (path))
+
+
+def read_spi1d(path:str) -> LUT1D:
+    """Reads a Sony Pictures Imageworks .spi1d file"""
+    domain = (0.0, 1.0)
+    length = None
+    components = 1
+    rows = []
+    with open(path, 'r') as file:
+        in_table = False
+        for line in file:
+            words = line.split()
+            if not words:
+                continue
+            if in_table:
+                if words[0] == "}":
+                    in_table = False
+                else:
+                    rows.append([float(v) for v in words])
+            elif words[0] == "From":
+                domain = (float(words[1]), float(words[2]))
+            elif words[0] == "Length":
+                length = int(words[1])
+            elif words[0] == "Components":
+                components = int(words[1])
+            elif words[0] == "{":
+                in_table = True
+
+    table = np.array(rows, dtype=np.float64)
+    if length is None or table.shape != (length, components):
+        raise ValueError("spi1d file %r does not hold Length x Components values" % (path))
+    if components == 1:
+        return LUT1D(table[:, 0], domain)
+    return LUT1D(table, domain)
+
+
+def read_spi3d(path:str) -> LUT3D:
+    """Reads a Sony Pictures Imageworks .spi3d file"""
+    with open(path, 'r') as file:
+        lines = [line.split() for line in file if line.strip()]
+
+    if not lines[0][0].startswith("SPILUT"):
+        raise ValueError("%r is not an spi3d file" % (path))
+    size = [int(v) for v in lines[2]]
+    if len(set(size)) != 1:
+        raise ValueError("spi3d file %r must have the same size in every axis" % (path))
+
+    entries = np.array(lines[3:], dtype=np.float64)
+    index = entries[:, :3].astype(np.intp)
+    table = np.zeros((size[0], size[0], size[0], 3))
+    table[index[:, 0], index[:, 1], index[:, 2]] = entries[:, 3:6]
+
+    return LUT3D(table)
+
+
+def read_binary(path:str):
+    """Memory maps a raw binary LUT stored as a NumPy .npy file. Tables shaped (N,) or
+    (N, C) are read as a LUT1D and (N, N, N, 3) as a LUT3D, both over the domain [0, 1].
+    The table is shared, not copied, by every process mapping the same file"""
+    table = np.load(path, mmap_mode='r')
+    if table.ndim == 4:
+        return LUT3D(table)
+    return LUT1D(table)
+
+
+def write_binary(path:str, lut) -> None:
+    """Writes the table of a LUT1D or LUT3D over the domain [0, 1] as a raw binary .npy file"""
+    if np.any(lut.domain[0] != 0.0) or np.any(lut.domain[1] != 1.0):
+        raise ValueError("Only LUTs over the domain [0, 1] can be written as raw binary")
+    np.save(path, np.ascontiguousarray(lut.table))
+
+
+READERS = {
+    ".cube": read_cube,
+    ".spi1d": read_spi1d,
+    ".spi3d": read_spi3d,
+    ".npy": read_binary,
+}
+
+
+def read_lut(path:str):
+    """Reads a LUT file, choosing the format from the file extension"""
+    extension = os.path.splitext(path)[1].lower()
+    if extension not in READERS:
+        raise ValueError("LUT format not supported", extension)
+    return READERS[extension](path)
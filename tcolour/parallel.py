@@ -0,0 +1,124 @@
+from concurrent.futures import ThreadPoolExecutor, ProcessPoolExecutor
+from multiprocessing import shared_memory
+import os
+import threading
+import numpy as np
+from . import processing
+
+
+def available_cores() -> int:
+    """Returns the number of cores this process may run on"""
+    if hasattr(os, "sched_getaffinity"):
+        return len(os.sched_getaffinity(0))
+    return os.cpu_count() or 1
+
+
+def _process_shared_rows(name:str, shape:tuple, dtype:str, start:int, stop:int, processor, forward:bool):
+    """Worker side of ParallelProcessor. Processes rows start to stop of the frame held in
+    the named shared memory block in place"""
+    block = shared_memory.SharedMemory(name=name)
+    try:
+        frame = np.ndarray(shape, dtype=dtype, buffer=block.buf)
+        rows = frame[start:stop]
+        rows[...] = processing.processing_function(processor, forward)(rows)
+        del frame, rows
+    finally:
+        block.close()
+
+
+class ParallelProcessor():
+    """Splits frames into blocks of rows and processes them on a pool of workers that stays
+    alive between frames.\n
+    In process mode each frame is copied once into a shared memory block that the worker
+    processes read and write directly, so no pixel data is pickled. Thread mode shares the
+    frame without copying and suits kernels that release the GIL.\n
+    A ParallelProcessor can be shared between threads. In process mode the shared memory
+    block is reused between frames, so frames from different threads are processed one
+    at a time.\n
+    Attributes:\n
+        workers:    The number of workers, by default every available core.
+        threads:    Use a thread pool rather than a process pool.
+    """
+
+    def __init__(self, workers:int=None, threads:bool=False) -> None:
+        self.workers = workers or available_cores()
+        self.threads = threads
+        self._executor = None
+        self._block = None
+        self._lock = threading.RLock()
+
+    @property
+    def executor(self):
+        with self._lock:
+            if self._executor is None:
+                executor_type = ThreadPoolExecutor if self.threads else ProcessPoolExecutor
+                self._executor = executor_type(max_workers=self.workers)
+            return self._executor
+
+    def _row_ranges(self, rows:int, min_rows:int) -> list:
+        chunks = max(1, min(self.workers * 2, rows // max(min_rows, 1)))
+        edges = np.linspace(0, rows, chunks + 1).astype(int)
+        return [(int(start), int(stop)) for start, stop in zip(edges[:-1], edges[1:]) if stop > start]
+
+    def _shared_frame(self, frame:np.ndarray) -> np.ndarray:
+        """Returns an array in the shared memory block, reused while it is large enough,
+        holding a copy of frame"""
+        if self._block is None or self._block.size < frame.nbytes:
+            self._release_block()
+            self._block = shared_memory.SharedMemory(create=True, size=max(frame.nbytes, 1))
+        shared = np.ndarray(frame.shape, dtype=frame.dtype, buffer=self._block.buf)
+        shared[...] = frame
+        return shared
+
+    def apply(self, processor, frame:np.ndarray, forward:bool=True, min_rows:int=16) -> np.ndarray:
+        """Returns frame processed by a Transform or TransferCharacteristic, applied in the
+        given direction. frame must be a floating point array split along its first axis
+        into blocks of at least min_rows rows"""
+        frame = np.asarray(frame)
+        if not np.issubdtype(frame.dtype, np.floating):
+            raise ValueError("ParallelProcessor only processes floating point frames", frame.dtype)
+        ranges = self._row_ranges(frame.shape[0], min_rows)
+
+        if self.threads:
+            function = processing.processing_function(processor, forward)
+            out = np.empty_like(frame)
+
+            def process_rows(rows):
+                out[rows[0]:rows[1]] = function(frame[rows[0]:rows[1]])
+
+            list(self.executor.map(process_rows, ranges))
+            return out
+
+        with self._lock:
+            shared = self._shared_frame(frame)
+            futures = [self.executor.submit(_process_shared_rows, self._block.name, frame.shape, frame.dtype.str,
+                                            start, stop, processor, forward) for start, stop in ranges]
+            for future in futures:
+                future.result()
+
+            out = shared.copy()
+            del shared
+        return out
+
+    def _release_block(self):
+        if self._block is not None:
+            self._block.close()
+            self._block.unlink()
+            self._block = None
+
+    def close(self):
+        """Shuts down the workers and frees the shared memory"""
+        with self._lock:
+            if self._executor is not None:
+                self._executor.shutdown()
+                self._executor = None
+            self._release_block()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *args):
+        self.close()
+
+    def __repr__(self) -> str:
+        return "ParallelProcessor(workers=%r, threads=%r)" % (self.workers, self.threads)
@@ -0,0 +1,66 @@
+import numpy as np
+from . import transfer_characteristic as TC
+
+
+def processing_function(processor, forward:bool=True):
+    """Returns the function applying processor to an array. processor may be a Transform
+    (or anything else with an apply method) or a TransferCharacteristic, which is applied
+    in the given direction"""
+    if isinstance(processor, TC.TransferCharacteristic):
+        return processor.forward_transfer if forward else processor.inverse_transfer
+    if hasattr(processor, "apply"):
+        return processor.apply
+    raise TypeError("Processor must be a TransferCharacteristic or have an apply method", processor)
+
+
+def iter_tiles(frame:np.ndarray, tile_rows:int=64):
+    """Yields blocks of tile_rows scanlines of frame as views, so a memory mapped frame is
+    only read one block at a time and can be processed in place"""
+    for row in range(0, frame.shape[0], tile_rows):
+        yield frame[row:row + tile_rows]
+
+
+def process_stream(processor, tiles, in_place:bool=False, forward:bool=True):
+    """Applies processor to every NumPy tile from the tiles iterator, yielding the results
+    one tile at a time so memory use is bounded by the tile size rather than the frame size.\n
+    Arguments:\n
+        processor:      A Transform or TransferCharacteristic, see processing_function.
+        tiles:          An iterable of floating point NumPy arrays.
+        in_place:       Write each result back into its tile and yield the tile, so a reader
+                        can refill one tile buffer for every block.
+        forward:        The direction to apply a TransferCharacteristic in.
+    """
+    function = processing_function(processor, forward)
+
+    for tile in tiles:
+        tile = np.asanyarray(tile)
+        if in_place and not np.issubdtype(tile.dtype, np.floating):
+            raise ValueError("Only floating point tiles can be processed in place", tile.dtype)
+        result = function(tile)
+
+        if in_place:
+            np.copyto(tile, result, casting="same_kind")
+            yield tile
+        else:
+            yield result
+
+
+def process_frame(processor, frame:np.ndarray, tile_rows:int=64, in_place:bool=False, forward:bool=True) -> np.ndarray:
+    """Processes a whole frame, for example a memory mapped image, in blocks of tile_rows
+    scanlines. Returns the frame itself when processing in place, otherwise a new array"""
+    if in_place:
+        for _ in process_stream(processor, iter_tiles(frame, tile_rows), in_place=True, forward=forward):
+            pass
+        return frame
+
+    if frame.shape[0] == 0:
+        return processing_function(processor, forward)(frame)
+
+    out = None
+    row = 0
+    for result in process_stream(processor, iter_tiles(frame, tile_rows), forward=forward):
+        if out is None:
+            out = np.empty((frame.shape[0],) + result.shape[1:], dtype=result.dtype)
+        out[row:row + len(result)] = result
+        row += len(result)
+    return out
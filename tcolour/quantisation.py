@@ -0,0 +1,112 @@
+"""Integer code value input and output for the transfer characteristics.
+
+Code values are mapped to and from normalised signal values using either the full range
+of the bit depth or the legal (narrow) video range, where black and white sit at codes
+16 and 235 scaled to the bit depth. Decoding looks every code value up in a table built
+once per characteristic, bit depth and range. Encoding applies the characteristic and
+rounds each value to the nearest code.
+"""
+from collections import OrderedDict
+import threading
+import numpy as np
+from . import instrumentation
+
+# Bit depths up to this are decoded through a table of every code value
+MAX_TABLE_BITS = 16
+TABLE_CACHE_SIZE = 32
+
+_tables = OrderedDict()
+_tables_lock = threading.Lock()
+
+
+def code_range(bits:int, legal:bool=False) -> tuple:
+    """Returns the (black, white) code values for the bit depth and range"""
+    if bits < 1 or bits > 32:
+        raise ValueError("Code values must have between 1 and 32 bits", bits)
+    if not legal:
+        return 0, 2 ** bits - 1
+    if bits < 8:
+        raise ValueError("Legal range needs at least 8 bits", bits)
+    scale = 2 ** (bits - 8)
+    return 16 * scale, 235 * scale
+
+
+def code_dtype(bits:int) -> np.dtype:
+    """Returns the smallest unsigned integer type holding codes of the bit depth"""
+    for dtype in (np.uint8, np.uint16, np.uint32):
+        if bits <= np.iinfo(dtype).bits:
+            return np.dtype(dtype)
+    raise ValueError("Code values must have between 1 and 32 bits", bits)
+
+
+def quantise(data, bits:int, legal:bool=False) -> np.ndarray:
+    """Returns normalised signal values rounded to the nearest code value of the bit depth
+    and range. Values outside the code range are clipped and NaN becomes code 0. The
+    result is the smallest unsigned integer type holding the codes, so 10 and 12 bit
+    codes are returned as uint16"""
+    black, white = code_range(bits, legal)
+    # Scaling in float64 keeps rounding correct for every 32 bit code
+    codes = np.rint(np.asarray(data, dtype=np.float64) * (white - black) + black)
+    codes = np.clip(np.nan_to_num(codes, nan=0.0), 0, 2 ** bits - 1)
+    return codes.astype(code_dtype(bits))
+
+
+def dequantise(codes, bits:int, legal:bool=False, dtype=np.float32) -> np.ndarray:
+    """Returns code values of the bit depth and range as normalised signal values"""
+    black, white = code_range(bits, legal)
+    signal = (np.asarray(codes, dtype=np.float64) - black) / (white - black)
+    return signal.astype(dtype, copy=False)
+
+
+def decode_table(characteristic, bits:int, legal:bool=False, forward:bool=False, dtype=np.float32) -> np.ndarray:
+    """Returns the read only table of characteristic applied in the given direction to
+    every code value of the bit depth and range. Tables are cached by the content of the
+    characteristic"""
+    if bits > MAX_TABLE_BITS:
+        raise ValueError("Decode tables are only built for up to %d bits" % MAX_TABLE_BITS, bits)
+    if not characteristic.valid():
+        raise ValueError("Cannot decode with an invalid Transfer Characteristic", characteristic)
+
+    key = (characteristic.content_key(), bits, legal, forward, np.dtype(dtype).str)
+    with _tables_lock:
+        table = _tables.get(key)
+        if table is not None:
+            _tables.move_to_end(key)
+    if instrumentation.enabled:
+        instrumentation.cache_event("quantisation.decode_tables", table is not None)
+    if table is not None:
+        return table
+
+    signal = dequantise(np.arange(2 ** bits), bits, legal, np.float64)
+    function = characteristic.forward_transfer if forward else characteristic.inverse_transfer
+    table = np.asarray(function(signal)).astype(dtype)
+    table.flags.writeable = False
+
+    with _tables_lock:
+        _tables[key] = table
+        while len(_tables) > TABLE_CACHE_SIZE:
+            _tables.popitem(last=False)
+    return table
+
+
+def decode(characteristic, codes, bits:int, legal:bool=False, forward:bool=False, dtype=np.float32) -> np.ndarray:
+    """Returns integer code values of the bit depth and range processed by characteristic,
+    by default in the inverse (decoding) direction, as an array of dtype. Codes above the
+    largest code of the bit depth are clipped"""
+    codes = np.asarray(codes)
+    if not np.issubdtype(codes.dtype, np.integer):
+        raise TypeError("Code values must be integers", codes.dtype)
+
+    if bits > MAX_TABLE_BITS:
+        function = characteristic.forward_transfer if forward else characteristic.inverse_transfer
+        return np.asarray(function(dequantise(codes, bits, legal, np.float64))).astype(dtype)
+    return np.take(decode_table(characteristic, bits, legal, forward, dtype), codes, mode="clip")
+
+
+def encode(characteristic, data, bits:int, legal:bool=False, forward:bool=True) -> np.ndarray:
+    """Returns data processed by characteristic, by default in the forward (encoding)
+    direction, and quantised to code values of the bit depth and range"""
+    if not characteristic.valid():
+        raise ValueError("Cannot encode with an invalid Transfer Characteristic", characteristic)
+    function = characteristic.forward_transfer if forward else characteristic.inverse_transfer
+    return quantise(function(np.asarray(data)), bits, legal)
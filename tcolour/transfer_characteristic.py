@@ -1,6 +1,34 @@
+from collections import namedtuple
 from enum import Enum
-from math import log10
-    
+import threading
+import numpy as np
+import uritools
+from . import instrumentation
+
+
+def _as_float_array(data) -> np.ndarray:
+    """Returns data as a floating point NumPy array. Half floats are promoted to
+    float32 and non floating point input to float64 for the maths"""
+    array = np.asarray(data)
+    if array.dtype == np.float16:
+        return array.astype(np.float32)
+    if not np.issubdtype(array.dtype, np.floating):
+        return array.astype(np.float64)
+    return array
+
+
+def _restore_type(result:np.ndarray, data):
+    """Returns result in the same container type (and dtype for arrays) as the
+    original input data"""
+    if isinstance(data, np.ndarray):
+        if np.issubdtype(data.dtype, np.floating):
+            return result.astype(data.dtype, copy=False)
+        return result
+    if result.ndim == 0:
+        return result.item()
+    return result.tolist()
+
+
 class TransferCharacteristic():
     """Defines a Transfer Characteristic, stored as either a URI, a Parametric or a Named function."""
 
@@ -12,25 +40,260 @@ class TransferCharacteristic():
         pass
 
     def inverse_transfer(self, data):
-        """Processes data with the given characteristic transfer function in the inverse direction"""
-        pass
+        """Processes data with the given characteristic transfer function in the inverse direction.
+        Characteristics without a closed form inverse are inverted numerically over [0, 1]"""
+        return self.numeric_inverse().apply(data)
+
+    def numeric_inverse(self, domain:tuple=(0.0, 1.0), size:int=4096, tolerance:float=1e-10,
+                        max_iterations:int=50) -> "NumericInverse":
+        """Returns a NumericInverse of forward_transfer over the input domain. Inverses are
+        kept, so the sample table is only built once for each set of arguments"""
+        if not self.valid():
+            raise ValueError("Cannot invert an invalid Transfer Characteristic", self)
+        key = (self.content_key(), tuple(domain), size, tolerance, max_iterations)
+        inverses = self.__dict__.setdefault("_numeric_inverses", {})
+        inverse = inverses.get(key)
+        if instrumentation.enabled:
+            instrumentation.cache_event("TransferCharacteristic.numeric_inverses", inverse is not None)
+        if inverse is None:
+            inverse = inverses.setdefault(key, NumericInverse(self, domain, size, tolerance, max_iterations))
+        return inverse
+
+    def derivative(self, data, forward:bool=True):
+        """Returns the slope of the transfer function at data in the given direction. Estimated
+        with central differences unless a subclass provides the analytic derivative"""
+        x = _as_float_array(data).astype(np.float64)
+        step = 1e-6 * np.maximum(np.abs(x), 1.0)
+        function = self.forward_transfer if forward else self.inverse_transfer
+        out = (function(x + step) - function(x - step)) / (2.0 * step)
+
+        return _restore_type(out.astype(_as_float_array(data).dtype, copy=False), data)
+
+    def bake(self, size:int=4096, domain:tuple=(0.0, 1.0), forward:bool=True):
+        """Returns a LUT1D of size entries sampling this transfer characteristic over the
+        input domain in the given direction"""
+        from . import lut
+        if not self.valid():
+            raise ValueError("Cannot bake an invalid Transfer Characteristic", self)
+        function = self.forward_transfer if forward else self.inverse_transfer
+        return lut.LUT1D.from_function(function, size, domain)
+
+    def bake_half(self, forward:bool=True, dtype=np.float16):
+        """Returns a LUT1DHalf holding this transfer characteristic evaluated for every half
+        float input in the given direction"""
+        from . import lut
+        if not self.valid():
+            raise ValueError("Cannot bake an invalid Transfer Characteristic", self)
+        function = self.forward_transfer if forward else self.inverse_transfer
+        return lut.LUT1DHalf.from_function(function, dtype)
+
+    def decode_integer(self, codes, bits:int, legal:bool=False, forward:bool=False, dtype=np.float32) -> np.ndarray:
+        """Returns integer code values of the given bit depth, in full or legal range, processed
+        by this transfer characteristic in the inverse direction unless forward is set. Uses a
+        cached table of every code value"""
+        from . import quantisation
+        return quantisation.decode(self, codes, bits, legal, forward, dtype)
+
+    def encode_integer(self, data, bits:int, legal:bool=False, forward:bool=True) -> np.ndarray:
+        """Returns data processed by this transfer characteristic in the forward direction,
+        unless forward is cleared, rounded to integer code values of the given bit depth in
+        full or legal range"""
+        from . import quantisation
+        return quantisation.encode(self, data, bits, legal, forward)
 
     def valid(self) -> bool:
         return False
 
+    def content_key(self) -> tuple:
+        """Returns a hashable key describing the function, equal for characteristics
+        that process data identically"""
+        return (type(self).__name__,)
+
+    def __getstate__(self):
+        # Numeric inverses are rebuilt on first use rather than pickled into every task
+        state = self.__dict__.copy()
+        state.pop("_numeric_inverses", None)
+        return state
+
     def __repr__(self) -> str:
         return "TransferCharacteristic()" 
     
+class NumericInverse():
+    """The inverse of a transfer characteristic's forward_transfer, found numerically.\n
+    The forward function is sampled once over the input domain into a table, which must
+    be finite and strictly increasing or decreasing. Each value is bracketed by samples
+    found through a uniform grid of values, interpolated, then refined by Newton steps using the
+    characteristic's derivative. A step leaving the bracketing samples is replaced by
+    bisection, so the refinement always converges. Values outside the range of the
+    table are bracketed by stepping out from the end of the domain in doubling steps,
+    then refined the same way. Values the forward function does not reach within
+    max_iterations steps, and NaN, give NaN.\n
+    Attributes:\n
+        domain:         The (minimum, maximum) input of the forward function
+        tolerance:      Largest accepted difference between the forward function of the
+                        result and the value being inverted
+        max_iterations: Most refinement steps taken for any value
+        samples:        The sampled inputs, ordered so values is increasing
+        values:         The forward function of each sample, increasing
+        increasing:     True if the forward function is increasing
+    """
+
+    def __init__(self, characteristic:TransferCharacteristic, domain:tuple=(0.0, 1.0), size:int=4096,
+                 tolerance:float=1e-10, max_iterations:int=50) -> None:
+        if size < 2:
+            raise ValueError("A NumericInverse needs at least two samples", size)
+        self.characteristic = characteristic
+        self.domain = (float(min(domain)), float(max(domain)))
+        self.tolerance = tolerance
+        self.max_iterations = max_iterations
+
+        samples = np.linspace(self.domain[0], self.domain[1], size)
+        values = np.asarray(characteristic.forward_transfer(samples), dtype=np.float64)
+        if values.shape != samples.shape or not np.all(np.isfinite(values)):
+            raise ValueError("Transfer Characteristic must be finite over the domain to be inverted", characteristic)
+        steps = np.diff(values)
+        if np.all(steps > 0):
+            self.increasing = True
+        elif np.all(steps < 0):
+            self.increasing = False
+        else:
+            raise ValueError("Transfer Characteristic must be strictly monotonic over the domain to be inverted", characteristic)
+
+        self.samples = samples if self.increasing else samples[::-1].copy()
+        self.values = values if self.increasing else values[::-1].copy()
+
+        # Index of the first sample at or above each edge of a uniform grid of values, so
+        # each value is bracketed without a binary search
+        self._bins = 4 * size
+        edges = np.linspace(self.values[0], self.values[-1], self._bins + 1)
+        self._bin_index = np.clip(np.searchsorted(self.values, edges), 1, size - 1)
+
+    def apply(self, data):
+        """Returns the inputs of the forward function giving each value of data"""
+        x = _as_float_array(data)
+        target = x.astype(np.float64).ravel()
+        samples, values = self.samples, self.values
+
+        position = np.nan_to_num((target - values[0]) * (self._bins / (values[-1] - values[0])))
+        bins = np.clip(position, 0, self._bins - 1).astype(np.intp)
+        low = self._bin_index[bins] - 1
+        high = self._bin_index[bins + 1]
+        lower, upper = samples[low], samples[high]
+        out = lower + (target - values[low]) / (values[high] - values[low]) * (upper - lower)
+
+        for outside, end, other in ((target < values[0], 0, -1), (target > values[-1], -1, 0)):
+            if outside.any():
+                out[outside] = self._outside(target[outside], end, samples[end] - samples[other])
+
+        inside = np.flatnonzero((target >= values[0]) & (target <= values[-1]))
+        if len(inside) == len(target):
+            out = self._refine(target, out, np.minimum(lower, upper), np.maximum(lower, upper))
+        else:
+            lower, upper = lower[inside], upper[inside]
+            out[inside] = self._refine(target[inside], out[inside], np.minimum(lower, upper), np.maximum(lower, upper))
+
+        return _restore_type(out.reshape(x.shape).astype(x.dtype, copy=False), data)
+
+    def _outside(self, target:np.ndarray, end:int, step:float) -> np.ndarray:
+        """Inverts values beyond the value of sample end. Brackets are found by stepping
+        away from the sample, doubling step each time, until the forward function passes
+        the target, and are then refined"""
+        beyond = (lambda value, target: value >= target) if end == -1 else (lambda value, target: value <= target)
+        count = len(target)
+        near = np.full(count, self.samples[end])
+        near_value = np.full(count, self.values[end])
+        far = near + step
+        steps = np.full(count, step)
+
+        out = np.full(count, np.nan)
+        lower = np.empty(count)
+        upper = np.empty(count)
+        bracketed = np.zeros(count, dtype=bool)
+        active = np.arange(count)
+        for _ in range(self.max_iterations):
+            if not len(active):
+                break
+            with np.errstate(over="ignore", invalid="ignore"):
+                far_value = np.asarray(self.characteristic.forward_transfer(far[active]), dtype=np.float64)
+            passed = beyond(far_value, target[active])
+            found = active[passed]
+            fraction = (target[found] - near_value[found]) / (far_value[passed] - near_value[found])
+            out[found] = near[found] + fraction * (far[found] - near[found])
+            lower[found] = np.minimum(near[found], far[found])
+            upper[found] = np.maximum(near[found], far[found])
+            bracketed[found] = True
+
+            # Values the function stops being finite before reaching are left as NaN
+            keep = ~passed & np.isfinite(far_value)
+            active, far_value = active[keep], far_value[keep]
+            near[active] = far[active]
+            near_value[active] = far_value
+            steps[active] *= 2.0
+            far[active] += steps[active]
+
+        found = np.flatnonzero(bracketed)
+        out[found] = self._refine(target[found], out[found], lower[found], upper[found])
+        return out
+
+    def _refine(self, target:np.ndarray, x:np.ndarray, lower:np.ndarray, upper:np.ndarray) -> np.ndarray:
+        """Refines x, bracketed by lower and upper, until the forward function of each
+        value is within tolerance of target. Converged values are dropped from the working
+        arrays, so only unconverged values are evaluated"""
+        out = x
+        positions = np.arange(len(target))
+        for _ in range(self.max_iterations):
+            if not len(positions):
+                break
+            error = self.characteristic.forward_transfer(x) - target
+
+            # A forward value above the target puts the root below x
+            high = (error > 0) == self.increasing
+            lower = np.where(high, lower, x)
+            upper = np.where(high, x, upper)
+
+            done = (np.abs(error) <= self.tolerance) | (upper - lower <= np.spacing(np.abs(x)))
+            out[positions[done]] = x[done]
+            keep = ~done
+            positions, target, lower, upper, x, error = (array[keep] for array in (positions, target, lower, upper, x, error))
+
+            with np.errstate(divide="ignore", invalid="ignore"):
+                step = x - error / self.characteristic.derivative(x)
+            bisect = ~((step > lower) & (step < upper))
+            step[bisect] = 0.5 * (lower[bisect] + upper[bisect])
+            x = step
+
+        out[positions] = x
+        return out
+
+    def __repr__(self) -> str:
+        return "NumericInverse(characteristic=%r, domain=%r, size=%r, tolerance=%r)" \
+            % (self.characteristic, self.domain, len(self.samples), self.tolerance)
+
+
 class TransferCharacteristicParametric(TransferCharacteristic):
-    """A parametric transfer function."""
+    """A parametric transfer function.\n
+    Setting parameters compiles them into an immutable tuple of precomputed coefficients
+    used by every call. Assign a new dict, rather than editing it in place, to change them.
+    """
 
     def __init__(self, parameters:dict) -> None:
         super().__init__()
         self.parameters = parameters
 
+    def content_key(self) -> tuple:
+        return (type(self).__name__, tuple(sorted(self.parameters.items())))
+
     def __repr__(self) -> str:
         return super().__repr__()
     
+PowerCoefficients = namedtuple("PowerCoefficients", ["exponent", "inverse_exponent"])
+
+PowerWithBreakCoefficients = namedtuple("PowerWithBreakCoefficients",
+                                        ["a", "b", "c", "d", "g", "inverse_a", "inverse_c", "inverse_g", "cut_off"])
+
+Log10WithBreakCoefficients = namedtuple("Log10WithBreakCoefficients",
+                                        ["a", "b", "c", "d", "e", "f", "h", "inverse_a", "inverse_c", "inverse_e", "cut"])
+
 class TransferCharacteristicPower(TransferCharacteristicParametric):
     """A power function transfer characteristic"""
 
@@ -46,20 +309,34 @@ class TransferCharacteristicPower(TransferCharacteristicParametric):
         if type(value) is not dict: raise Exception("Parameters must be a dict")
         if len(value) != 1: raise Exception("TransferCharacteristicPower only takes one parameter.")
         self._parameters = value
+        exponent = float(list(value.values())[0])
+        self.coefficients = PowerCoefficients(exponent, 1.0 / exponent)
 
     def forward_transfer(self, data):
-        new_data = []
-        for idx, x in enumerate(data):
-            new_data.append(pow(x, list(self.parameters.values())[0]))
+        x = _as_float_array(data)
+        with np.errstate(invalid="ignore"):
+            out = np.power(x, self.coefficients.exponent)
 
-        return new_data
+        return _restore_type(out, data)
 
     def inverse_transfer(self, data):
-        new_data = []
-        for idx, x in enumerate(data):
-            new_data.append(pow(x, 1.0 / list(self.parameters.values())[0]))
+        x = _as_float_array(data)
+        with np.errstate(invalid="ignore"):
+            out = np.power(x, self.coefficients.inverse_exponent)
 
-        return new_data
+        return _restore_type(out, data)
+
+    def derivative(self, data, forward:bool=True):
+        x = _as_float_array(data)
+        exponent = self.exponent(forward)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            out = exponent * np.power(x, exponent - 1.0)
+
+        return _restore_type(out, data)
+
+    def exponent(self, forward:bool=True) -> float:
+        """Returns the exponent applied in the given direction"""
+        return self.coefficients.exponent if forward else self.coefficients.inverse_exponent
 
     def valid(self) -> bool:
         return True
@@ -82,31 +359,62 @@ class TransferCharacteristicPowerWithBreak(TransferCharacteristicParametric):
         if type(value) is not dict: raise Exception("TransferCharacteristic parameters must be a dict")
         if len(value) != 5: raise Exception("TransferCharacteristicPowerWithBreak takes only exactly five parameters.")
         self._parameters = value
+        a, b, c, d, g = (float(value[key]) for key in ("a", "b", "c", "d", "g"))
+        self.coefficients = PowerWithBreakCoefficients(a, b, c, d, g, 1.0 / a, 1.0 / c, 1.0 / g, c * d)
 
     def forward_transfer(self, data):
-        new_data = []
-        for idx, x in enumerate(data):
-            item = x
-            if(item <= self.parameters["d"]):
-                item = self.parameters["c"] * item
-            else:
-                item = self.parameters["a"] * pow(item, 1.0 / self.parameters["g"]) + self.parameters["b"]
-            new_data.append(item)
+        x = _as_float_array(data)
+        k = self.coefficients
+
+        linear = x <= k.d
+        curve = ~linear
+        out = np.empty_like(x)
+        np.multiply(k.c, x, out=out, where=linear)
+        with np.errstate(invalid="ignore"):
+            np.power(x, k.inverse_g, out=out, where=curve)
+        np.multiply(k.a, out, out=out, where=curve)
+        np.add(out, k.b, out=out, where=curve)
 
-        return new_data
+        return _restore_type(out, data)
 
     def inverse_transfer(self, data):
-        new_data = []
-        cut_off = self.parameters["c"] * self.parameters["d"]
-        for idx, x in enumerate(data):
-            item = x
-            if(item <= cut_off):
-                item =  item / self.parameters["c"]
+        x = _as_float_array(data)
+        k = self.coefficients
+
+        linear = x <= k.cut_off
+        curve = ~linear
+        out = np.empty_like(x)
+        # Divide rather than multiply by the reciprocals so forward values round trip exactly
+        np.divide(x, k.c, out=out, where=linear)
+        np.subtract(x, k.b, out=out, where=curve)
+        np.divide(out, k.a, out=out, where=curve)
+        with np.errstate(invalid="ignore"):
+            np.power(out, k.g, out=out, where=curve)
+
+        return _restore_type(out, data)
+
+    def derivative(self, data, forward:bool=True):
+        x = _as_float_array(data)
+        k = self.coefficients
+
+        out = np.empty_like(x)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            if forward:
+                linear = x <= k.d
+                curve = ~linear
+                out[linear] = k.c
+                np.power(x, k.inverse_g - 1.0, out=out, where=curve)
+                np.multiply(k.a * k.inverse_g, out, out=out, where=curve)
             else:
-                item = pow((item - self.parameters["b"]) / self.parameters["a"], self.parameters["g"])
-            new_data.append(item)
-
-        return new_data
+                linear = x <= k.cut_off
+                curve = ~linear
+                out[linear] = k.inverse_c
+                np.subtract(x, k.b, out=out, where=curve)
+                np.multiply(out, k.inverse_a, out=out, where=curve)
+                np.power(out, k.g - 1.0, out=out, where=curve)
+                np.multiply(k.g * k.inverse_a, out, out=out, where=curve)
+
+        return _restore_type(out, data)
     
     def valid(self) -> bool:
         return True
@@ -129,47 +437,68 @@ class TransferCharacteristicLog10WithBreak(TransferCharacteristicParametric):
         if type(value) is not dict: raise Exception("TransferCharacteristic parameters must be a dict")
         if len(value) != 7: raise Exception("TransferCharacteristicPowerWithBreak takes only exactly seven parameters.")
         self._parameters = value
+        a, b, c, d, e, f, h = (float(value[key]) for key in ("a", "b", "c", "d", "e", "f", "h"))
+        self.coefficients = Log10WithBreakCoefficients(a, b, c, d, e, f, h, 1.0 / a, 1.0 / c, 1.0 / e, e * h + f)
 
     def forward_transfer(self, data):
-        new_data = []
-        a = self.parameters["a"]
-        b = self.parameters["b"]
-        c = self.parameters["c"]
-        d = self.parameters["d"]
-        e = self.parameters["e"]
-        f = self.parameters["f"]
-        h = self.parameters["h"]
-        for idx, x in enumerate(data):
-            item = x
-            if(item <= h):
-                item = e * item + f
-            else:
-                item = c * log10(a * item + b) + d
-            new_data.append(item)
-
-        return new_data
+        x = _as_float_array(data)
+        k = self.coefficients
+
+        linear = x <= k.h
+        curve = ~linear
+        out = np.empty_like(x)
+        np.multiply(k.e, x, out=out, where=linear)
+        np.add(out, k.f, out=out, where=linear)
+        np.multiply(k.a, x, out=out, where=curve)
+        np.add(out, k.b, out=out, where=curve)
+        with np.errstate(invalid="ignore", divide="ignore"):
+            np.log10(out, out=out, where=curve)
+        np.multiply(k.c, out, out=out, where=curve)
+        np.add(out, k.d, out=out, where=curve)
+
+        return _restore_type(out, data)
 
     def inverse_transfer(self, data):
-        new_data = []
-        a = self.parameters["a"]
-        b = self.parameters["b"]
-        c = self.parameters["c"]
-        d = self.parameters["d"]
-        e = self.parameters["e"]
-        f = self.parameters["f"]
-        h = self.parameters["h"]
-
-        cut = e * h + f
-
-        for idx, x in enumerate(data):
-            item = x
-            if(item <= cut):
-                item = (item - f) / e
+        x = _as_float_array(data)
+        k = self.coefficients
+
+        linear = x <= k.cut
+        curve = ~linear
+        out = np.empty_like(x)
+        np.subtract(x, k.f, out=out, where=linear)
+        np.multiply(out, k.inverse_e, out=out, where=linear)
+        np.subtract(x, k.d, out=out, where=curve)
+        np.multiply(out, k.inverse_c, out=out, where=curve)
+        with np.errstate(over="ignore"):
+            np.power(10.0, out, out=out, where=curve)
+        np.subtract(out, k.b, out=out, where=curve)
+        np.multiply(out, k.inverse_a, out=out, where=curve)
+
+        return _restore_type(out, data)
+
+    def derivative(self, data, forward:bool=True):
+        x = _as_float_array(data)
+        k = self.coefficients
+
+        out = np.empty_like(x)
+        with np.errstate(invalid="ignore", divide="ignore", over="ignore"):
+            if forward:
+                linear = x <= k.h
+                curve = ~linear
+                out[linear] = k.e
+                np.multiply(k.a, x, out=out, where=curve)
+                np.add(out, k.b, out=out, where=curve)
+                np.divide(k.c * k.a / np.log(10.0), out, out=out, where=curve)
             else:
-                item = (pow(10, (item - d) / c) - b) / a
-            new_data.append(item)
+                linear = x <= k.cut
+                curve = ~linear
+                out[linear] = k.inverse_e
+                np.subtract(x, k.d, out=out, where=curve)
+                np.multiply(out, k.inverse_c, out=out, where=curve)
+                np.power(10.0, out, out=out, where=curve)
+                np.multiply(np.log(10.0) * k.inverse_a * k.inverse_c, out, out=out, where=curve)
 
-        return new_data
+        return _restore_type(out, data)
 
     def valid(self) -> bool:
         return True
@@ -177,43 +506,163 @@ class TransferCharacteristicLog10WithBreak(TransferCharacteristicParametric):
     def __repr__(self) -> str:
         return "TransferCharacteristicLog10WithBreak(parameters=%r)" % (self.parameters)
 
+def _same_characteristic(first:TransferCharacteristic, second:TransferCharacteristic) -> bool:
+    """Returns True if both transfer characteristics describe the same function"""
+    if first is second:
+        return True
+    if type(first) is not type(second):
+        return False
+    if isinstance(first, TransferCharacteristicParametric):
+        return first.parameters == second.parameters
+    return False
+
+
+def _fuse_steps(steps:list) -> list:
+    """Removes adjacent steps that cancel out and merges adjacent power steps
+    into a single exponent. Steps are (TransferCharacteristic, forward) pairs"""
+    fused = []
+    for characteristic, forward in steps:
+        if fused:
+            previous, previous_forward = fused[-1]
+            if previous_forward != forward and _same_characteristic(previous, characteristic):
+                fused.pop()
+                continue
+            if isinstance(previous, TransferCharacteristicPower) and isinstance(characteristic, TransferCharacteristicPower):
+                fused.pop()
+                exponent = previous.exponent(previous_forward) * characteristic.exponent(forward)
+                if exponent != 1.0:
+                    fused.append((TransferCharacteristicPower({"a": exponent}), True))
+                continue
+        fused.append((characteristic, forward))
+
+    return fused
+
+
 class TransferCharacteristicSequence(TransferCharacteristic):
     """A transfer function made from a sequence of other transfer functions
         Holds an ordered list of pairs of transfer characteristics and directions
-        (either forward or inverse)
+        (either forward or inverse). The sequence must be resolved against a Config
+        before it can process data.
     """
 
     def __init__(self, sequence:list) -> None:
         self.sequence = sequence
+        self.steps = []
+        self.resolved = False
+
+    def resolve(self, config) -> None:
+        """Looks up each descriptor in the sequence in the given Config and stores the
+        fused list of (TransferCharacteristic, forward) steps"""
+        steps = []
+        for item in self.sequence:
+            direction = item["Direction"]
+            if direction not in ("forward", "inverse"):
+                raise ValueError("Transfer Characteristic direction must be forward or inverse", direction)
+            forward = direction == "forward"
+
+            characteristic = config.get_colourimetry(item["Descriptor"]).transfer_characteristic
+            if isinstance(characteristic, TransferCharacteristicSequence):
+                if not characteristic.resolved:
+                    characteristic.resolve(config)
+                if forward:
+                    steps += characteristic.steps
+                else:
+                    steps += [(step, not step_forward) for step, step_forward in reversed(characteristic.steps)]
+            else:
+                steps.append((characteristic, forward))
+
+        self.steps = _fuse_steps(steps)
+        self.resolved = True
+
+    def forward_transfer(self, data):
+        if not self.resolved:
+            raise Exception("TransferCharacteristicSequence must be resolved before use")
+        x = _as_float_array(data)
+        for characteristic, forward in self.steps:
+            x = characteristic.forward_transfer(x) if forward else characteristic.inverse_transfer(x)
 
-    def forward_transfer(self):
-        return self.sequence
+        return _restore_type(x, data)
 
-    def inverse_transfer(self):
-        sequence_copy = self.sequence.copy()
-        sequence_copy.reverse()
-        return sequence_copy
+    def inverse_transfer(self, data):
+        if not self.resolved:
+            raise Exception("TransferCharacteristicSequence must be resolved before use")
+        x = _as_float_array(data)
+        for characteristic, forward in reversed(self.steps):
+            x = characteristic.inverse_transfer(x) if forward else characteristic.forward_transfer(x)
+
+        return _restore_type(x, data)
 
     def valid(self) -> bool:
-        return True
+        return self.resolved
+
+    def content_key(self) -> tuple:
+        if not self.resolved:
+            return (type(self).__name__, repr(self.sequence))
+        return (type(self).__name__, tuple((step.content_key(), forward) for step, forward in self.steps))
 
     def __repr__(self) -> str:
-        return "TransferCharacteristicPower(sequence=%r)" % (self.sequence)
+        return "TransferCharacteristicSequence(sequence=%r)" % (self.sequence)
 
 class TransferCharacteristicURI(TransferCharacteristic):
-    """A transfer characteristic that references an external file"""
+    """A transfer characteristic that references an external LUT file.\n
+    Supports file URIs to .cube, .spi1d, .spi3d and raw binary .npy LUTs. The file is
+    only read the first time data is processed. 1D LUTs are inverted by resampling
+    the table, 3D LUTs can only be applied forwards.
+    """
 
     def __init__(self, URI) -> None:
         self.URI = URI
+        self._lut = None
+        self._inverse_lut = None
+        # Serialises the first read, so threads needing this LUT at the same time read it once
+        self._lut_lock = threading.Lock()
+
+    @property
+    def path(self) -> str:
+        parts = uritools.urisplit(self.URI)
+        if parts.scheme not in (None, "file"):
+            raise ValueError("Only file URIs are supported", self.URI)
+        return uritools.uridecode(parts.path)
+
+    @property
+    def lut(self):
+        """The LUT referenced by the URI, read on first access"""
+        if self._lut is None:
+            from . import lut
+            with self._lut_lock:
+                if self._lut is None:
+                    self._lut = lut.read_lut(self.path)
+        return self._lut
+
+    def __getstate__(self):
+        # Other processes load their own (memory mapped) copy of the LUT on first use
+        state = super().__getstate__()
+        state["_lut"] = None
+        state["_inverse_lut"] = None
+        del state["_lut_lock"]
+        return state
+
+    def __setstate__(self, state):
+        self.__dict__.update(state)
+        self._lut_lock = threading.Lock()
 
     def forward_transfer(self, data):
-        print("ERROR: You didn't think I'd written my own LUT engine yet did you?")
+        return self.lut.apply(data)
 
-    def inverse_transfer(self,data):
-        print("ERROR: You didn't think I'd written my own LUT engine yet did you?")
+    def inverse_transfer(self, data):
+        if self._inverse_lut is None:
+            if not hasattr(self.lut, "inverse"):
+                raise ValueError("Only 1D LUTs can be inverted", self.URI)
+            with self._lut_lock:
+                if self._inverse_lut is None:
+                    self._inverse_lut = self.lut.inverse()
+        return self._inverse_lut.apply(data)
 
     def valid(self) -> bool:
         return True
 
+    def content_key(self) -> tuple:
+        return (type(self).__name__, self.URI)
+
     def __repr__(self) -> str:
-        return "TransferCharacteristicURI(URI=%r)" % (self.URI)
\ No newline at end of file
+        return "TransferCharacteristicURI(URI=%r)" % (self.URI)
@@ -0,0 +1,252 @@
+import numpy as np
+from . import asynchronous
+from . import colourimetry
+from . import fused
+from . import transfer_characteristic as TC
+
+BRADFORD = np.array([[0.8951, 0.2664, -0.1614],
+                     [-0.7502, 1.7135, 0.0367],
+                     [0.0389, -0.0685, 1.0296]])
+
+CAT02 = np.array([[0.7328, 0.4296, -0.1624],
+                  [-0.7036, 1.6975, 0.0061],
+                  [0.0030, 0.0136, 0.9834]])
+
+CONE_RESPONSES = {"Bradford": BRADFORD, "CAT02": CAT02}
+
+
+def xy_to_XYZ(xy) -> np.ndarray:
+    """Converts CIE xy chromaticity coordinates, in the last axis, to XYZ with Y = 1"""
+    xy = np.asarray(xy, dtype=np.float64)
+    x, y = xy[..., 0], xy[..., 1]
+    return np.stack([x / y, np.ones_like(x), (1.0 - x - y) / y], axis=-1)
+
+
+def rgb_to_xyz_matrices(xy:np.ndarray, achromatic:np.ndarray) -> np.ndarray:
+    """Returns the (N, 3, 3) normalised primary matrices for (N, 3, 2) primary xy
+    coordinates and (N, 2) achromatic centroids"""
+    xy = np.asarray(xy, dtype=np.float64)
+    chromaticities = np.stack([xy[..., 0], xy[..., 1], 1.0 - xy[..., 0] - xy[..., 1]], axis=-2) / xy[..., None, :, 1]
+    scale = np.linalg.solve(chromaticities, xy_to_XYZ(achromatic)[..., None])
+
+    return chromaticities * np.swapaxes(scale, -1, -2)
+
+
+def rgb_to_xyz_matrix(primaries:colourimetry.RGBPrimaries, achromatic) -> np.ndarray:
+    """Returns the 3x3 normalised primary matrix taking linear RGB to CIE XYZ for the
+    given primaries and achromatic centroid"""
+    return rgb_to_xyz_matrices(primaries.xy[None], np.asarray(achromatic, dtype=np.float64)[None])[0]
+
+
+def chromatic_adaptation_matrix(source_white, destination_white, cone_response:np.ndarray=BRADFORD) -> np.ndarray:
+    """Returns the von Kries style XYZ to XYZ matrix adapting source_white to
+    destination_white. Both whites are CIE xy coordinates, or arrays of them in the
+    last axis giving a matrix for each pair"""
+    source_cone = xy_to_XYZ(source_white) @ cone_response.T
+    destination_cone = xy_to_XYZ(destination_white) @ cone_response.T
+
+    return np.linalg.inv(cone_response) @ ((destination_cone / source_cone)[..., :, None] * cone_response)
+
+
+def _observer(col:colourimetry.Colourimetry):
+    """Returns the CIE version of col, which is the 1931 observer unless given"""
+    return colourimetry.cie_observer(col.cie_version)
+
+
+def _encoding(col:colourimetry.Colourimetry):
+    """Returns the transfer characteristic of col, or None if the colourimetry is linear"""
+    characteristic = col.transfer_characteristic
+    if type(characteristic) is TC.TransferCharacteristic:
+        return None
+    if not characteristic.valid():
+        raise ValueError("Transfer Characteristic of %r is not valid" % (col.descriptor))
+    return characteristic
+
+
+class Transform():
+    """A compiled RGB to RGB conversion between two colourimetry sets.\n
+    The source transfer characteristic is applied in the inverse direction to
+    linearise, followed by a single combined 3x3 matrix (including any chromatic
+    adaptation) and the destination transfer characteristic in the forward direction.
+    Colourimetry without a Transfer Characteristic is treated as linear. Both colourimetry
+    sets must use the same CIE version, as there is no matrix converting between the
+    chromaticities of different observers.\n
+    When Numba is installed and every transfer characteristic is parametric, float32
+    and float64 data is converted by a fused per pixel kernel instead of step by step.\n
+    Attributes:\n
+        matrix:  The combined linear RGB to linear RGB matrix. It is derived from the
+                 colourimetry unless given, for example from a MatrixTable
+        kernel:  The fused.FusedKernel for the conversion, or None to use NumPy
+    """
+
+    def __init__(self, source:colourimetry.Colourimetry, destination:colourimetry.Colourimetry,
+                 matrix:np.ndarray=None, cone_response:np.ndarray=BRADFORD) -> None:
+        for col in (source, destination):
+            if not col.primaries.valid() or not col.achromatic_valid():
+                raise ValueError("Colourimetry %r needs resolved RGB Primaries and an Achromatic Centroid" % (col.descriptor))
+        if _observer(source) != _observer(destination):
+            raise ValueError("Cannot convert between %r and %r as they use different CIE versions"
+                             % (source.descriptor, destination.descriptor))
+
+        self.source = source
+        self.destination = destination
+        self.decoding = _encoding(source)
+        self.encoding = _encoding(destination)
+
+        source_white = source.chromaticities[3]
+        destination_white = destination.chromaticities[3]
+
+        self.matrix = np.identity(3)
+        if matrix is not None:
+            self.matrix = np.asarray(matrix, dtype=np.float64)
+        elif not np.array_equal(source.chromaticities, destination.chromaticities):
+            source_matrix = rgb_to_xyz_matrix(source.primaries, source_white)
+            destination_matrix = rgb_to_xyz_matrix(destination.primaries, destination_white)
+            adaptation = np.identity(3)
+            if not np.array_equal(source_white, destination_white):
+                adaptation = chromatic_adaptation_matrix(source_white, destination_white, cone_response)
+
+            self.matrix = np.linalg.inv(destination_matrix) @ adaptation @ source_matrix
+
+        self.kernel = fused.compile_transform(self) if fused.available() else None
+
+    def apply(self, data):
+        """Converts data, an array of RGB triplets with the channels in the last axis"""
+        x = TC._as_float_array(data)
+        if x.shape[-1] != 3:
+            raise ValueError("Transform data must have three channels in the last axis")
+
+        if self.kernel is not None and fused.enabled and x.dtype in (np.float32, np.float64):
+            x = self.kernel.apply(x)
+        else:
+            x = self._apply_numpy(x)
+
+        return TC._restore_type(x, data)
+
+    async def aapply(self, data, key=None):
+        """Asynchronous apply, converting on the asynchronous thread pool. Concurrent calls
+        given the same hashable key, such as a frame number, share one conversion, so the
+        key must identify the content of data"""
+        if key is None:
+            return await asynchronous.run(self.apply, data)
+        return await asynchronous.run(self.apply, data, key=("apply", id(self), key))
+
+    def _apply_numpy(self, x:np.ndarray) -> np.ndarray:
+        if self.decoding is not None:
+            x = self.decoding.inverse_transfer(x)
+        x = x @ self.matrix.T.astype(x.dtype)
+        if self.encoding is not None:
+            x = self.encoding.forward_transfer(x)
+        return x
+
+    def __repr__(self) -> str:
+        return "Transform(source=%r, destination=%r)" % (self.source.descriptor, self.destination.descriptor)
+
+
+class MatrixTable():
+    """The matrices converting between every pair of a set of colourimetry, derived once
+    for each space and each pair of whites rather than for each pair of spaces.\n
+    Spaces are numbered in the order given, skipping any without resolved RGB Primaries
+    and Achromatic Centroid or whose matrices cannot be derived, such as spaces with
+    coincident primaries. Whites are numbered by their coordinates and CIE version,
+    as chromaticities are specific to an observer. There is no adaptation between
+    observers, so those entries of adaptation are NaN.\n
+    Attributes:\n
+        spaces:         The colourimetry of each space id
+        index:          The space id of each descriptor
+        chromaticities: (N, 4, 2) RGB and white chromaticities of each space
+        observers:      The CIE version of each space
+        rgb_to_xyz:     (N, 3, 3) normalised primary matrix of each space
+        xyz_to_rgb:     (N, 3, 3) inverse of each rgb_to_xyz
+        white_ids:      (N,) white id of each space
+        whites:         (W, 2) xy coordinates of each white
+        adaptation:     (W, W, 3, 3) chromatic adaptation from the first white to the second
+    """
+
+    def __init__(self, spaces, cone_response:np.ndarray=BRADFORD) -> None:
+        spaces = [col for col in spaces if col.primaries.valid() and col.achromatic_valid()]
+        self.spaces, self.rgb_to_xyz, self.xyz_to_rgb = self._space_matrices(spaces)
+        self.index = {col.descriptor: space_id for space_id, col in enumerate(self.spaces)}
+        self.chromaticities = np.array([col.chromaticities for col in self.spaces]).reshape(-1, 4, 2)
+        self.observers = [_observer(col) for col in self.spaces]
+
+        white_keys = {}
+        self.white_ids = np.array([white_keys.setdefault((tuple(col.chromaticities[3]), observer), len(white_keys))
+                                   for col, observer in zip(self.spaces, self.observers)], dtype=np.intp)
+        self.whites = np.array([white for white, _ in white_keys]).reshape(-1, 2)
+        observer_ids = {}
+        self._white_observers = np.array([observer_ids.setdefault(observer, len(observer_ids)) for _, observer in white_keys],
+                                         dtype=np.intp)
+
+        self.adaptation = chromatic_adaptation_matrix(self.whites[:, None], self.whites[None, :], cone_response)
+        self.adaptation[self._white_observers[:, None] != self._white_observers[None, :]] = np.nan
+        self.adaptation[np.arange(len(self.whites)), np.arange(len(self.whites))] = np.identity(3)
+
+    @staticmethod
+    def _space_matrices(spaces:list) -> tuple:
+        """Returns the spaces with usable matrices, with their RGB to XYZ matrices and
+        inverses. All spaces are derived together unless one has degenerate primaries, an
+        unknown CIE version or a non finite matrix, which are then left out one by one so
+        they only break conversions involving themselves"""
+        chromaticities = np.array([col.chromaticities for col in spaces]).reshape(-1, 4, 2)
+        try:
+            with np.errstate(divide="ignore", invalid="ignore"):
+                rgb_to_xyz = rgb_to_xyz_matrices(chromaticities[:, :3], chromaticities[:, 3])
+                xyz_to_rgb = np.linalg.inv(rgb_to_xyz)
+            usable = np.isfinite(rgb_to_xyz).all() and np.isfinite(xyz_to_rgb).all()
+            for col in spaces:
+                _observer(col)
+        except (np.linalg.LinAlgError, ValueError):
+            usable = False
+        if usable:
+            return spaces, rgb_to_xyz, xyz_to_rgb
+
+        kept, matrices, inverses = [], [], []
+        for col in spaces:
+            try:
+                _observer(col)
+                with np.errstate(divide="ignore", invalid="ignore"):
+                    matrix = rgb_to_xyz_matrix(col.primaries, col.chromaticities[3])
+                    inverse = np.linalg.inv(matrix)
+            except (np.linalg.LinAlgError, ValueError):
+                continue
+            if np.isfinite(matrix).all() and np.isfinite(inverse).all():
+                kept.append(col)
+                matrices.append(matrix)
+                inverses.append(inverse)
+        return kept, np.array(matrices).reshape(-1, 3, 3), np.array(inverses).reshape(-1, 3, 3)
+
+    def space_id(self, col:colourimetry.Colourimetry) -> int:
+        """Returns the space id of col, or None if it is not in the table"""
+        space_id = self.index.get(col.descriptor)
+        if space_id is None or self.spaces[space_id] is not col:
+            return None
+        return space_id
+
+    def matrices(self, source_ids, destination_ids) -> np.ndarray:
+        """Returns the linear RGB to linear RGB matrices converting each source space id to
+        the matching destination space id. Raises a ValueError if a pair of spaces use
+        different CIE versions"""
+        source_ids = np.asarray(source_ids, dtype=np.intp)
+        destination_ids = np.asarray(destination_ids, dtype=np.intp)
+        source_whites = self.white_ids[source_ids]
+        destination_whites = self.white_ids[destination_ids]
+        mixed = self._white_observers[source_whites] != self._white_observers[destination_whites]
+        if np.any(mixed):
+            source_id, destination_id = (ids[mixed].ravel()[0] for ids in np.broadcast_arrays(source_ids, destination_ids))
+            raise ValueError("Cannot convert between %r and %r as they use different CIE versions"
+                             % (self.spaces[source_id].descriptor, self.spaces[destination_id].descriptor))
+
+        adaptation = self.adaptation[source_whites, destination_whites]
+        matrices = self.xyz_to_rgb[destination_ids] @ adaptation @ self.rgb_to_xyz[source_ids]
+
+        same = np.all(self.chromaticities[source_ids] == self.chromaticities[destination_ids], axis=(-2, -1))
+        matrices[same] = np.identity(3)
+        return matrices
+
+    def matrix(self, source_id:int, destination_id:int) -> np.ndarray:
+        """Returns the 3x3 matrix converting the source space id to the destination space id"""
+        return self.matrices(source_id, destination_id)
+
+    def __len__(self) -> int:
+        return len(self.spaces)
@@ -1,4 +1,6 @@
+import pickle
 import unittest
+import numpy as np
 from tcolour import colourimetry
 from tcolour import transfer_characteristic as TC
 
@@ -8,15 +10,66 @@ class TestColourimetry(unittest.TestCase):
         # Should be invalid as nothing is set
         self.assertFalse(col.colourspace_valid())
 
-        col.primaries.r = [0.64, 0.33]
-        col.primaries.g = [0.3, 0.6]
-        col.primaries.b = [0.15, 0.06]
+        col = col.replace(rgb_primaries=colourimetry.RGBPrimaries([0.64, 0.33], [0.3, 0.6], [0.15, 0.06]))
         # Should be invalid as it is missing achromatic and TC
         self.assertFalse(col.colourspace_valid())
 
-        col.achromatic = [0.3127, 0.329]
+        col = col.replace(achromatic=[0.3127, 0.329])
         # Should be invalid as still missing TC
         self.assertFalse(col.colourspace_valid())
 
-        col.transfer_characteristic = TC.TransferCharacteristicPower(parameters={'a': 2.2})
-        self.assertTrue(col.colourspace_valid())
\ No newline at end of file
+        col = col.replace(transfer_characteristic=TC.TransferCharacteristicPower(parameters={'a': 2.2}))
+        self.assertTrue(col.colourspace_valid())
+
+    def test_immutable(self):
+        col = colourimetry.Colourimetry(descriptor="Set", rgb_primaries=colourimetry.RGBPrimaries([0.64, 0.33], [0.3, 0.6], [0.15, 0.06]),
+                                        achromatic=[0.3127, 0.329], alias=["set2"])
+
+        self.assertRaises(AttributeError, setattr, col, "achromatic", [0.3, 0.3])
+        self.assertRaises(AttributeError, setattr, col.primaries, "reference", "Other")
+        self.assertRaises(AttributeError, setattr, col, "other", 1)
+        self.assertRaises(ValueError, col.chromaticities.__setitem__, 0, 0.0)
+        self.assertEqual(col.alias, ("set2",))
+
+        # Defaults are not shared between instances
+        self.assertIsNot(colourimetry.Colourimetry().transfer_characteristic, colourimetry.Colourimetry().transfer_characteristic)
+
+    def test_chromaticities(self):
+        col = colourimetry.Colourimetry(rgb_primaries=colourimetry.RGBPrimaries([0.64, 0.33], [0.3, 0.6], [0.15, 0.06]))
+        self.assertEqual(col.chromaticities.shape, (4, 2))
+        self.assertEqual(col.chromaticities.dtype, np.float64)
+        self.assertTrue(np.isnan(col.chromaticities[3]).all())
+        self.assertEqual(col.achromatic, [])
+        self.assertFalse(col.achromatic_valid())
+
+        # The primaries are a view of the shared array
+        self.assertTrue(np.shares_memory(col.primaries.xy, col.chromaticities))
+        self.assertEqual(col.primaries.g, [0.3, 0.6])
+
+        self.assertEqual(colourimetry.Colourimetry(achromatic="D65 White").achromatic, "D65 White")
+        self.assertRaises(ValueError, colourimetry.Colourimetry, achromatic=[0.3])
+
+    def test_hash(self):
+        primaries = colourimetry.RGBPrimaries([0.64, 0.33], [0.3, 0.6], [0.15, 0.06])
+        first = colourimetry.Colourimetry(descriptor="Set", rgb_primaries=primaries, achromatic=[0.3127, 0.329],
+                                          transfer_characteristic=TC.TransferCharacteristicPower({'a': 2.2}))
+        second = colourimetry.Colourimetry(descriptor="Set", rgb_primaries=colourimetry.RGBPrimaries([0.64, 0.33], [0.3, 0.6], [0.15, 0.06]),
+                                           achromatic=[0.3127, 0.329],
+                                           transfer_characteristic=TC.TransferCharacteristicPower({'a': 2.2}))
+
+        self.assertEqual(first, second)
+        self.assertEqual(hash(first), hash(second))
+        self.assertEqual(len({first, second}), 1)
+        self.assertNotEqual(first, first.replace(achromatic=[0.32168, 0.33767]))
+        self.assertEqual(hash(primaries), hash(colourimetry.RGBPrimaries([0.64, 0.33], [0.3, 0.6], [0.15, 0.06])))
+        self.assertNotEqual(primaries, colourimetry.RGBPrimaries(reference="BT.709 Primaries"))
+
+    def test_pickle(self):
+        col = colourimetry.Colourimetry(descriptor="Set", rgb_primaries=colourimetry.RGBPrimaries([0.64, 0.33], [0.3, 0.6], [0.15, 0.06]),
+                                        achromatic=[0.3127, 0.329], transfer_characteristic=TC.TransferCharacteristicPower({'a': 2.2}),
+                                        hints=["hint"], alias=["set2"])
+        copy = pickle.loads(pickle.dumps(col))
+
+        self.assertEqual(copy, col)
+        self.assertFalse(copy.chromaticities.flags.writeable)
+        self.assertTrue(np.shares_memory(copy.primaries.xy, copy.chromaticities))
@@ -0,0 +1,80 @@
+import unittest
+import warnings
+import numpy as np
+from tcolour import lut
+from tcolour import transfer_characteristic as TC
+
+class TestLUT1D(unittest.TestCase):
+    def setUp(self) -> None:
+        self.TCL = TC.TransferCharacteristicLog10WithBreak(parameters=
+                                                           {'a': 5.555556,
+                                                            'b': 0.052272,
+                                                            'c': 0.24719,
+                                                            'd': 0.385537,
+                                                            'e': 5.367655,
+                                                            'f': 0.092809,
+                                                            'h': 0.010591}
+                                                            )
+
+    def test_apply(self):
+        LUT = lut.LUT1D([0.0, 2.0, 6.0], domain=(-1.0, 1.0))
+
+        self.assertListEqual(LUT.apply([-2.0, -1.0, -0.5, 0.0, 0.5, 1.0, 2.0]), [0.0, 0.0, 1.0, 2.0, 4.0, 6.0, 6.0])
+        self.assertEqual(LUT.apply(0.25), 3.0)
+        self.assertIsNone(LUT.max_error)
+
+    def test_nan(self):
+        LUT = lut.LUT1D([0.0, 2.0, 6.0], domain=(-1.0, 1.0))
+        out = LUT.apply(np.array([np.nan, 0.5, np.inf]))
+
+        self.assertTrue(np.isnan(out[0]))
+        self.assertListEqual(out[1:].tolist(), [4.0, 6.0])
+
+        TCU = TC.TransferCharacteristicURI("file:tests/files/gamma_1D.spi1d")
+        self.assertTrue(np.isnan(TCU.forward_transfer(np.array([np.nan, 0.5]))[0]))
+        self.assertTrue(np.isnan(TCU.bake(256).apply([np.nan])[0]))
+
+    def test_bake_forward(self):
+        LUT = self.TCL.bake(size=4096, domain=(0.0, 30.0))
+        data = np.linspace(0.0, 30.0, 1000, dtype=np.float32).reshape(10, 100)
+
+        out = LUT.apply(data)
+
+        self.assertEqual(out.shape, data.shape)
+        self.assertEqual(out.dtype, np.float32)
+        self.assertLess(LUT.max_error, 1e-3)
+        np.testing.assert_allclose(out, self.TCL.forward_transfer(data), atol=LUT.max_error + 1e-6)
+
+    def test_bake_inverse(self):
+        LUT = self.TCL.bake(size=1024, forward=False)
+        data = np.linspace(0.0, 1.0, 777)
+
+        np.testing.assert_allclose(LUT.apply(data), self.TCL.inverse_transfer(data), atol=LUT.max_error)
+
+    def test_max_error_shrinks_with_size(self):
+        small = self.TCL.bake(size=64, forward=False)
+        large = self.TCL.bake(size=4096, forward=False)
+
+        self.assertLess(large.max_error, small.max_error)
+
+    def test_bake_half(self):
+        TCP = TC.TransferCharacteristicPowerWithBreak(parameters={"a": 1.055, "b": -0.055, "c": 12.92, "d": 0.0031308, "g": 2.4})
+        LUT = TCP.bake_half()
+        data = np.linspace(0.0, 1.0, 300, dtype=np.float16).reshape(100, 3)
+
+        out = LUT.apply(data)
+
+        self.assertEqual(out.dtype, np.float16)
+        self.assertEqual(out.shape, data.shape)
+        np.testing.assert_array_equal(out, TCP.forward_transfer(data))
+        self.assertLess(LUT.max_error, 1e-3)
+        self.assertRaises(TypeError, LUT.apply, data.astype(np.float32))
+
+        # Outputs past the float16 range become infinity without a warning
+        with warnings.catch_warnings():
+            warnings.simplefilter("error")
+            LUT = TC.TransferCharacteristicPower({"a": 2.2}).bake_half()
+        self.assertEqual(LUT.apply(np.array([65504.0], dtype=np.float16))[0], np.inf)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, TC.TransferCharacteristic().bake)
@@ -0,0 +1,71 @@
+import unittest
+import numpy as np
+from tcolour import lut
+
+class TestLUT3D(unittest.TestCase):
+    def setUp(self) -> None:
+        grid = np.stack(np.meshgrid(*[np.linspace(0.0, 1.0, 9)] * 3, indexing="ij"), axis=-1)
+        self.affine = np.array([[0.8, 0.1, 0.1], [0.2, 0.7, 0.1], [0.0, 0.3, 0.7]])
+        self.linear_table = grid @ self.affine.T + 0.05
+        self.random_table = np.random.default_rng(1).random((9, 9, 9, 3))
+        self.data = np.random.default_rng(2).random((6, 7, 3)).astype(np.float32)
+
+    def test_affine_exact(self):
+        for interpolation in ["tetrahedral", "trilinear"]:
+            LUT = lut.LUT3D(self.linear_table, interpolation=interpolation)
+            out = LUT.apply(self.data)
+
+            self.assertEqual(out.shape, self.data.shape)
+            self.assertEqual(out.dtype, np.float32)
+            np.testing.assert_allclose(out, self.data @ self.affine.T + 0.05, atol=1e-5)
+
+    def test_lattice_points(self):
+        points = np.array([[0.0, 0.0, 0.0], [0.125, 0.5, 1.0], [1.0, 0.25, 0.75]])
+        check = self.random_table[[0, 1, 8], [0, 4, 2], [0, 8, 6]]
+
+        for interpolation in ["tetrahedral", "trilinear"]:
+            LUT = lut.LUT3D(self.random_table, interpolation=interpolation)
+            np.testing.assert_allclose(LUT.apply(points), check, atol=1e-12)
+
+    def test_tetrahedral_weights(self):
+        # Inside the cell r > g > b the result only depends on the 000, 100, 110 and 111 vertices
+        table = np.zeros((2, 2, 2, 3))
+        table[1, 0, 0] = 1.0
+        table[1, 1, 0] = 2.0
+        table[1, 1, 1] = 4.0
+        table[0, 1, 0] = 100.0
+        LUT = lut.LUT3D(table)
+
+        out = LUT.apply([[0.6, 0.3, 0.1]])
+
+        np.testing.assert_allclose(out, [[0.3 * 1.0 + 0.2 * 2.0 + 0.1 * 4.0] * 3])
+
+    def test_clamped(self):
+        LUT = lut.LUT3D(self.linear_table)
+
+        np.testing.assert_allclose(LUT.apply([[-1.0, 2.0, 0.5]]), LUT.apply([[0.0, 1.0, 0.5]]))
+
+    def test_nan(self):
+        for interpolation in ["tetrahedral", "trilinear"]:
+            LUT = lut.LUT3D(self.linear_table, interpolation=interpolation)
+            out = LUT.apply(np.array([[np.nan, 0.5, 0.5], [0.5, 0.5, 0.5]], dtype=np.float32))
+
+            self.assertTrue(np.isnan(out[0]).all())
+            np.testing.assert_allclose(out[1], LUT.apply([0.5, 0.5, 0.5]), atol=1e-6)
+
+        LUT = lut.read_lut("tests/files/scale_3D.cube")
+        self.assertTrue(np.isnan(LUT.apply([[np.nan, np.nan, np.nan]])).all())
+
+    def test_read_formats(self):
+        data = np.array([[0.2, 0.4, 0.6], [1.0, 0.0, 0.5]])
+        check = np.array([[0.1, 0.6, 0.4], [0.5, 0.5, 0.0]])
+
+        for path in ["tests//files//scale_3D.cube", "tests//files//scale_3D.spi3d"]:
+            LUT = lut.read_lut(path)
+            self.assertIsInstance(LUT, lut.LUT3D)
+            np.testing.assert_allclose(LUT.apply(data), check, atol=1e-12)
+
+    def test_invalid(self):
+        self.assertRaises(ValueError, lut.LUT3D, np.zeros((2, 3, 2, 3)))
+        self.assertRaises(ValueError, lut.LUT3D, self.linear_table, interpolation="cubic")
+        self.assertRaises(ValueError, lut.LUT3D(self.linear_table).apply, [0.5, 0.5])
@@ -0,0 +1,102 @@
+import pickle
+import unittest
+import numpy as np
+from tcolour import transfer_characteristic as TC
+
+class TransferCharacteristicCubic(TC.TransferCharacteristic):
+    """A user defined characteristic with no inverse of its own"""
+
+    def forward_transfer(self, data):
+        x = TC._as_float_array(data)
+        return TC._restore_type(x ** 3 + 0.5 * x, data)
+
+    def valid(self) -> bool:
+        return True
+
+class TestNumericInverse(unittest.TestCase):
+    def setUp(self) -> None:
+        self.TCL = TC.TransferCharacteristicLog10WithBreak(parameters=
+                                                           {'a': 5.555556,
+                                                            'b': 0.052272,
+                                                            'c': 0.24719,
+                                                            'd': 0.385537,
+                                                            'e': 5.367655,
+                                                            'f': 0.092809,
+                                                            'h': 0.010591}
+                                                            )
+        self.TCPWB = TC.TransferCharacteristicPowerWithBreak(parameters={'a': 1.055, 'b': -0.055, 'c': 12.92, 'd': 0.0031308, 'g': 2.4})
+
+    def test_parametric(self):
+        data = np.random.default_rng(0).random((64, 64, 3))
+        for characteristic in (self.TCL, self.TCPWB):
+            encoded = characteristic.forward_transfer(data)
+            out = characteristic.numeric_inverse().apply(encoded)
+
+            self.assertEqual(out.shape, data.shape)
+            np.testing.assert_allclose(characteristic.forward_transfer(out), encoded, rtol=0, atol=1e-10)
+            np.testing.assert_allclose(out, characteristic.inverse_transfer(encoded), rtol=0, atol=1e-8)
+
+    def test_user_defined(self):
+        TCC = TransferCharacteristicCubic()
+        data = np.linspace(0.0, 1.0, 1001, dtype=np.float32)
+
+        out = TCC.inverse_transfer(TCC.forward_transfer(data))
+        self.assertEqual(out.dtype, np.float32)
+        np.testing.assert_allclose(out, data, atol=1e-6)
+        self.assertAlmostEqual(TCC.inverse_transfer(0.375), 0.5)
+        self.assertIs(TCC.numeric_inverse(), TCC.numeric_inverse())
+
+        # Values outside the table are refined to the same tolerance, and NaN passes through
+        targets = np.array([np.nan, -0.5, -0.2, 1.5, 2.0, 1e12])
+        out = np.array(TCC.inverse_transfer(targets))
+        self.assertTrue(np.isnan(out[0]))
+        np.testing.assert_allclose(TCC.forward_transfer(out[1:]), targets[1:], rtol=1e-12, atol=1e-10)
+        self.assertAlmostEqual(TCC.inverse_transfer(1.5), 1.0)
+
+        cube = TC.NumericInverse(TransferCharacteristicCubic(), domain=(0.0, 0.5))
+        self.assertAlmostEqual(cube.apply(2.0), TCC.inverse_transfer(2.0))
+
+    def test_decreasing(self):
+        inverse = TC.NumericInverse(self.TCPWB, domain=(1.0, 0.0), tolerance=1e-12)
+        data = np.linspace(0.0, 1.0, 101)
+
+        self.assertTrue(inverse.increasing)
+        np.testing.assert_allclose(inverse.apply(self.TCPWB.forward_transfer(data)), data, atol=1e-10)
+
+        flipped = TC.TransferCharacteristicPower({"a": 2.0})
+        flipped.forward_transfer = lambda x: 1.0 - np.asarray(x) ** 2
+        flipped.derivative = lambda x: -2.0 * np.asarray(x)
+        inverse = TC.NumericInverse(flipped)
+        self.assertFalse(inverse.increasing)
+        np.testing.assert_allclose(inverse.apply(1.0 - data ** 2), data, atol=1e-9)
+
+    def test_unreachable(self):
+        # A curve that saturates never reaches values beyond its limit
+        saturating = TC.TransferCharacteristicPower({"a": 1.0})
+        saturating.forward_transfer = lambda x: np.tanh(np.asarray(x))
+        saturating.derivative = lambda x: 1.0 - np.tanh(np.asarray(x)) ** 2
+        out = TC.NumericInverse(saturating, tolerance=1e-12).apply([0.9, -0.99, 1.5])
+
+        np.testing.assert_allclose(out[:2], np.arctanh([0.9, -0.99]), atol=1e-9)
+        self.assertTrue(np.isnan(out[2]))
+
+    def test_pickled_without_table(self):
+        TCC = TransferCharacteristicCubic()
+        size = len(pickle.dumps(TCC))
+        TCC.inverse_transfer(0.375)
+
+        self.assertEqual(len(pickle.dumps(TCC)), size)
+        self.assertAlmostEqual(pickle.loads(pickle.dumps(TCC)).inverse_transfer(0.375), 0.5)
+
+        TCU = TC.TransferCharacteristicURI("file:tests/files/gamma_1D.spi1d")
+        TCU.numeric_inverse()
+        self.assertNotIn("_numeric_inverses", pickle.loads(pickle.dumps(TCU)).__dict__)
+
+    def test_invalid(self):
+        parabola = TC.TransferCharacteristicPower({"a": 2.0})
+        self.assertRaises(ValueError, TC.NumericInverse, parabola, (-1.0, 1.0))
+        self.assertRaises(ValueError, TC.NumericInverse, TC.TransferCharacteristicPower({"a": -1.0}))
+        self.assertRaises(ValueError, TC.TransferCharacteristic().inverse_transfer, 0.5)
+
+if __name__ == '__main__':
+    unittest.main()
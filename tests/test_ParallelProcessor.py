@@ -0,0 +1,69 @@
+import pickle
+from concurrent.futures import ThreadPoolExecutor
+import unittest
+import numpy as np
+from tcolour import config
+from tcolour import parallel
+from tcolour import transfer_characteristic as TC
+
+class TestParallelProcessor(unittest.TestCase):
+    @classmethod
+    def setUpClass(cls) -> None:
+        cls.processes = parallel.ParallelProcessor(workers=2)
+        cls.threads = parallel.ParallelProcessor(workers=2, threads=True)
+
+    @classmethod
+    def tearDownClass(cls) -> None:
+        cls.processes.close()
+        cls.threads.close()
+
+    def setUp(self) -> None:
+        self.conf = config.Config()
+        self.conf.add_colourimetry("tests//files//tcolor_test.yaml")
+        self.transform = self.conf.build_transform("sRGB Presentation", "Display P3 Presentation")
+        self.logc = self.conf.get_colourimetry("Alexa LogC 800 EI SUP V3").transfer_characteristic
+        self.frame = np.random.default_rng(4).random((120, 50, 3)).astype(np.float32)
+
+    def test_processes(self):
+        out = self.processes.apply(self.transform, self.frame)
+
+        self.assertEqual(out.dtype, np.float32)
+        np.testing.assert_array_equal(out, self.transform.apply(self.frame))
+
+        # The pool and shared memory are reused for the next frame
+        out = self.processes.apply(self.logc, self.frame[:60], forward=False)
+        np.testing.assert_array_equal(out, self.logc.inverse_transfer(self.frame[:60]))
+
+    def test_shared_between_threads(self):
+        # Frames of different sizes from several threads each get their own results back
+        frames = [self.frame[:rows] for rows in (120, 30, 90, 60)]
+        with ThreadPoolExecutor(max_workers=4) as callers:
+            outs = list(callers.map(lambda frame: self.processes.apply(self.logc, frame), frames))
+
+        for frame, out in zip(frames, outs):
+            np.testing.assert_array_equal(out, self.logc.forward_transfer(frame))
+
+    def test_threads(self):
+        out = self.threads.apply(self.logc, self.frame)
+
+        np.testing.assert_array_equal(out, self.logc.forward_transfer(self.frame))
+
+    def test_small_frame(self):
+        out = self.processes.apply(self.logc, self.frame[:3])
+
+        np.testing.assert_array_equal(out, self.logc.forward_transfer(self.frame[:3]))
+
+    def test_integer_frame(self):
+        self.assertRaises(ValueError, self.threads.apply, self.logc, np.zeros((4, 3), dtype=np.uint8))
+
+    def test_uri_pickled_without_table(self):
+        TCU = TC.TransferCharacteristicURI("file:tests/files/gamma_1D.spi1d")
+        TCU.forward_transfer([0.5])
+
+        copy = pickle.loads(pickle.dumps(TCU))
+        self.assertIsNone(copy._lut)
+        self.assertIsNotNone(TCU._lut)
+
+        # The copy gets its own lock for its first read
+        self.assertIsNot(copy._lut_lock, TCU._lut_lock)
+        np.testing.assert_array_equal(copy.forward_transfer([0.5]), TCU.forward_transfer([0.5]))
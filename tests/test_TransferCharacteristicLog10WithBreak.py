@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 from tcolour import transfer_characteristic as TC
 
 class TestTransferCharacteristicLog10WithBreak(unittest.TestCase):
@@ -40,3 +41,25 @@ class TestTransferCharacteristicLog10WithBreak(unittest.TestCase):
         for id, idx in enumerate(inverse):
             self.assertAlmostEqual(data[id], idx, 13)
 
+    def test_array_transfer(self):
+        data = [0.0, 0.01, 0.1, 1.0, 10.0, 30.0]
+        image = np.array(data * 4, dtype=np.float64).reshape(2, 2, 6)
+        out = self.TCL.forward_transfer(image)
+
+        self.assertEqual(out.shape, image.shape)
+        self.assertEqual(out.dtype, np.float64)
+        np.testing.assert_allclose(out[1, 0], self.TCL.forward_transfer(data))
+        np.testing.assert_allclose(self.TCL.inverse_transfer(out), image, atol=1e-12)
+
+    def test_derivative(self):
+        forward = np.array([0.0, 0.01, 0.1, 1.0, 10.0])
+        inverse = np.array([0.05, 0.1, 0.15, 0.5, 0.9])
+
+        np.testing.assert_allclose(self.TCL.derivative(forward),
+                                   TC.TransferCharacteristic.derivative(self.TCL, forward), rtol=1e-5)
+        np.testing.assert_allclose(self.TCL.derivative(inverse, forward=False),
+                                   TC.TransferCharacteristic.derivative(self.TCL, inverse, forward=False), rtol=1e-5)
+
+    def test_coefficients(self):
+        self.assertAlmostEqual(self.TCL.coefficients.cut, 5.367655 * 0.010591 + 0.092809)
+        self.assertAlmostEqual(self.TCL.coefficients.inverse_a, 1.0 / 5.555556)
@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 from tcolour import transfer_characteristic as TC
 
 class TestTransferCharacteristicPower(unittest.TestCase):
@@ -22,3 +23,27 @@ class TestTransferCharacteristicPower(unittest.TestCase):
 
         self.assertListEqual(out, check)
 
+    def test_array_transfer(self):
+        data = np.linspace(0.0, 1.0, 24, dtype=np.float32).reshape(2, 4, 3)
+        out = self.TCP.forward_transfer(data)
+
+        self.assertEqual(out.shape, data.shape)
+        self.assertEqual(out.dtype, np.float32)
+        np.testing.assert_allclose(out, np.power(data, 2.2), rtol=1e-6)
+
+        inverse = self.TCP.inverse_transfer(out)
+        np.testing.assert_allclose(inverse, data, atol=1e-6)
+
+    def test_derivative(self):
+        forward = np.array([0.05, 0.1, 0.5, 1.0, 2.0])
+        inverse = np.array([0.05, 0.1, 0.5, 1.0, 2.0])
+
+        np.testing.assert_allclose(self.TCP.derivative(forward),
+                                   TC.TransferCharacteristic.derivative(self.TCP, forward), rtol=1e-5)
+        np.testing.assert_allclose(self.TCP.derivative(inverse, forward=False),
+                                   TC.TransferCharacteristic.derivative(self.TCP, inverse, forward=False), rtol=1e-5)
+
+    def test_coefficients(self):
+        self.assertEqual(self.TCP.coefficients.inverse_exponent, 1.0 / 2.2)
+        self.TCP.parameters = {'a': 2.4}
+        self.assertEqual(self.TCP.exponent(False), 1.0 / 2.4)
@@ -1,4 +1,5 @@
 import unittest
+import numpy as np
 from tcolour import transfer_characteristic as TC
 
 class TestTransferCharacteristicPowerWithBreak(unittest.TestCase):
@@ -19,4 +20,30 @@ class TestTransferCharacteristicPowerWithBreak(unittest.TestCase):
         forward = self.TCP.forward_transfer(data)
         inverse = self.TCP.inverse_transfer(forward)
 
-        self.assertListEqual(data, inverse)
\ No newline at end of file
+        self.assertListEqual(data, inverse)
+
+    def test_array_transfer(self):
+        data = [0.0, 0.001, 0.1, 0.5, 1.0]
+        check = self.TCP.forward_transfer(data)
+
+        for dtype in [np.float16, np.float32, np.float64]:
+            image = np.array([data, data, data], dtype=dtype).T.reshape(1, 5, 3)
+            out = self.TCP.forward_transfer(image)
+
+            self.assertEqual(out.shape, image.shape)
+            self.assertEqual(out.dtype, dtype)
+            np.testing.assert_allclose(out[0, :, 1], check, rtol=1e-3)
+            np.testing.assert_allclose(self.TCP.inverse_transfer(out), image, atol=2e-3)
+
+    def test_derivative(self):
+        forward = np.array([-0.1, 0.001, 0.003, 0.1, 0.5, 1.0])
+        inverse = np.array([-0.1, 0.01, 0.03, 0.1, 0.5, 1.0])
+
+        np.testing.assert_allclose(self.TCP.derivative(forward),
+                                   TC.TransferCharacteristic.derivative(self.TCP, forward), rtol=1e-5)
+        np.testing.assert_allclose(self.TCP.derivative(inverse, forward=False),
+                                   TC.TransferCharacteristic.derivative(self.TCP, inverse, forward=False), rtol=1e-5)
+
+    def test_coefficients(self):
+        self.assertAlmostEqual(self.TCP.coefficients.cut_off, 12.92 * 0.0031308)
+        self.assertRaises(AttributeError, setattr, self.TCP.coefficients, "a", 2.0)
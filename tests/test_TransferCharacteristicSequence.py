@@ -1,24 +1,69 @@
 import unittest
+import numpy as np
+from tcolour import config
 from tcolour import transfer_characteristic as TC
 
 class TestTransferCharacteristicSequence(unittest.TestCase):
     def setUp(self) -> None:
-        self.TCS = TC.TransferCharacteristicSequence(
-            [{'Descriptor': 'sRGB OETF', 'Direction': 'forward'},
-             {'Descriptor': 'sRGB EOTF', 'Direction': 'inverse'}]
-             )
+        self.conf = config.Config()
+        self.conf.add_colourimetry("tests//files//sRGB.yaml")
+
+        self.OETF = self.conf.get_colourimetry("sRGB OETF").transfer_characteristic
+        self.EOTF = self.conf.get_colourimetry("sRGB EOTF").transfer_characteristic
+
+    def test_resolved_from_config(self):
+        TCS = self.conf.get_colourimetry("sRGB Presentation").transfer_characteristic
+
+        self.assertTrue(TCS.valid())
+        self.assertEqual(TCS.steps, [(self.OETF, True), (self.EOTF, False)])
 
     def test_forward_transfer(self):
-        sequence = [{'Descriptor': 'sRGB OETF', 'Direction': 'forward'},
-                    {'Descriptor': 'sRGB EOTF', 'Direction': 'inverse'}
-                    ]
-        
-        self.assertListEqual(self.TCS.forward_transfer(), sequence)
+        TCS = self.conf.get_colourimetry("sRGB Presentation").transfer_characteristic
+        data = [0.0, 0.001, 0.1, 0.5, 1.0]
+
+        check = self.EOTF.inverse_transfer(self.OETF.forward_transfer(data))
+
+        self.assertListEqual(TCS.forward_transfer(data), check)
 
     def test_inverse_transfer(self):
-        sequence = [{'Descriptor': 'sRGB EOTF', 'Direction': 'inverse'},
-                    {'Descriptor': 'sRGB OETF', 'Direction': 'forward'}
-                    ]
-        
-        self.assertListEqual(self.TCS.inverse_transfer(), sequence)
-    
\ No newline at end of file
+        TCS = self.conf.get_colourimetry("sRGB Presentation").transfer_characteristic
+        data = np.linspace(0.0, 1.0, 30).reshape(10, 3)
+
+        inverse = TCS.inverse_transfer(TCS.forward_transfer(data))
+
+        np.testing.assert_allclose(inverse, data, atol=1e-12)
+
+    def test_unresolved(self):
+        TCS = TC.TransferCharacteristicSequence([{'Descriptor': 'sRGB OETF', 'Direction': 'forward'}])
+
+        self.assertFalse(TCS.valid())
+        self.assertRaises(Exception, TCS.forward_transfer, [0.5])
+
+    def test_cancelling_steps_removed(self):
+        TCS = TC.TransferCharacteristicSequence(
+            [{'Descriptor': 'sRGB EOTF', 'Direction': 'forward'},
+             {'Descriptor': 'sRGB OETF', 'Direction': 'forward'},
+             {'Descriptor': 'sRGB OETF', 'Direction': 'inverse'}]
+             )
+        TCS.resolve(self.conf)
+
+        self.assertEqual(TCS.steps, [(self.EOTF, True)])
+
+    def test_power_steps_merged(self):
+        TCS = TC.TransferCharacteristicSequence(
+            [{'Descriptor': 'sRGB EOTF', 'Direction': 'forward'},
+             {'Descriptor': 'sRGB EOTF', 'Direction': 'forward'}]
+             )
+        TCS.resolve(self.conf)
+
+        self.assertEqual(len(TCS.steps), 1)
+        self.assertAlmostEqual(TCS.steps[0][0].exponent(TCS.steps[0][1]), 2.2 * 2.2)
+
+    def test_nested_sequence(self):
+        TCS = TC.TransferCharacteristicSequence(
+            [{'Descriptor': 'sRGB Presentation', 'Direction': 'inverse'},
+             {'Descriptor': 'sRGB OETF', 'Direction': 'inverse'}]
+             )
+        TCS.resolve(self.conf)
+
+        self.assertEqual(TCS.steps, [(self.EOTF, True), (self.OETF, False), (self.OETF, False)])
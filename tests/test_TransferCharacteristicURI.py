@@ -0,0 +1,67 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from tcolour import config
+from tcolour import lut
+from tcolour import transfer_characteristic as TC
+
+class TestTransferCharacteristicURI(unittest.TestCase):
+    def test_lazy_load(self):
+        TCU = TC.TransferCharacteristicURI("file:tests/files/missing.spi1d")
+
+        self.assertTrue(TCU.valid())
+        self.assertRaises(FileNotFoundError, TCU.forward_transfer, [0.5])
+
+    def test_spi1d(self):
+        TCU = TC.TransferCharacteristicURI("file:tests/files/gamma_1D.spi1d")
+        data = np.array([0.0, 0.25, 0.375, 1.0])
+
+        out = TCU.forward_transfer(data)
+
+        np.testing.assert_allclose(out, [0.0, 0.0625, 0.15625, 1.0])
+        np.testing.assert_allclose(TCU.inverse_transfer(out), data, atol=1e-3)
+
+    def test_cube_1D(self):
+        TCU = TC.TransferCharacteristicURI("file:tests/files/scale_1D.cube")
+
+        out = TCU.forward_transfer([[0.5, 0.5, 0.5], [1.0, 0.2, 0.0]])
+
+        np.testing.assert_allclose(out, [[0.25, 0.5, 0.5], [0.5, 0.2, 0.0]])
+        np.testing.assert_allclose(TCU.inverse_transfer(out), [[0.5, 0.5, 0.5], [1.0, 0.2, 0.0]], atol=1e-9)
+
+    def test_cube_3D(self):
+        TCU = TC.TransferCharacteristicURI("file:tests/files/scale_3D.cube")
+        image = np.full((4, 4, 3), 0.5, dtype=np.float32)
+
+        out = TCU.forward_transfer(image)
+
+        self.assertEqual(out.dtype, np.float32)
+        np.testing.assert_allclose(out[..., 0], 0.25)
+        self.assertRaises(ValueError, TCU.inverse_transfer, image)
+
+    def test_binary_memory_mapped(self):
+        grid = np.stack(np.meshgrid(*[np.linspace(0.0, 1.0, 5)] * 3, indexing="ij"), axis=-1)
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "table.npy")
+            lut.write_binary(path, lut.LUT3D(np.sqrt(grid).astype(np.float32)))
+
+            TCU = TC.TransferCharacteristicURI("file://" + path)
+            out = TCU.forward_transfer([[0.25, 0.5, 1.0]])
+
+            self.assertIsInstance(TCU.lut.table, np.memmap)
+            np.testing.assert_allclose(out, [[0.5, np.sqrt(0.5), 1.0]], atol=1e-6)
+            del TCU
+
+    def test_from_config(self):
+        conf = config.Config()
+        conf.add_colourimetry("""
+- Gamma LUT:
+    Transfer Characteristic:
+        - Type: URI
+        - URI: file:tests/files/gamma_1D.spi1d
+        """)
+
+        TCU = conf.get_colourimetry("Gamma LUT").transfer_characteristic
+        self.assertIsNone(TCU._lut)
+        self.assertAlmostEqual(TCU.forward_transfer([0.5])[0], 0.25)
@@ -0,0 +1,147 @@
+import unittest
+import numpy as np
+from tcolour import config
+from tcolour import colourimetry
+from tcolour import transform
+
+class TestTransform(unittest.TestCase):
+    def setUp(self) -> None:
+        self.conf = config.Config()
+        self.conf.add_colourimetry("tests//files//tcolor_test.yaml")
+
+    def test_rgb_to_xyz_matrix(self):
+        primaries = colourimetry.RGBPrimaries([0.64, 0.33], [0.3, 0.6], [0.15, 0.06])
+        matrix = transform.rgb_to_xyz_matrix(primaries, [0.3127, 0.3290])
+
+        check = [[0.4123908, 0.3575843, 0.1804808],
+                 [0.2126390, 0.7151687, 0.0721923],
+                 [0.0193308, 0.1191948, 0.9505322]]
+
+        np.testing.assert_allclose(matrix, check, atol=1e-6)
+
+    def test_chromatic_adaptation_matrix(self):
+        matrix = transform.chromatic_adaptation_matrix([0.3127, 0.3290], [0.32168, 0.33767])
+
+        np.testing.assert_allclose(matrix @ transform.xy_to_XYZ([0.3127, 0.3290]),
+                                   transform.xy_to_XYZ([0.32168, 0.33767]))
+
+    def test_identity(self):
+        TF = self.conf.build_transform("sRGB Presentation", "sRGB")
+        data = np.linspace(0.0, 1.0, 30).reshape(10, 3)
+
+        np.testing.assert_allclose(TF.matrix, np.identity(3), atol=1e-12)
+        np.testing.assert_allclose(TF.apply(data), data, atol=1e-12)
+
+    def test_apply(self):
+        TF = self.conf.build_transform("sRGB Presentation", "Display P3 Presentation")
+        source = self.conf.get_colourimetry("sRGB Presentation").transfer_characteristic
+        destination = self.conf.get_colourimetry("Display P3 Presentation").transfer_characteristic
+        image = np.random.default_rng(0).random((4, 5, 3)).astype(np.float32)
+
+        out = TF.apply(image)
+        check = destination.forward_transfer(source.inverse_transfer(image.astype(np.float64)) @ TF.matrix.T)
+
+        self.assertEqual(out.shape, image.shape)
+        self.assertEqual(out.dtype, np.float32)
+        np.testing.assert_allclose(out, check, atol=1e-5)
+
+        # White is preserved between spaces sharing an achromatic centroid
+        np.testing.assert_allclose(TF.apply([[1.0, 1.0, 1.0]]), [[1.0, 1.0, 1.0]], atol=1e-12)
+
+    def test_incomplete_colourimetry(self):
+        self.assertRaises(ValueError, self.conf.build_transform, "sRGB Presentation", "sRGB OETF")
+
+    def test_config_matrix_table(self):
+        table = self.conf.matrix_table()
+        self.assertIs(self.conf.matrix_table(), table)
+        self.assertListEqual(sorted(table.index), ["Display P3 Presentation", "sRGB Presentation"])
+
+        TF = self.conf.build_transform("sRGB Presentation", "Display P3 Presentation")
+        check = transform.Transform(TF.source, TF.destination)
+        np.testing.assert_allclose(TF.matrix, check.matrix, atol=1e-12)
+
+        # Changing the config rebuilds the table with the new chunks
+        self.conf.add_colourimetry("- Linear P3:\n    RGB Primaries: DCI-P3 Primaries\n    Achromatic Centroid: D65 White\n")
+        self.assertIn("Linear P3", self.conf.matrix_table().index)
+
+        self.assertRaises(ValueError, config.Config, chromatic_adaptation="XYZ Scaling")
+
+    def test_cie_version_from_yaml(self):
+        self.conf.add_colourimetry("""
+- Linear 709 1931:
+    RGB Primaries: BT.709 Primaries
+    Achromatic Centroid: D65 White
+    CIE Version: CIE_1931_2_DEGREE
+- Linear 709 2015:
+    RGB Primaries: BT.709 Primaries
+    Achromatic Centroid: D65 White
+    CIE Version: CIE_2015_2_DEGREE
+        """)
+
+        # An explicit 1931 observer matches chunks without a CIE Version
+        TF = self.conf.build_transform("Linear 709 1931", "Display P3 Presentation")
+        np.testing.assert_allclose(TF.matrix, self.conf.build_transform("sRGB", "Display P3 Presentation").matrix)
+        # The 2015 chunk has the same chromaticities but must not share the cached 1931 transform
+        self.assertRaises(ValueError, self.conf.build_transform, "Linear 709 2015", "Display P3 Presentation")
+        self.assertRaises(ValueError, colourimetry.cie_observer, "CIE_1964_10_DEGREE")
+
+class TestMatrixTable(unittest.TestCase):
+    def setUp(self) -> None:
+        primaries = colourimetry.RGBPrimaries([0.64, 0.33], [0.3, 0.6], [0.15, 0.06])
+        p3 = colourimetry.RGBPrimaries([0.68, 0.32], [0.265, 0.69], [0.15, 0.06])
+        self.spaces = [colourimetry.Colourimetry(descriptor="709 D65", rgb_primaries=primaries, achromatic=[0.3127, 0.3290]),
+                       colourimetry.Colourimetry(descriptor="P3 D65", rgb_primaries=p3, achromatic=[0.3127, 0.3290]),
+                       colourimetry.Colourimetry(descriptor="709 D60", rgb_primaries=primaries, achromatic=[0.32168, 0.33767]),
+                       colourimetry.Colourimetry(descriptor="709 D65 2015", rgb_primaries=primaries, achromatic=[0.3127, 0.3290],
+                                                 cie_version=colourimetry.CIEVersion.CIE_2015_2_DEGREE),
+                       colourimetry.Colourimetry(descriptor="Unresolved", rgb_primaries=colourimetry.RGBPrimaries(reference="Missing"))]
+        self.table = transform.MatrixTable(self.spaces)
+
+    def test_table(self):
+        self.assertEqual(len(self.table), 4)
+        self.assertEqual(self.table.index["709 D60"], 2)
+        self.assertIsNone(self.table.space_id(self.spaces[4]))
+        self.assertIsNone(self.table.space_id(self.spaces[0].replace(hints=("Copy",))))
+
+        # The same white is a different white for each CIE version
+        self.assertListEqual(self.table.white_ids.tolist(), [0, 0, 1, 2])
+        self.assertEqual(self.table.adaptation.shape, (3, 3, 3, 3))
+        self.assertTrue(np.isnan(self.table.adaptation[0, 2]).all())
+
+    def test_matrices(self):
+        for source in range(3):
+            for destination in range(3):
+                check = transform.Transform(self.spaces[source], self.spaces[destination]).matrix
+                np.testing.assert_allclose(self.table.matrix(source, destination), check, atol=1e-12)
+
+        matrices = self.table.matrices([0, 1, 2], [1, 2, 2])
+        self.assertEqual(matrices.shape, (3, 3, 3))
+        np.testing.assert_array_equal(matrices[2], np.identity(3))
+
+        self.assertRaises(ValueError, self.table.matrix, 0, 3)
+        self.assertRaises(ValueError, transform.Transform, self.spaces[0], self.spaces[3])
+
+    def test_degenerate(self):
+        coincident = colourimetry.RGBPrimaries([0.64, 0.33], [0.64, 0.33], [0.15, 0.06])
+        spaces = self.spaces + [colourimetry.Colourimetry(descriptor="Coincident", rgb_primaries=coincident,
+                                                          achromatic=[0.3127, 0.3290])]
+        table = transform.MatrixTable(spaces)
+
+        # Only the degenerate space is left out, the others keep their matrices
+        self.assertEqual(len(table), 4)
+        self.assertNotIn("Coincident", table.index)
+        np.testing.assert_allclose(table.matrix(0, 1), self.table.matrix(0, 1))
+
+        conf = config.Config()
+        conf.add_colourimetry("tests//files//tcolor_test.yaml")
+        conf.add_colourimetry(spaces[-1])
+        conf.build_transform("sRGB Presentation", "Display P3 Presentation")
+        self.assertRaises(np.linalg.LinAlgError, conf.build_transform, "Coincident", "sRGB Presentation")
+
+    def test_cat02(self):
+        table = transform.MatrixTable(self.spaces, transform.CAT02)
+        check = transform.Transform(self.spaces[0], self.spaces[2], cone_response=transform.CAT02).matrix
+
+        np.testing.assert_allclose(table.matrix(0, 2), check, atol=1e-12)
+        self.assertFalse(np.allclose(table.matrix(0, 2), self.table.matrix(0, 2), atol=1e-6))
+        np.testing.assert_allclose(table.matrix(0, 1), self.table.matrix(0, 1), atol=1e-12)
@@ -0,0 +1,94 @@
+import asyncio
+import threading
+import unittest
+import numpy as np
+from tcolour import asynchronous
+from tcolour import config
+from tcolour import transfer_characteristic as TC
+
+class TestAsynchronous(unittest.TestCase):
+    def test_run(self):
+        calls = []
+        release = threading.Event()
+
+        def work(value):
+            calls.append(value)
+            release.wait(5)
+            return value * 2
+
+        async def main():
+            shared = [asyncio.ensure_future(asynchronous.run(work, 1, key="same")) for _ in range(5)]
+            other = asyncio.ensure_future(asynchronous.run(work, 2, key="other"))
+            await asyncio.sleep(0.05)
+            self.assertEqual(asynchronous.in_flight(), 2)
+
+            # Cancelling one caller leaves the shared call running for the others
+            shared[0].cancel()
+            release.set()
+            results = await asyncio.gather(*shared[1:], other)
+            self.assertEqual(asynchronous.in_flight(), 0)
+            return results
+
+        self.assertListEqual(asyncio.run(main()), [2, 2, 2, 2, 4])
+        self.assertListEqual(sorted(calls), [1, 2])
+
+    def test_errors(self):
+        async def main():
+            return await asyncio.gather(asynchronous.run(int, "x", key="int"), asynchronous.run(int, "x", key="int"),
+                                        return_exceptions=True)
+
+        results = asyncio.run(main())
+        self.assertIsInstance(results[0], ValueError)
+        self.assertIs(results[0], results[1])
+
+    def test_config(self):
+        conf = config.Config()
+
+        async def main():
+            await asyncio.gather(*[conf.aadd_colourimetry("tests//files//sRGB.yaml") for _ in range(4)])
+            TF = conf.build_transform("sRGB Presentation", "sRGB Presentation")
+            image = np.random.default_rng(0).random((16, 16, 3))
+            results = await asyncio.gather(TF.aapply(image, key="frame 1"), TF.aapply(image, key="frame 1"),
+                                           TF.aapply(image))
+            return image, TF, results
+
+        image, TF, results = asyncio.run(main())
+        self.assertListEqual(list(conf.sources), ["tests//files//sRGB.yaml"])
+        for out in results:
+            np.testing.assert_allclose(out, TF.apply(image))
+
+        # Callers sharing a conversion each get their own array
+        self.assertIsNot(results[0], results[1])
+        results[0][...] = 0.0
+        np.testing.assert_allclose(results[1], TF.apply(image))
+
+    def test_independent_results(self):
+        shared = np.arange(4.0)
+
+        async def caller(value):
+            out = await asynchronous.run(lambda: shared, key="array")
+            # Write before yielding to the event loop, as a caller resumes ahead of the others
+            out[...] = value
+            await asyncio.sleep(0)
+            return out
+
+        async def main():
+            return await asyncio.gather(caller(-99.0), caller(1.0))
+
+        results = asyncio.run(main())
+        np.testing.assert_array_equal(results[0], -99.0)
+        np.testing.assert_array_equal(results[1], 1.0)
+        np.testing.assert_array_equal(shared, np.arange(4.0))
+
+    def test_lut_concurrent(self):
+        TCU = TC.TransferCharacteristicURI("file:tests/files/gamma_1D.spi1d")
+        data = np.linspace(0.0, 1.0, 64)
+
+        async def main():
+            return await asyncio.gather(*[asynchronous.run(TCU.forward_transfer, data) for _ in range(8)])
+
+        for out in asyncio.run(main()):
+            np.testing.assert_array_equal(out, TCU.forward_transfer(data))
+
+if __name__ == '__main__':
+    unittest.main()
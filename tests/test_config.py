@@ -1,4 +1,10 @@
+import json
+import os
+import shutil
+import tempfile
+import threading
 import unittest
+import numpy as np
 from tcolour import config
 from tcolour import transfer_characteristic as tc
 from tcolour import colourimetry
@@ -31,16 +37,11 @@ class TestConfig(unittest.TestCase):
         self.assertEqual(colourimetry.cie_version, "CIE_1931_2_DEGREE")
 
     def test_add_complete_colourimetry_from_object(self):
-        col = colourimetry.Colourimetry()
-        col.descriptor = "Set"
-        col.primaries.r = [0.640, 0.330]
-        col.primaries.g = [0.3, 0.6]
-        col.primaries.b = [0.15, 0.06]
-        col.achromatic = [0.3127, 0.3290]
-        col.transfer_characteristic = tc.TransferCharacteristicPower(parameters={"a": 2.5})
-        col.hints = ["hint"]
-        col.alias = ["set2"]
-        col.cie_version = "CIE_1931_2_DEGREE"
+        col = colourimetry.Colourimetry(descriptor="Set",
+                                        rgb_primaries=colourimetry.RGBPrimaries([0.640, 0.330], [0.3, 0.6], [0.15, 0.06]),
+                                        achromatic=[0.3127, 0.3290],
+                                        transfer_characteristic=tc.TransferCharacteristicPower(parameters={"a": 2.5}),
+                                        hints=["hint"], alias=["set2"], cie_version="CIE_1931_2_DEGREE")
 
         self.conf.add_colourimetry(col)
 
@@ -106,3 +107,543 @@ class TestConfig(unittest.TestCase):
         self.assertEqual(colourimetry.alias[0], "sRGB")
 
         self.assertEqual(colourimetry.cie_version, "CIE_1931_2_DEGREE")
+
+class TestConfigTransformCache(unittest.TestCase):
+    def setUp(self) -> None:
+        self.conf = config.Config(transform_cache_size=2)
+        self.conf.add_colourimetry("tests//files//tcolor_test.yaml")
+
+    def test_cache_hit(self):
+        transform = self.conf.build_transform("sRGB Presentation", "Display P3 Presentation")
+
+        self.assertIs(self.conf.build_transform("sRGB Presentation", "Display P3 Presentation"), transform)
+        self.assertIs(self.conf.build_transform("IEC sRGB", "Display P3 Presentation"), transform)
+
+    def test_shared_content(self):
+        self.conf.add_colourimetry("""
+- sRGB Copy:
+    RGB Primaries: BT.709 Primaries
+    Achromatic Centroid: D65 White
+    Transfer Characteristic:
+        - Type: Sequence
+        - Sequence:
+            - { Descriptor: sRGB OETF, Direction: forward }
+            - { Descriptor: sRGB EOTF, Direction: inverse }
+        """)
+        transform = self.conf.build_transform("sRGB Presentation", "Display P3 Presentation")
+
+        self.assertIs(self.conf.build_transform("sRGB Copy", "Display P3 Presentation"), transform)
+
+    def test_lru_eviction(self):
+        first = self.conf.build_transform("sRGB Presentation", "Display P3 Presentation")
+        second = self.conf.build_transform("Display P3 Presentation", "sRGB Presentation")
+        self.conf.build_transform("sRGB Presentation", "Display P3 Presentation")
+        self.conf.build_transform("sRGB Presentation", "sRGB Presentation")
+
+        self.assertIs(self.conf.build_transform("sRGB Presentation", "Display P3 Presentation"), first)
+        self.assertIsNot(self.conf.build_transform("Display P3 Presentation", "sRGB Presentation"), second)
+
+    def test_invalidation(self):
+        kept = self.conf.build_transform("sRGB Presentation", "sRGB Presentation")
+        dropped = self.conf.build_transform("sRGB Presentation", "Display P3 Presentation")
+
+        display_p3 = self.conf.get_colourimetry("Display P3 Presentation")
+        self.conf.config["Display P3 Presentation"] = display_p3.replace(achromatic=[0.32168, 0.33767])
+        self.conf.add_colourimetry("tests//files//sRGB_EOTF.yaml")
+
+        self.assertIs(self.conf.build_transform("sRGB Presentation", "sRGB Presentation"), kept)
+        self.assertIsNot(self.conf.build_transform("sRGB Presentation", "Display P3 Presentation"), dropped)
+
+class TestConfigAliases(unittest.TestCase):
+    def setUp(self) -> None:
+        self.conf = config.Config()
+        self.conf.add_colourimetry("tests//files//tcolor_test.yaml")
+
+    def test_alias_lookup(self):
+        col = self.conf.get_colourimetry("sRGB Presentation")
+
+        self.assertIs(self.conf.get_colourimetry("sRGB"), col)
+        self.assertIs(self.conf.get_colourimetry("Internal_srgb_v2.0"), col)
+        self.assertRaises(KeyError, self.conf.get_colourimetry, "srgb")
+
+    def test_alias_from_object(self):
+        col = colourimetry.Colourimetry(descriptor="Set", alias=["set2"])
+        self.conf.add_colourimetry(col)
+        self.conf.add_colourimetry(colourimetry.Colourimetry(descriptor="Set", alias=["set3"]))
+
+        merged = self.conf.get_colourimetry("Set")
+        self.assertEqual(merged.alias, ("set2", "set3"))
+        self.assertIs(self.conf.get_colourimetry("set2"), merged)
+        self.assertIs(self.conf.get_colourimetry("set3"), merged)
+        self.assertEqual(col.alias, ("set2",))
+
+    def test_alias_collision(self):
+        self.conf.add_colourimetry("""
+- Display P3 Presentation:
+    Alias:
+        - sRGB
+        """)
+
+        self.assertEqual(self.conf.alias_collisions["sRGB"], {"sRGB Presentation", "Display P3 Presentation"})
+        self.assertRaises(KeyError, self.conf.get_colourimetry, "sRGB")
+        self.assertEqual(self.conf.get_colourimetry("IEC sRGB").descriptor, "sRGB Presentation")
+
+    def test_alias_descriptor_collision(self):
+        self.conf.add_colourimetry(colourimetry.Colourimetry(descriptor="IEC sRGB"))
+
+        self.assertIn("IEC sRGB", self.conf.alias_collisions)
+        self.assertEqual(self.conf.get_colourimetry("IEC sRGB").descriptor, "IEC sRGB")
+
+    def test_normalised_lookup(self):
+        self.conf.normalise_lookups = True
+
+        self.assertEqual(self.conf.get_colourimetry("iec  SRGB").descriptor, "sRGB Presentation")
+        self.assertEqual(self.conf.get_colourimetry(" display p3 presentation").descriptor, "Display P3 Presentation")
+
+        self.conf.add_colourimetry(colourimetry.Colourimetry(descriptor="SRGB PRESENTATION"))
+        self.assertRaises(KeyError, self.conf.get_colourimetry, "srgb presentation")
+
+class TestConfigReferences(unittest.TestCase):
+    def setUp(self) -> None:
+        self.conf = config.Config()
+
+    def test_reference_chain(self):
+        self.conf.add_colourimetry("""
+- Chain 3:
+    RGB Primaries: Chain 2
+    Achromatic Centroid: Chain 2
+    Transfer Characteristic: Chain 2
+- Chain 2:
+    RGB Primaries: Chain 1
+    Achromatic Centroid: Chain 1
+    Transfer Characteristic: Chain 1
+- Chain 1:
+    RGB Primaries: BT.709 Primaries
+    Achromatic Centroid: D65 White
+    Transfer Characteristic: sRGB EOTF
+        """)
+        self.conf.add_colourimetry("tests//files//sRGB.yaml")
+
+        col = self.conf.get_colourimetry("Chain 3")
+
+        self.assertTrue(col.colourspace_valid())
+        self.assertEqual(col.primaries.r, [0.640, 0.330])
+        self.assertEqual(col.achromatic, [0.3127, 0.3290])
+        self.assertEqual(col.transfer_characteristic.steps,
+                         [(self.conf.get_colourimetry("sRGB EOTF").transfer_characteristic, True)])
+
+    def test_incremental_files(self):
+        self.conf.add_colourimetry("""
+- sRGB Presentation:
+    RGB Primaries: BT.709 Primaries
+    Achromatic Centroid: D65 White
+    Transfer Characteristic:
+        - Type: Sequence
+        - Sequence:
+            - { Descriptor: sRGB OETF, Direction: forward }
+            - { Descriptor: sRGB EOTF, Direction: inverse }
+    Alias:
+        - sRGB
+        """)
+        self.assertFalse(self.conf.get_colourimetry("sRGB").colourspace_valid())
+
+        self.conf.add_colourimetry("tests//files//sRGB_OETF.yaml")
+        self.conf.add_colourimetry("tests//files//sRGB_EOTF.yaml")
+        self.assertFalse(self.conf.get_colourimetry("sRGB").colourspace_valid())
+        self.assertTrue(self.conf.get_colourimetry("sRGB").transfer_characteristic.valid())
+
+        self.conf.add_colourimetry("""
+- Rec 709:
+    RGB Primaries: {
+        Red: {x: 0.640, y: 0.330},
+        Green: {x: 0.300, y: 0.600},
+        Blue: {x: 0.150, y: 0.060}
+    }
+    Achromatic Centroid: {x: 0.3127, y: 0.3290}
+    Alias:
+        - BT.709 Primaries
+        - D65 White
+        """)
+        self.assertTrue(self.conf.get_colourimetry("sRGB").colourspace_valid())
+        self.assertEqual(self.conf._unresolved, set())
+
+    def test_reference_cycle(self):
+        with self.assertRaises(ValueError) as context:
+            self.conf.add_colourimetry("""
+- A:
+    RGB Primaries: B
+- B:
+    Achromatic Centroid: C
+- C:
+    Transfer Characteristic: A
+            """)
+
+        self.assertIn("A -> B -> C -> A", str(context.exception))
+
+        # The cycle does not stop later chunks from loading and resolving
+        self.conf.add_colourimetry("tests//files//sRGB.yaml")
+        self.assertTrue(self.conf.get_colourimetry("sRGB Presentation").colourspace_valid())
+        self.assertIn("A", self.conf.config)
+
+class TestConfigBulkLoading(unittest.TestCase):
+    def test_add_many(self):
+        conf = config.Config()
+        conf.add_many(["tests//files//sRGB_OETF.yaml", "tests//files//sRGB_EOTF.yaml", "tests//files//sRGB.yaml"])
+
+        col = conf.get_colourimetry("sRGB Presentation")
+        self.assertTrue(col.colourspace_valid())
+        self.assertListEqual(list(conf.config.keys())[:2], ["sRGB OETF", "sRGB EOTF"])
+
+    def test_add_many_processes(self):
+        conf = config.Config()
+        conf.add_many(["tests//files//tcolor_test.yaml"], max_workers=2, processes=True)
+
+        self.assertTrue(conf.get_colourimetry("IEC sRGB").colourspace_valid())
+
+    def test_add_directory(self):
+        conf = config.Config()
+        conf.add_directory("tests//files")
+
+        self.assertIn("Complete bogus set", conf.config)
+        self.assertTrue(conf.get_colourimetry("Display P3 Presentation").colourspace_valid())
+
+    def test_unreadable_file_skipped(self):
+        conf = config.Config()
+        conf.add_many(["tests//files//missing.yaml", "tests//files//sRGB.yaml"])
+
+        self.assertTrue(conf.get_colourimetry("sRGB Presentation").colourspace_valid())
+
+class TestConfigSnapshot(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.directory.name, "tcolor_test.yaml")
+        shutil.copy("tests//files//tcolor_test.yaml", self.source)
+        self.snapshot = os.path.join(self.directory.name, "snapshot.json")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def test_round_trip(self):
+        conf = config.Config()
+        conf.add_colourimetry(self.source)
+        conf.add_colourimetry(colourimetry.Colourimetry(descriptor="Waiting", achromatic="Missing White"))
+        conf.save_snapshot(self.snapshot)
+
+        loaded = config.Config.load_snapshot(self.snapshot)
+
+        self.assertListEqual(list(loaded.config.keys()), list(conf.config.keys()))
+        for descriptor, col in conf.config.items():
+            self.assertEqual(repr(loaded.config[descriptor]), repr(col))
+        self.assertTrue(loaded.get_colourimetry("IEC sRGB").colourspace_valid())
+        self.assertEqual(loaded.sources, conf.sources)
+
+        data = np.linspace(0.0, 1.0, 12).reshape(4, 3)
+        np.testing.assert_array_equal(loaded.build_transform("sRGB", "Display P3 Presentation").apply(data),
+                                      conf.build_transform("sRGB", "Display P3 Presentation").apply(data))
+
+        loaded.add_colourimetry("""
+- Missing White:
+    Achromatic Centroid: {x: 0.3127, y: 0.3290}
+        """)
+        self.assertEqual(loaded.get_colourimetry("Waiting").achromatic, [0.3127, 0.3290])
+
+    def test_enum_cie_version(self):
+        conf = config.Config()
+        conf.add_colourimetry(self.source)
+        srgb = conf.get_colourimetry("sRGB Presentation")
+        conf.add_colourimetry(srgb.replace(descriptor="sRGB 2015", cie_version=colourimetry.CIEVersion.CIE_2015_2_DEGREE))
+        conf.add_colourimetry(srgb.replace(descriptor="sRGB 1931", cie_version=colourimetry.CIEVersion.CIE_1931_2_DEGREE))
+        conf.save_snapshot(self.snapshot)
+
+        loaded = config.Config.load_snapshot(self.snapshot)
+        self.assertEqual(loaded.get_colourimetry("sRGB 2015").cie_version, "CIE_2015_2_DEGREE")
+        for descriptor in ("sRGB 2015", "sRGB 1931", "sRGB Presentation"):
+            self.assertEqual(loaded.get_colourimetry(descriptor).content_key(), conf.get_colourimetry(descriptor).content_key())
+        self.assertRaises(ValueError, loaded.build_transform, "sRGB 2015", "sRGB 1931")
+
+    def test_stale_source(self):
+        conf = config.Config()
+        conf.add_colourimetry(self.source)
+        conf.save_snapshot(self.snapshot)
+
+        with open(self.source, 'a') as file:
+            file.write("\n- New White:\n    Achromatic Centroid: {x: 0.32, y: 0.33}\n")
+
+        self.assertRaises(ValueError, config.Config.load_snapshot, self.snapshot)
+        self.assertIsInstance(config.Config.load_snapshot(self.snapshot, check_sources=False), config.Config)
+
+    def test_from_files(self):
+        conf = config.Config.from_files([self.source], self.snapshot)
+        self.assertTrue(os.path.isfile(self.snapshot))
+
+        with open(self.snapshot, 'r') as file:
+            snapshot = json.load(file)
+        snapshot["Chunks"][0]["Hints"] = ["From snapshot"]
+        with open(self.snapshot, 'w') as file:
+            json.dump(snapshot, file)
+
+        cached = config.Config.from_files([self.source], self.snapshot)
+        self.assertEqual(cached.get_colourimetry("sRGB OETF").hints, ("From snapshot",))
+
+        with open(self.source, 'a') as file:
+            file.write("\n")
+        rebuilt = config.Config.from_files([self.source], self.snapshot)
+        self.assertEqual(rebuilt.get_colourimetry("sRGB OETF").hints, conf.get_colourimetry("sRGB OETF").hints)
+
+class TestConfigBatch(unittest.TestCase):
+    def setUp(self) -> None:
+        self.conf = config.Config()
+        self.conf.add_colourimetry("tests//files//tcolor_test.yaml")
+
+    def test_convert_batch(self):
+        values = np.random.default_rng(5).random((6, 3))
+        pairs = [("sRGB", "Display P3 Presentation"),
+                 ("Display P3 Presentation", "sRGB"),
+                 ("sRGB Presentation", "Display P3 Presentation"),
+                 ("IEC sRGB", "Display P3 Presentation"),
+                 ("Display P3 Presentation", "Display P3 Presentation"),
+                 ("sRGB", "Display P3 Presentation")]
+
+        out = self.conf.convert_batch(values, pairs)
+
+        self.assertEqual(out.shape, values.shape)
+        for row, pair in enumerate(pairs):
+            np.testing.assert_allclose(out[row], self.conf.build_transform(*pair).apply(values[row:row + 1])[0], atol=1e-12)
+        self.assertEqual(len(self.conf._transform_cache), 3)
+
+    def test_convert_batch_invalid(self):
+        self.assertRaises(ValueError, self.conf.convert_batch, np.zeros((2, 3)), [("sRGB", "sRGB")])
+        self.assertRaises(ValueError, self.conf.convert_batch, np.zeros((2, 4)), [("sRGB", "sRGB")] * 2)
+
+class TestConfigLazy(unittest.TestCase):
+    def setUp(self) -> None:
+        self.conf = config.Config(lazy=True)
+        self.conf.add_colourimetry("tests//files//tcolor_test.yaml")
+        self.eager = config.Config()
+        self.eager.add_colourimetry("tests//files//tcolor_test.yaml")
+
+    def test_deferred(self):
+        self.assertEqual(self.conf.config, {})
+
+        col = self.conf.get_colourimetry("sRGB Presentation")
+
+        # Only the chunk and the chunks it references are built
+        self.assertEqual(set(self.conf.config), {"sRGB Presentation", "BT.709 Primaries", "D65 White", "sRGB OETF", "sRGB EOTF"})
+        self.assertIn("Sonfu Custom InHouse Transfer", self.conf._pending)
+        self.assertIs(self.conf.get_colourimetry("sRGB Presentation"), col)
+        self.assertEqual(col, self.eager.get_colourimetry("sRGB Presentation"))
+        self.assertTrue(col.colourspace_valid())
+
+    def test_alias(self):
+        col = self.conf.get_colourimetry("sRGB")
+
+        self.assertEqual(col.descriptor, "sRGB Presentation")
+        self.assertEqual(col.alias, self.eager.get_colourimetry("sRGB").alias)
+        self.assertRaises(KeyError, self.conf.get_colourimetry, "Missing")
+
+    def test_transform(self):
+        values = np.random.default_rng(6).random((4, 3))
+        lazy = self.conf.build_transform("sRGB Presentation", "Display P3 Presentation")
+        eager = self.eager.build_transform("sRGB Presentation", "Display P3 Presentation")
+
+        np.testing.assert_array_equal(lazy.apply(values), eager.apply(values))
+
+    def test_reference_added_later(self):
+        self.conf.add_colourimetry("""
+- Later:
+    RGB Primaries: Later Primaries
+    Achromatic Centroid: D65 White
+""")
+        self.assertFalse(self.conf.get_colourimetry("Later").primaries.valid())
+
+        self.conf.add_colourimetry("""
+- Later Primaries:
+    RGB Primaries: BT.709 Primaries
+""")
+        self.assertIn("Later Primaries", self.conf.config)
+        self.assertEqual(self.conf.get_colourimetry("Later").primaries.r, [0.64, 0.33])
+
+    def test_materialise(self):
+        self.conf.materialise()
+
+        self.assertEqual(self.conf._pending, set())
+        self.assertEqual(set(self.conf.config), set(self.eager.config))
+        for descriptor, col in self.eager.config.items():
+            self.assertEqual(self.conf.config[descriptor], col)
+
+class TestConfigReload(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.directory.name, "tcolor_test.yaml")
+        shutil.copy("tests//files//tcolor_test.yaml", self.source)
+        self.extra = os.path.join(self.directory.name, "extra.yaml")
+        with open(self.extra, 'w') as file:
+            file.write("""
+- Extra:
+    RGB Primaries: BT.709 Primaries
+    Achromatic Centroid: D65 White
+    Alias: [extra]
+- Standalone:
+    RGB Primaries: {Red: {x: 0.64, y: 0.33}, Green: {x: 0.3, y: 0.6}, Blue: {x: 0.15, y: 0.06}}
+    Achromatic Centroid: {x: 0.3127, y: 0.329}
+""")
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def change_white(self):
+        with open(self.source, 'r') as file:
+            content = file.read()
+        with open(self.source, 'w') as file:
+            file.write(content.replace("{x: 0.3127, y: 0.3290}", "{x: 0.32168, y: 0.33767}"))
+
+    def check_reload(self, conf, keeps_unchanged=True):
+        self.assertEqual(conf.reload(), [])
+
+        logc = conf.get_colourimetry("Alexa LogC 800 EI SUP V3")
+        standalone = conf.get_colourimetry("Standalone")
+        kept = conf.build_transform("Standalone", "Standalone")
+        dropped = conf.build_transform("sRGB Presentation", "Standalone")
+
+        self.change_white()
+        self.assertEqual(conf.reload(), [self.source])
+
+        self.assertEqual(conf.get_colourimetry("D65 White").achromatic, [0.32168, 0.33767])
+        self.assertEqual(conf.get_colourimetry("sRGB").achromatic, [0.32168, 0.33767])
+        self.assertEqual(conf.get_colourimetry("extra").achromatic, [0.32168, 0.33767])
+        self.assertEqual(conf.get_colourimetry("sRGB").alias, ("sRGB", "Internal_srgb_v2.0", "IEC sRGB"))
+        self.assertTrue(conf.get_colourimetry("sRGB Presentation").colourspace_valid())
+        self.assertIs(conf.get_colourimetry("Standalone"), standalone)
+        self.assertIs(conf.build_transform("Standalone", "Standalone"), kept)
+        self.assertIsNot(conf.build_transform("sRGB Presentation", "Standalone"), dropped)
+        if keeps_unchanged:
+            self.assertIs(conf.get_colourimetry("Alexa LogC 800 EI SUP V3"), logc)
+
+    def test_reload(self):
+        conf = config.Config()
+        conf.add_many([self.source, self.extra])
+        self.check_reload(conf)
+
+    def test_reload_lazy(self):
+        conf = config.Config(lazy=True)
+        conf.add_many([self.source, self.extra])
+        self.check_reload(conf)
+
+    def test_reload_snapshot(self):
+        config.Config.from_files([self.source, self.extra], os.path.join(self.directory.name, "snapshot.json"))
+        conf = config.Config.from_files([self.source, self.extra], os.path.join(self.directory.name, "snapshot.json"))
+        self.assertEqual(conf._definitions, {})
+        # The previous definitions are unknown, so every chunk of the changed file is rebuilt
+        self.check_reload(conf, keeps_unchanged=False)
+
+    def test_deleted(self):
+        conf = config.Config()
+        conf.add_many([self.source, self.extra])
+        conf.add_colourimetry(colourimetry.Colourimetry(descriptor="Object", achromatic="Standalone"))
+        os.remove(self.extra)
+
+        self.assertEqual(conf.reload(), [self.extra])
+        self.assertRaises(KeyError, conf.get_colourimetry, "extra")
+        self.assertRaises(KeyError, conf.get_colourimetry, "Extra")
+        self.assertNotIn(self.extra, conf.sources)
+        self.assertFalse(conf.get_colourimetry("Object").achromatic_valid())
+
+        with open(self.extra, 'w') as file:
+            file.write("- Standalone:\n    Achromatic Centroid: {x: 0.3, y: 0.3}\n")
+        conf.add_colourimetry(self.extra)
+        self.assertEqual(conf.get_colourimetry("Object").achromatic, [0.3, 0.3])
+
+class TestConfigThreads(unittest.TestCase):
+    def setUp(self) -> None:
+        self.directory = tempfile.TemporaryDirectory()
+        self.source = os.path.join(self.directory.name, "tcolor_test.yaml")
+        shutil.copy("tests//files//tcolor_test.yaml", self.source)
+        with open(self.source, 'r') as file:
+            self.content = file.read()
+
+    def tearDown(self) -> None:
+        self.directory.cleanup()
+
+    def run_threads(self, targets):
+        errors = []
+
+        def run(target):
+            try:
+                target()
+            except Exception as e:
+                errors.append(e)
+
+        threads = [threading.Thread(target=run, args=(target,)) for target in targets]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+        self.assertEqual(errors, [])
+
+    def test_reads_during_writes(self):
+        conf = config.Config()
+        conf.add_colourimetry(self.source)
+        whites = {(0.3127, 0.329), (0.32168, 0.33767)}
+        done = threading.Event()
+
+        def read():
+            while not done.is_set():
+                col = conf.get_colourimetry("sRGB")
+                self.assertTrue(col.colourspace_valid())
+                self.assertIn(tuple(col.achromatic), whites)
+                conf.build_transform("sRGB", "Display P3 Presentation")
+
+        def write():
+            for n in range(20):
+                conf.add_colourimetry("- Added %d:\n    Alias: [added alias %d]\n" % (n, n))
+                white = "{x: 0.32168, y: 0.33767}" if n % 2 == 0 else "{x: 0.3127, y: 0.3290}"
+                with open(self.source, 'w') as file:
+                    file.write(self.content.replace("{x: 0.3127, y: 0.3290}", white) + "\n" * n)
+                conf.reload()
+            done.set()
+
+        self.run_threads([read] * 4 + [write])
+        self.assertEqual(conf.get_colourimetry("added alias 19").descriptor, "Added 19")
+        self.assertEqual(conf.get_colourimetry("sRGB").achromatic, [0.3127, 0.329])
+
+    def test_published_changes(self):
+        conf = config.Config(lazy=True)
+        conf.add_colourimetry(self.source)
+        before = conf._lookup
+        conf.add_colourimetry("- Added:\n    Alias: [added alias]\n")
+        conf.get_colourimetry("sRGB")
+
+        # A change publishes the entries it touched on top of the indices' shared bases
+        after = conf._lookup
+        self.assertIs(after.config.base, before.config.base)
+        self.assertIs(after.aliases.base, before.aliases.base)
+        self.assertIn("Added", after.pending)
+        self.assertNotIn("sRGB Presentation", after.pending)
+        self.assertIn("sRGB Presentation", before.pending)
+        self.assertNotIn("Added", before.pending)
+        self.assertNotIn("added alias", before.aliases)
+        self.assertEqual(after.aliases["added alias"], "Added")
+        self.assertListEqual(list(after.config), list(conf.config))
+        self.assertEqual(len(after.pending), len(conf._pending))
+        self.assertSetEqual(set(after.pending), set(conf._pending))
+
+        # Once the changes outgrow the bases they are copied afresh
+        for n in range(40):
+            conf.add_colourimetry("- Added %d:\n    Alias: [added alias %d]\n" % (n, n))
+        self.assertIsNot(conf._lookup.aliases.base, before.aliases.base)
+        self.assertDictEqual(dict(conf._lookup.aliases), dict(conf._aliases))
+        self.assertEqual(conf.get_colourimetry("added alias 39").descriptor, "Added 39")
+
+    def test_lazy_reads(self):
+        conf = config.Config(lazy=True)
+        conf.add_colourimetry(self.source)
+        found = []
+
+        def read():
+            found.append(conf.get_colourimetry("sRGB"))
+
+        self.run_threads([read] * 8)
+        self.assertEqual(len(found), 8)
+        for col in found:
+            self.assertIs(col, found[0])
+        self.assertTrue(found[0].colourspace_valid())
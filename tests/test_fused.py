@@ -0,0 +1,101 @@
+import asyncio
+import subprocess
+import sys
+import unittest
+import numpy as np
+from tcolour import config
+from tcolour import fused
+from tcolour import parallel
+from tcolour import transform
+
+# Runs the jit kernel in the parent, then from pool threads and forked workers, in a fresh
+# interpreter so a threading layer left in a bad state shows as a process that never exits
+POOLS_SCRIPT = """
+import numpy as np
+from tcolour import config, parallel
+conf = config.Config()
+conf.add_colourimetry("tests//files//sRGB.yaml")
+TF = conf.build_transform("sRGB Presentation", "sRGB Presentation")
+frame = np.random.default_rng(0).random((256, 16, 3))
+expected = TF.apply(frame)
+for threads in (True, False):
+    with parallel.ParallelProcessor(workers=2, threads=threads) as processor:
+        np.testing.assert_allclose(processor.apply(TF, frame), expected)
+"""
+
+class TestFused(unittest.TestCase):
+    def setUp(self) -> None:
+        self.conf = config.Config()
+        self.conf.add_colourimetry("tests//files//tcolor_test.yaml")
+        self.image = np.random.default_rng(0).random((4, 5, 3)) * 1.2 - 0.1
+
+        srgb = self.conf.get_colourimetry("sRGB Presentation")
+        self.logc = srgb.replace(descriptor="LogC 709",
+                                 transfer_characteristic=self.conf.get_colourimetry("Alexa LogC 800 EI SUP V3").transfer_characteristic)
+        self.uri = srgb.replace(descriptor="Sonfu 709",
+                                transfer_characteristic=self.conf.get_colourimetry("Sonfu Custom InHouse Transfer").transfer_characteristic)
+
+    def test_sequence(self):
+        TF = self.conf.build_transform("sRGB Presentation", "Display P3 Presentation")
+        kernel = fused.compile_transform(TF, jit=False)
+
+        # Decoding runs the sequence backwards with each step in the other direction
+        self.assertEqual(kernel.decode[0].tolist(), [fused.POWER, fused.POWER_WITH_BREAK])
+        self.assertEqual(kernel.decode[1].tolist(), [True, False])
+        self.assertEqual(kernel.encode[0].tolist(), [fused.POWER_WITH_BREAK, fused.POWER])
+        np.testing.assert_allclose(kernel.apply(self.image), TF._apply_numpy(self.image), rtol=1e-12, atol=1e-12)
+
+    def test_log(self):
+        for source, destination in ((self.logc, self.conf.get_colourimetry("Display P3 Presentation")),
+                                    (self.conf.get_colourimetry("sRGB Presentation"), self.logc)):
+            TF = transform.Transform(source, destination)
+            kernel = fused.compile_transform(TF, jit=False)
+
+            out = kernel.apply(self.image.astype(np.float32))
+            self.assertEqual(out.dtype, np.float32)
+            np.testing.assert_allclose(out, TF._apply_numpy(self.image), rtol=1e-5, atol=1e-6)
+
+    def test_unsupported(self):
+        self.assertIsNone(fused.compile_transform(transform.Transform(self.uri, self.logc)))
+        self.assertIsNone(fused.compile_transform(transform.Transform(self.logc, self.uri)))
+
+    def test_fallback(self):
+        TF = self.conf.build_transform("sRGB Presentation", "Display P3 Presentation")
+        if not fused.available():
+            self.assertIsNone(TF.kernel)
+
+        fused.enabled = False
+        try:
+            np.testing.assert_allclose(TF.apply(self.image), TF._apply_numpy(self.image))
+        finally:
+            fused.enabled = True
+
+    @unittest.skipUnless(fused.available(), "Numba is not installed")
+    def test_jit(self):
+        TF = transform.Transform(self.logc, self.conf.get_colourimetry("Display P3 Presentation"))
+        self.assertIsNotNone(TF.kernel)
+
+        image = np.random.default_rng(1).random((64, 64, 3))
+        np.testing.assert_allclose(TF.apply(image), TF._apply_numpy(image), rtol=1e-12, atol=1e-12)
+
+    @unittest.skipUnless(fused.available(), "Numba is not installed")
+    def test_jit_threads(self):
+        TF = transform.Transform(self.logc, self.conf.get_colourimetry("Display P3 Presentation"))
+        image = np.random.default_rng(1).random((64, 64, 3))
+        expected = TF._apply_numpy(image)
+
+        with parallel.ParallelProcessor(workers=4, threads=True) as processor:
+            np.testing.assert_allclose(processor.apply(TF, image), expected, rtol=1e-12, atol=1e-12)
+
+        async def main():
+            return await asyncio.gather(*[TF.aapply(image) for _ in range(4)])
+
+        for out in asyncio.run(main()):
+            np.testing.assert_allclose(out, expected, rtol=1e-12, atol=1e-12)
+
+    @unittest.skipUnless(fused.available(), "Numba is not installed")
+    def test_jit_pools_exit(self):
+        subprocess.run([sys.executable, "-c", POOLS_SCRIPT], check=True, timeout=300)
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,109 @@
+import json
+import unittest
+import numpy as np
+from tcolour import config
+from tcolour import instrumentation
+from tcolour import transfer_characteristic as TC
+
+class TestInstrumentation(unittest.TestCase):
+    def setUp(self) -> None:
+        instrumentation.reset()
+
+    def tearDown(self) -> None:
+        instrumentation.disable()
+        instrumentation.reset()
+
+    def test_disabled(self):
+        forward = TC.TransferCharacteristicPower.__dict__["forward_transfer"]
+        get_colourimetry = config.Config.__dict__["get_colourimetry"]
+
+        conf = config.Config()
+        conf.add_colourimetry("tests//files//tcolor_test.yaml")
+        conf.build_transform("sRGB Presentation", "Display P3 Presentation")
+
+        self.assertEqual(instrumentation.snapshot(), {"enabled": False, "calls": {}, "caches": {}})
+        self.assertIs(TC.TransferCharacteristicPower.__dict__["forward_transfer"], forward)
+        self.assertIs(config.Config.__dict__["get_colourimetry"], get_colourimetry)
+
+    def test_enable_disable(self):
+        forward = TC.TransferCharacteristicPower.__dict__["forward_transfer"]
+        instrumentation.enable()
+        instrumentation.enable()
+        self.assertIsNot(TC.TransferCharacteristicPower.__dict__["forward_transfer"], forward)
+
+        instrumentation.disable()
+        self.assertIs(TC.TransferCharacteristicPower.__dict__["forward_transfer"], forward)
+
+    def test_config(self):
+        instrumentation.enable()
+        conf = config.Config()
+        conf.add_colourimetry("tests//files//tcolor_test.yaml")
+        conf.get_colourimetry("sRGB OETF")
+        conf.get_colourimetry("D65 White")
+        conf.build_transform("sRGB Presentation", "Display P3 Presentation")
+        conf.build_transform("sRGB Presentation", "Display P3 Presentation")
+        conf.build_transform("sRGB Presentation", "Display P3 Presentation")
+
+        calls = instrumentation.snapshot()["calls"]
+        self.assertEqual(calls["Config.add_colourimetry"]["calls"], 1)
+        self.assertEqual(calls["Config.parse_data"]["calls"], 1)
+        self.assertGreaterEqual(calls["Config.update_references"]["calls"], 1)
+        self.assertEqual(calls["Config.build_transform"]["calls"], 3)
+        self.assertGreaterEqual(calls["Config.get_colourimetry"]["calls"], 8)
+        self.assertGreater(calls["Config.add_colourimetry"]["seconds"], 0.0)
+
+        cache = instrumentation.snapshot()["caches"]["Config.transform_cache"]
+        self.assertEqual(cache["hits"], 2)
+        self.assertEqual(cache["misses"], 1)
+        self.assertAlmostEqual(cache["hit_rate"], 2 / 3)
+
+    def test_transfer(self):
+        power = TC.TransferCharacteristicPower({"a": 2.2})
+        instrumentation.enable()
+        power.forward_transfer(np.linspace(0.0, 1.0, 1000))
+        power.forward_transfer([0.1, 0.2])
+        power.inverse_transfer(0.5)
+
+        calls = instrumentation.snapshot()["calls"]
+        self.assertEqual(calls["TransferCharacteristicPower.forward_transfer"]["calls"], 2)
+        self.assertEqual(calls["TransferCharacteristicPower.forward_transfer"]["elements"], 1002)
+        self.assertEqual(calls["TransferCharacteristicPower.inverse_transfer"]["elements"], 1)
+        self.assertGreater(calls["TransferCharacteristicPower.forward_transfer"]["elements_per_second"], 0.0)
+
+    def test_sequence_counted_once(self):
+        conf = config.Config()
+        conf.add_colourimetry("tests//files//tcolor_test.yaml")
+        sequence = conf.get_colourimetry("sRGB Presentation").transfer_characteristic
+        instrumentation.enable()
+        sequence.forward_transfer(np.linspace(0.0, 1.0, 100))
+
+        calls = instrumentation.snapshot()["calls"]
+        self.assertListEqual(list(calls), ["TransferCharacteristicSequence.forward_transfer"])
+        self.assertEqual(calls["TransferCharacteristicSequence.forward_transfer"]["elements"], 100)
+
+    def test_caches(self):
+        instrumentation.enable()
+        cubic = TC.TransferCharacteristicPower({"a": 3.0})
+        TC.TransferCharacteristic.inverse_transfer(cubic, 0.5)
+        TC.TransferCharacteristic.inverse_transfer(cubic, 0.25)
+        cubic.decode_integer(np.arange(4, dtype=np.uint8), 8, forward=True, dtype=np.float64)
+        cubic.decode_integer(np.arange(4, dtype=np.uint8), 8, forward=True, dtype=np.float64)
+
+        caches = instrumentation.snapshot()["caches"]
+        self.assertEqual(caches["TransferCharacteristic.numeric_inverses"], {"hits": 1, "misses": 1, "hit_rate": 0.5})
+        self.assertEqual(caches["quantisation.decode_tables"]["hits"], 1)
+
+    def test_reset_and_export(self):
+        instrumentation.enable()
+        TC.TransferCharacteristicPower({"a": 2.2}).forward_transfer(0.5)
+        exported = json.loads(instrumentation.export_json())
+        self.assertTrue(exported["enabled"])
+        self.assertIn("TransferCharacteristicPower.forward_transfer", exported["calls"])
+
+        instrumentation.disable()
+        self.assertIn("TransferCharacteristicPower.forward_transfer", instrumentation.snapshot()["calls"])
+        instrumentation.reset()
+        self.assertEqual(instrumentation.snapshot()["calls"], {})
+
+if __name__ == '__main__':
+    unittest.main()
@@ -0,0 +1,62 @@
+import os
+import tempfile
+import unittest
+import numpy as np
+from tcolour import config
+from tcolour import processing
+
+class TestProcessing(unittest.TestCase):
+    def setUp(self) -> None:
+        self.conf = config.Config()
+        self.conf.add_colourimetry("tests//files//tcolor_test.yaml")
+        self.transform = self.conf.build_transform("sRGB Presentation", "Display P3 Presentation")
+        self.logc = self.conf.get_colourimetry("Alexa LogC 800 EI SUP V3").transfer_characteristic
+        self.frame = np.random.default_rng(3).random((100, 40, 3)).astype(np.float32)
+
+    def test_process_stream(self):
+        tiles = processing.iter_tiles(self.frame, tile_rows=16)
+        results = list(processing.process_stream(self.transform, tiles))
+
+        self.assertEqual(len(results), 7)
+        np.testing.assert_allclose(np.concatenate(results), self.transform.apply(self.frame), atol=1e-6)
+
+    def test_process_stream_inverse(self):
+        tiles = [self.frame[:50], self.frame[50:]]
+        results = list(processing.process_stream(self.logc, tiles, forward=False))
+
+        np.testing.assert_array_equal(np.concatenate(results), self.logc.inverse_transfer(self.frame))
+
+    def test_in_place(self):
+        check = self.logc.forward_transfer(self.frame)
+        buffer = np.empty((10, 40, 3), dtype=np.float32)
+
+        def reader():
+            for row in range(0, 100, 10):
+                buffer[...] = self.frame[row:row + 10]
+                yield buffer
+
+        for row, tile in zip(range(0, 100, 10), processing.process_stream(self.logc, reader(), in_place=True)):
+            self.assertIs(tile, buffer)
+            np.testing.assert_array_equal(tile, check[row:row + 10])
+
+    def test_in_place_integer(self):
+        tiles = [np.zeros((2, 3), dtype=np.uint16)]
+        self.assertRaises(ValueError, list, processing.process_stream(self.logc, tiles, in_place=True))
+
+    def test_process_memory_mapped_frame(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "frame.npy")
+            np.save(path, self.frame)
+            frame = np.load(path, mmap_mode="r+")
+
+            out = processing.process_frame(self.transform, frame, tile_rows=32, in_place=True)
+
+            self.assertIs(out, frame)
+            np.testing.assert_allclose(np.load(path), self.transform.apply(self.frame), atol=1e-6)
+            del frame, out
+
+    def test_process_frame(self):
+        out = processing.process_frame(self.logc, self.frame, tile_rows=7)
+
+        np.testing.assert_array_equal(out, self.logc.forward_transfer(self.frame))
+        self.assertRaises(TypeError, processing.process_frame, "sRGB", self.frame)
@@ -0,0 +1,77 @@
+import unittest
+import numpy as np
+from tcolour import quantisation
+from tcolour import transfer_characteristic as TC
+
+class TestQuantisation(unittest.TestCase):
+    def setUp(self) -> None:
+        self.TCL = TC.TransferCharacteristicLog10WithBreak(parameters=
+                                                           {'a': 5.555556,
+                                                            'b': 0.052272,
+                                                            'c': 0.24719,
+                                                            'd': 0.385537,
+                                                            'e': 5.367655,
+                                                            'f': 0.092809,
+                                                            'h': 0.010591}
+                                                            )
+        self.TCPWB = TC.TransferCharacteristicPowerWithBreak(parameters={'a': 1.055, 'b': -0.055, 'c': 12.92, 'd': 0.0031308, 'g': 2.4})
+
+    def test_code_range(self):
+        self.assertEqual(quantisation.code_range(8), (0, 255))
+        self.assertEqual(quantisation.code_range(10, legal=True), (64, 940))
+        self.assertEqual(quantisation.code_range(16, legal=True), (4096, 60160))
+        self.assertRaises(ValueError, quantisation.code_range, 6, legal=True)
+        self.assertEqual(quantisation.code_dtype(10), np.uint16)
+
+    def test_quantise(self):
+        codes = quantisation.quantise([0.0, 0.5 / 255, 0.51 / 255, 1.0, 1.5, -0.5, np.nan], 8)
+
+        self.assertEqual(codes.dtype, np.uint8)
+        self.assertListEqual(codes.tolist(), [0, 0, 1, 255, 255, 0, 0])
+
+        codes = np.arange(1024, dtype=np.uint16)
+        np.testing.assert_array_equal(quantisation.quantise(quantisation.dequantise(codes, 10, legal=True), 10, legal=True), codes)
+        self.assertEqual(quantisation.quantise(1.0, 10, legal=True), 940)
+
+    def test_decode(self):
+        codes = np.array([[0, 1000, 23456], [40000, 50000, 65535]], dtype=np.uint16)
+        out = self.TCL.decode_integer(codes, 16)
+
+        self.assertEqual(out.dtype, np.float32)
+        self.assertEqual(out.shape, codes.shape)
+        np.testing.assert_allclose(out, self.TCL.inverse_transfer(codes / 65535.0), rtol=1e-6)
+        self.assertIs(quantisation.decode_table(self.TCL, 16), quantisation.decode_table(self.TCL, 16))
+
+        # 10 bit legal range codes carried in uint16, with out of range codes clipped
+        codes = np.array([64, 502, 940, 2000], dtype=np.uint16)
+        out = self.TCL.decode_integer(codes, 10, legal=True, dtype=np.float64)
+        np.testing.assert_allclose(out[:3], self.TCL.inverse_transfer(np.array([0.0, 438.0 / 876.0, 1.0])))
+        self.assertEqual(out[3], self.TCL.inverse_transfer(1023.0 / 876.0 - 64.0 / 876.0))
+
+        self.assertRaises(TypeError, self.TCL.decode_integer, np.array([0.5]), 10)
+        self.assertRaises(ValueError, TC.TransferCharacteristic().decode_integer, codes, 10)
+
+    def test_decode_wide(self):
+        codes = np.array([0, 2 ** 20, 2 ** 24 - 1], dtype=np.uint32)
+        out = self.TCL.decode_integer(codes, 24)
+
+        np.testing.assert_allclose(out, self.TCL.inverse_transfer(codes / (2 ** 24 - 1.0)), rtol=1e-6)
+
+    def test_encode(self):
+        data = np.linspace(0.0, 1.0, 1001, dtype=np.float32)
+
+        codes = self.TCPWB.encode_integer(data, 8)
+        self.assertEqual(codes.dtype, np.uint8)
+        np.testing.assert_array_equal(codes, np.round(self.TCPWB.forward_transfer(data.astype(np.float64)) * 255).astype(np.uint8))
+
+        codes = self.TCPWB.encode_integer(data, 10, legal=True)
+        self.assertEqual(codes.dtype, np.uint16)
+        self.assertEqual((codes.min(), codes.max()), (64, 940))
+
+        # Encoding then decoding the same characteristic returns each code's linear value
+        codes = np.arange(256, dtype=np.uint8)
+        linear = self.TCPWB.decode_integer(codes, 8, dtype=np.float64)
+        np.testing.assert_array_equal(self.TCPWB.encode_integer(linear, 8), codes)
+
+if __name__ == '__main__':
+    unittest.main()